@@ -1,19 +1,98 @@
+import hashlib
+import hmac
 from typing import Annotated
 from uuid import UUID
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, Request, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
 from app.core.exceptions import ResourceNotFoundException
+from app.core.profile_claims import ProfileState, profile_versions
+from app.core.rate_limit import TokenBucket, check_rate_limit
 from app.core.security import TokenManager
-from app.db.session import get_db_session
+from app.core.sessions import revoked_sessions
+from app.db.session import async_session_maker, get_db_session
 from app.models.user import User
+from app.schemas.user import UserLogin, UserResponse
 from app.services.user import UserService
 
 security = HTTPBearer()
 
 
+def _client_ip(request: Request) -> str:
+    """IP of client (run uvicorn with --proxy-headers behind proxy)"""
+    return request.client.host if request.client else "unknown"
+
+
+async def login_rate_limit(request: Request, user_login: UserLogin) -> None:
+    """
+    Depends for limit login attempts by IP and by email
+
+    args:
+        request: request
+        user_login: same body as login endpoint, parsed once
+    """
+    # argon2 endpoints, limits are checked before DB and hashing
+    limits = settings.rate_limit
+    email = hashlib.sha256(user_login.email.strip().lower().encode()).hexdigest()
+    await check_rate_limit(
+        (
+            TokenBucket.per_minute(
+                "login_ip", limits.login_ip_burst, limits.login_ip_per_minute
+            ),
+            _client_ip(request),
+        ),
+        (
+            TokenBucket.per_minute(
+                "login_email", limits.login_email_burst, limits.login_email_per_minute
+            ),
+            email[:32],
+        ),
+    )
+
+
+async def register_rate_limit(request: Request) -> None:
+    """
+    Depends for limit registrations by IP
+
+    args:
+        request: request
+    """
+    limits = settings.rate_limit
+    bucket = TokenBucket.per_minute(
+        "register_ip", limits.register_ip_burst, limits.register_ip_per_minute
+    )
+    await check_rate_limit((bucket, _client_ip(request)))
+
+
+async def require_internal(
+    x_internal_token: Annotated[str | None, Header()] = None,
+) -> None:
+    """
+    Depends for internal and admin endpoints: X-Internal-Token must be
+    INTERNAL_API_TOKEN, without configured token they exist only in debug
+
+    args:
+        x_internal_token: X-Internal-Token header
+    """
+    expected = settings.security.internal_api_token
+    if not expected:
+        if not settings.debug:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+        return
+
+    if x_internal_token is None or not hmac.compare_digest(
+        x_internal_token.encode(), expected.encode()
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Internal token required",
+        )
+
+
 async def get_current_user_id(
     credentials: HTTPAuthorizationCredentials = Depends(security),
 ):
@@ -34,6 +113,17 @@ async def get_current_user_id(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    # session ended by logout, token is valid until exp otherwise.
+    # claims are already cached by extract_user_id_from_token
+    if len(revoked_sessions) and (
+        TokenManager.decode_token_cached(token).get("sid") in revoked_sessions
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token revoked",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
     return user_id
 
 
@@ -51,11 +141,62 @@ async def get_current_user(
     service = UserService(session)
 
     try:
-        user_response = await service.get_user_by_id(user_id)
-        user = await service.repository.get_by_user_id(user_id)
-        return user
+        return await service.get_current_principal(user_id)
     except ResourceNotFoundException:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found",
         )
+
+
+def _profile_from_claims(token: str) -> UserResponse | None:
+    """
+    Profile snapshot of token, None when it is missing or outdated
+
+    raises:
+        HTTPException 401 if user was deactivated after token was issued
+    """
+    payload = TokenManager.decode_token_cached(token)
+    profile = payload.get("profile")
+    version = payload.get("pv")
+    if profile is None or not isinstance(version, (int, float)):
+        return None
+
+    state = profile_versions.check(payload["sub"], version)
+    if state is ProfileState.REVOKED:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token revoked",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    if state is ProfileState.STALE:
+        return None
+
+    try:
+        return UserResponse.model_validate(profile)
+    except ValidationError:
+        # snapshot of older schema
+        return None
+
+
+async def get_current_profile(
+    user_id: Annotated[UUID, Depends(get_current_user_id)],
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+) -> UserResponse:
+    """
+    Depends for taking profile of current user, from token claims when
+    PROFILE_CLAIMS_ENABLED and snapshot is up to date, else from DB
+
+    args:
+        user_id: ID user from token
+        credentials: HTTP Bearer credentials
+    """
+    if settings.security.profile_claims_enabled:
+        profile = _profile_from_claims(credentials.credentials)
+        if profile is not None:
+            return profile
+
+    # session is opened only here, answer from claims does not make it
+    async with async_session_maker() as session:
+        user = await get_current_user(user_id, session)
+        return UserResponse.model_validate(user)
@@ -1,5 +1,8 @@
-from app.api.v1 import users
+from app.api.v1 import accounts, internal, transactions, users
 
 __all__ = [
+    "accounts",
+    "internal",
+    "transactions",
     "users",
 ]
@@ -0,0 +1,171 @@
+from datetime import datetime
+from typing import Annotated
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.dependencies import get_current_user
+from app.core.metrics import TimedRoute
+from app.db.session import get_db_session
+from app.models.user import User
+from app.schemas.account import (
+    AccountBalance,
+    BalanceAsOf,
+    BalancePeriod,
+    BalanceSlotsUpdate,
+    BalanceSummary,
+)
+from app.schemas.transaction import StatementFilter, StatementPage
+from app.services.account import AccountService
+from app.services.transaction import ExportFormat, TransactionService
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+router = APIRouter(
+    prefix="/accounts",
+    tags=["accounts"],
+    route_class=TimedRoute,
+)
+
+
+@router.get(
+    "/{account_id}/balance",
+    response_model=AccountBalance,
+)
+async def get_balance(
+    account_id: UUID,
+    current_user: Annotated[User, Depends(get_current_user)],
+    session: Annotated[AsyncSession, Depends(get_db_session)],
+):
+    """
+    Take balance of own account
+    requires authentication (Bearer token).
+    """
+    service = AccountService(session)
+    return await service.get_balance(current_user.user_id, account_id)
+
+
+@router.get(
+    "/{account_id}/balance/as-of",
+    response_model=BalanceAsOf,
+)
+async def get_balance_as_of(
+    account_id: UUID,
+    at: Annotated[datetime, Query()],
+    current_user: Annotated[User, Depends(get_current_user)],
+    session: Annotated[AsyncSession, Depends(get_db_session)],
+):
+    """
+    Balance of own account at moment in past
+    requires authentication (Bearer token).
+
+    - at: moment, transactions completed before it are counted
+    """
+    service = AccountService(session)
+    return await service.get_balance_as_of(current_user.user_id, account_id, at)
+
+
+@router.get(
+    "/{account_id}/balance/summary",
+    response_model=BalanceSummary,
+)
+async def get_balance_summary(
+    account_id: UUID,
+    period: Annotated[BalancePeriod, Query()],
+    current_user: Annotated[User, Depends(get_current_user)],
+    session: Annotated[AsyncSession, Depends(get_db_session)],
+):
+    """
+    Opening and closing balance, credits and debits of own account for days
+    (monthly statement)
+    requires authentication (Bearer token).
+
+    - date_from, date_to: first and last day, both included
+    """
+    service = AccountService(session)
+    return await service.get_balance_summary(current_user.user_id, account_id, period)
+
+
+@router.get(
+    "/{account_id}/statement",
+    response_model=StatementPage,
+)
+async def get_statement(
+    account_id: UUID,
+    filters: Annotated[StatementFilter, Query()],
+    current_user: Annotated[User, Depends(get_current_user)],
+    session: Annotated[AsyncSession, Depends(get_db_session)],
+    cursor: Annotated[str | None, Query()] = None,
+    limit: Annotated[int, Query(ge=1, le=200)] = 50,
+):
+    """
+    Statement of own account (sent and received), newest first
+    requires authentication (Bearer token).
+
+    - transaction_type, status: exact match
+    - date_from, date_to: created_at range [date_from, date_to)
+    - amount_min, amount_max: amount range
+    - cursor: next_cursor from previous page
+    """
+    service = AccountService(session)
+    return await service.get_statement(
+        current_user.user_id, account_id, filters, cursor=cursor, limit=limit
+    )
+
+
+@router.put(
+    "/{account_id}/balance-slots",
+    response_model=AccountBalance,
+)
+async def set_balance_slots(
+    account_id: UUID,
+    slots_update: BalanceSlotsUpdate,
+    current_user: Annotated[User, Depends(get_current_user)],
+    session: Annotated[AsyncSession, Depends(get_db_session)],
+):
+    """
+    Split balance of hot account (merchant, payroll) to slots,
+    so concurrent incoming transfers do not wait for one row lock
+    requires authentication (Bearer token).
+
+    - slots: count of slots, 0 - disable
+    """
+    service = AccountService(session)
+    return await service.set_balance_slots(
+        current_user.user_id, account_id, slots_update.slots
+    )
+
+
+@router.get(
+    "/{account_id}/transactions/export",
+    response_class=StreamingResponse,
+)
+async def export_transactions(
+    account_id: UUID,
+    current_user: Annotated[User, Depends(get_current_user)],
+    session: Annotated[AsyncSession, Depends(get_db_session)],
+    export_format: Annotated[ExportFormat, Query(alias="format")] = "csv",
+):
+    """
+    Export full transaction history of own account,
+    rows are streamed, so history of any size can be downloaded
+    requires authentication (Bearer token).
+
+    - format: csv or ndjson
+    """
+    await AccountService(session).get_own_account(current_user.user_id, account_id)
+
+    return StreamingResponse(
+        TransactionService.export(account_id, export_format),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={
+            "Content-Disposition": (
+                f'attachment; filename="transactions-{account_id}.{export_format}"'
+            )
+        },
+    )
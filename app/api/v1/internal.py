@@ -0,0 +1,48 @@
+from fastapi import APIRouter, Depends
+
+from app.api.dependencies import require_internal
+from app.core.cache_backend import cache_metrics, get_cache_backend
+from app.core.metrics import TimedRoute
+from app.db.session import get_pool_status
+from app.schemas.internal import CacheLookupStatus, CacheStatus, PoolStatus
+
+router = APIRouter(
+    prefix="/internal",
+    tags=["internal"],
+    include_in_schema=False,
+    dependencies=[Depends(require_internal)],
+    route_class=TimedRoute,
+)
+
+
+@router.get(
+    "/pool",
+    response_model=PoolStatus,
+)
+async def pool_status():
+    """
+    State of DB connection pool of this worker, use it for sizing
+    workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) against postgres max_connections
+    """
+    return get_pool_status()
+
+
+@router.get(
+    "/cache",
+    response_model=CacheStatus,
+)
+async def cache_status():
+    """
+    Hit rate of cached lookups in this worker and errors of cache backend
+    """
+    backend = get_cache_backend()
+    return CacheStatus(
+        backend=backend.name,
+        errors=backend.errors,
+        lookups={
+            namespace: CacheLookupStatus(
+                hits=metrics.hits, misses=metrics.misses, hit_rate=metrics.hit_rate
+            )
+            for namespace, metrics in cache_metrics.items()
+        },
+    )
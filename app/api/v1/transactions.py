@@ -0,0 +1,40 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.dependencies import get_current_user
+from app.core.metrics import TimedRoute
+from app.db.session import get_db_session
+from app.models.user import User
+from app.schemas.transaction import TransactionResponse, TransferCreate
+from app.services.transaction import TransactionService
+
+router = APIRouter(
+    prefix="/transactions",
+    tags=["transactions"],
+    route_class=TimedRoute,
+)
+
+
+@router.post(
+    "/transfer",
+    response_model=TransactionResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+async def transfer(
+    transfer_create: TransferCreate,
+    current_user: Annotated[User, Depends(get_current_user)],
+    session: Annotated[AsyncSession, Depends(get_db_session)],
+):
+    """
+    Transfer money from own account to another account
+    requires authentication (Bearer token).
+
+    - from_account_id: own account
+    - to_account_id: receiver account (same currency)
+    - amount: positive amount
+    - reference_number: optional unique tracking number
+    """
+    service = TransactionService(session)
+    return await service.transfer(current_user.user_id, transfer_create)
@@ -1,18 +1,37 @@
 from typing import Annotated
 
-from app.core.exceptions import InvalidCredentialsException, UserAlreadyExistsException
-from fastapi import APIRouter, Depends, HTTPException, status
+from app.core.exceptions import (
+    InvalidCredentialsException,
+    InvalidRefreshTokenException,
+    UserAlreadyExistsException,
+)
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.dependencies import get_current_user
+from app.api.dependencies import (
+    get_current_profile,
+    login_rate_limit,
+    register_rate_limit,
+    require_internal,
+)
+from app.core.metrics import TimedRoute
 from app.db.session import get_db_session
-from app.models.user import User
-from app.schemas.user import UserCreate, UserLogin, UserResponse
+from app.schemas.user import (
+    RefreshRequest,
+    TokenPair,
+    TokenResponse,
+    UserCreate,
+    UserImportResult,
+    UserLogin,
+    UserPage,
+    UserResponse,
+)
 from app.services.user import UserService
 
 router = APIRouter(
     prefix="/users",
     tags=["users"],
+    route_class=TimedRoute,
 )
 
 
@@ -20,6 +39,7 @@ router = APIRouter(
     "/register",
     response_model=UserResponse,
     status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(register_rate_limit)],
 )
 async def register(
     user_create: UserCreate,
@@ -42,17 +62,35 @@ async def register(
         raise e.to_http_exception()
 
 
-class TokenResponse(UserResponse):
-    """Response with token after login"""
+@router.post(
+    "/import",
+    response_model=UserImportResult,
+    status_code=status.HTTP_200_OK,
+    include_in_schema=False,
+    dependencies=[Depends(require_internal)],
+)
+async def import_users(
+    request: Request,
+    session: Annotated[AsyncSession, Depends(get_db_session)],
+    batch_size: Annotated[int, Query(ge=1, le=10_000)] = 1000,
+):
+    """
+    Bulk register users from NDJSON body (application/x-ndjson),
+    one user per line with same fields as /register.
+    internal: requires X-Internal-Token (INTERNAL_API_TOKEN).
 
-    access_token: str
-    token_type: str = "bearer"
+    body is read as stream, every batch is committed separately,
+    existing emails and invalid lines are reported by line number
+    """
+    service = UserService(session)
+    return await service.import_users(request.stream(), batch_size=batch_size)
 
 
 @router.post(
     "/login",
     response_model=TokenResponse,
     status_code=status.HTTP_200_OK,
+    dependencies=[Depends(login_rate_limit)],
 )
 async def login(
     user_login: UserLogin,
@@ -67,24 +105,89 @@ async def login(
     service = UserService(session)
 
     try:
-        user_responce, access_token = await service.authenticate_user(user_login)
-        return {
-            **user_responce.model_dump(),
-            "access_token": access_token,
-        }
+        user_response, access_token, refresh_token = await service.authenticate_user(
+            user_login
+        )
+        # declared model is returned, FastAPI does not validate it again
+        return TokenResponse.for_user(user_response, access_token, refresh_token)
     except InvalidCredentialsException as e:
         raise e.to_http_exception()
 
 
+@router.post(
+    "/refresh",
+    response_model=TokenPair,
+    status_code=status.HTTP_200_OK,
+)
+async def refresh(
+    body: RefreshRequest,
+    session: Annotated[AsyncSession, Depends(get_db_session)],
+):
+    """
+    New access token for refresh token of login, without password.
+    refresh token is rotated: response has new one, old one ends session
+    when it is used again
+
+    - refresh_token: refresh token from login or previous refresh
+    """
+    service = UserService(session)
+
+    try:
+        access_token, refresh_token = await service.refresh_tokens(body.refresh_token)
+        return TokenPair(access_token=access_token, refresh_token=refresh_token)
+    except InvalidRefreshTokenException as e:
+        raise e.to_http_exception()
+
+
+@router.post(
+    "/logout",
+    status_code=status.HTTP_204_NO_CONTENT,
+)
+async def logout(
+    body: RefreshRequest,
+    session: Annotated[AsyncSession, Depends(get_db_session)],
+):
+    """
+    End session: refresh token stops working, access tokens of session
+    are rejected within SESSION_REVOCATION_SYNC_INTERVAL_SECONDS
+
+    - refresh_token: refresh token of session
+    """
+    service = UserService(session)
+    await service.logout(body.refresh_token)
+
+
 @router.get(
     "/me",
     response_model=UserResponse,
 )
 async def get_profile(
-    current_user: Annotated[User, Depends(get_current_user)],
+    profile: Annotated[UserResponse, Depends(get_current_profile)],
 ):
     """
     Take profile current user
     requires authentication (Bearer token).
     """
-    return UserResponse.model_validate(current_user)
+    return profile
+
+
+@router.get(
+    "",
+    response_model=UserPage,
+    include_in_schema=False,
+    dependencies=[Depends(require_internal)],
+)
+async def list_users(
+    session: Annotated[AsyncSession, Depends(get_db_session)],
+    cursor: Annotated[str | None, Query()] = None,
+    limit: Annotated[int, Query(ge=1, le=100)] = 10,
+):
+    """
+    List active users, newest pages are as fast as oldest
+    internal: requires X-Internal-Token (INTERNAL_API_TOKEN).
+
+    - cursor: next_cursor from previous page
+    - limit: page size
+    """
+    service = UserService(session)
+    return await service.list_active_users(cursor=cursor, limit=limit)
@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic import Field
 from pydantic_settings import BaseSettings
 
@@ -11,11 +13,68 @@ class DatabaseSettings(BaseSettings):
     DB_PASSWORD: str = Field(default="postgres", alias="DB_PASSWORD")
     DB_NAME: str = Field(default="finflow", alias="DB_NAME")
 
+    # connection pool
+    DB_POOL_SIZE: int = Field(default=5, alias="DB_POOL_SIZE")
+    DB_MAX_OVERFLOW: int = Field(default=10, alias="DB_MAX_OVERFLOW")
+    DB_POOL_RECYCLE: int = Field(default=1800, alias="DB_POOL_RECYCLE")
+    DB_POOL_TIMEOUT: float = Field(default=30.0, alias="DB_POOL_TIMEOUT")
+    # connections opened by every worker before it accepts requests
+    DB_POOL_MIN_SIZE: int = Field(default=2, ge=0, alias="DB_POOL_MIN_SIZE")
+    DB_STATEMENT_CACHE_SIZE: int = Field(default=100, alias="DB_STATEMENT_CACHE_SIZE")
+    # pre_ping - SELECT 1 on every checkout, monitor - background check of
+    # idle connections every DB_HEALTH_CHECK_INTERVAL, none - trust pool
+    DB_PING_STRATEGY: Literal["pre_ping", "monitor", "none"] = Field(
+        default="monitor", alias="DB_PING_STRATEGY"
+    )
+    # DB status of /health/ready is refreshed by background check
+    DB_HEALTH_CHECK_INTERVAL: float = Field(
+        default=10.0, gt=0, alias="DB_HEALTH_CHECK_INTERVAL"
+    )
+    DB_HEALTH_CHECK_TIMEOUT: float = Field(
+        default=2.0, gt=0, alias="DB_HEALTH_CHECK_TIMEOUT"
+    )
+    # read replicas: comma separated async URLs, empty - read from primary
+    DB_REPLICA_URLS: str = Field(default="", alias="DB_REPLICA_URLS")
+    DB_REPLICA_RETRY_AFTER: float = Field(default=30.0, alias="DB_REPLICA_RETRY_AFTER")
+    # full async URL instead of DB_HOST..DB_NAME (sqlite+aiosqlite:///finflow.db)
+    DB_URL: str = Field(default="", alias="DB_URL")
+    # statements slower than this are logged with shape of parameters
+    DB_SLOW_QUERY_MS: float = Field(default=200.0, alias="DB_SLOW_QUERY_MS")
+    # debug: warn when request runs same statement this many times (N+1)
+    DB_REPEATED_QUERY_THRESHOLD: int = Field(
+        default=2, alias="DB_REPEATED_QUERY_THRESHOLD"
+    )
+
     @property
     def async_url(self) -> str:
         """URL для asyncpg (FastAPI)"""
+        if self.DB_URL:
+            return self.DB_URL
         return f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
 
+    @property
+    def replica_urls(self) -> list[str]:
+        """URLs of read replicas"""
+        return [url.strip() for url in self.DB_REPLICA_URLS.split(",") if url.strip()]
+
+    @property
+    def engine_options(self) -> dict:
+        """kwargs for create_async_engine"""
+        options = {
+            "pool_size": self.DB_POOL_SIZE,
+            "max_overflow": self.DB_MAX_OVERFLOW,
+            "pool_recycle": self.DB_POOL_RECYCLE,
+            "pool_timeout": self.DB_POOL_TIMEOUT,
+            "pool_pre_ping": self.DB_PING_STRATEGY == "pre_ping",
+        }
+        if self.async_url.startswith("postgresql+asyncpg"):
+            options["connect_args"] = {
+                # asyncpg statement cache and SQLAlchemy prepared statement cache
+                "statement_cache_size": self.DB_STATEMENT_CACHE_SIZE,
+                "prepared_statement_cache_size": self.DB_STATEMENT_CACHE_SIZE,
+            }
+        return options
+
     @property
     def sync_url(self) -> str:
         """URL для psycopg2 (Alembic миграции)"""
@@ -37,6 +96,189 @@ class SecuritySettings(BaseSettings):
         default=30, alias="ACCESS_TOKEN_EXPIRE_MINUTES"
     )
 
+    # argon2 runs in worker threads, pending limit protect event loop from burst
+    hash_pool_workers: int = Field(default=4, alias="HASH_POOL_WORKERS")
+    hash_pool_max_pending: int = Field(default=64, alias="HASH_POOL_MAX_PENDING")
+    # batch jobs (user import) hold at most this many of pending slots,
+    # rest is kept for login / register
+    hash_pool_batch_slots: int = Field(default=2, ge=1, alias="HASH_POOL_BATCH_SLOTS")
+
+    # X-Internal-Token of /internal and admin endpoints (user import),
+    # empty - they are served only with DEBUG
+    internal_api_token: str = Field(default="", alias="INTERNAL_API_TOKEN")
+
+    # verified tokens, every entry lives until token "exp"
+    token_cache_size: int = Field(default=10_000, alias="TOKEN_CACHE_SIZE")
+
+    # active users loaded for authenticated requests
+    principal_cache_ttl_seconds: float = Field(
+        default=5.0, alias="PRINCIPAL_CACHE_TTL_SECONDS"
+    )
+    principal_cache_size: int = Field(default=10_000, alias="PRINCIPAL_CACHE_SIZE")
+
+    # /users/me from profile snapshot in access token, without DB
+    profile_claims_enabled: bool = Field(default=False, alias="PROFILE_CLAIMS_ENABLED")
+    # older snapshots are read from DB again
+    profile_claims_max_age_seconds: float = Field(
+        default=1800.0, gt=0, alias="PROFILE_CLAIMS_MAX_AGE_SECONDS"
+    )
+    # every worker reads profile changes of other workers this often
+    profile_sync_interval_seconds: float = Field(
+        default=2.0, gt=0, alias="PROFILE_SYNC_INTERVAL_SECONDS"
+    )
+
+    model_config = {
+        "env_file": ".env",
+        "env_prefix": "",
+        "extra": "ignore",
+    }
+
+
+class CacheSettings(BaseSettings):
+    """Shared cache settings"""
+
+    # memory - per worker, redis - shared by all workers and pods, none - off
+    backend: Literal["memory", "redis", "none"] = Field(
+        default="memory", alias="CACHE_BACKEND"
+    )
+    redis_url: str = Field(default="redis://localhost:6379/0", alias="REDIS_URL")
+    # slow redis must not be slower than postgres, it counts as miss
+    redis_timeout_seconds: float = Field(
+        default=0.1, alias="CACHE_REDIS_TIMEOUT_SECONDS"
+    )
+    memory_size: int = Field(default=10_000, alias="CACHE_MEMORY_SIZE")
+
+    ttl_seconds: float = Field(default=300.0, alias="CACHE_TTL_SECONDS")
+    # ttl is random in ttl * (1 +- jitter), so entries filled together
+    # do not expire together
+    ttl_jitter: float = Field(default=0.1, ge=0, lt=1, alias="CACHE_TTL_JITTER")
+
+    key_prefix: str = Field(default="finflow", alias="CACHE_KEY_PREFIX")
+    # bump to drop all entries written by previous deploys
+    key_version: int = Field(default=1, alias="CACHE_KEY_VERSION")
+
+    model_config = {
+        "env_file": ".env",
+        "env_prefix": "",
+        "extra": "ignore",
+    }
+
+
+class IdempotencySettings(BaseSettings):
+    """Idempotency-Key settings, keys are kept in cache backend"""
+
+    enabled: bool = Field(default=True, alias="IDEMPOTENCY_ENABLED")
+    # how long retry with same key gets stored response
+    ttl_seconds: float = Field(default=86_400.0, alias="IDEMPOTENCY_TTL_SECONDS")
+    # in-flight request holds key this long, crashed worker releases it so
+    lock_seconds: float = Field(default=30.0, alias="IDEMPOTENCY_LOCK_SECONDS")
+    poll_seconds: float = Field(default=0.05, alias="IDEMPOTENCY_POLL_SECONDS")
+    max_body_bytes: int = Field(default=1_048_576, alias="IDEMPOTENCY_MAX_BODY_BYTES")
+
+    model_config = {
+        "env_file": ".env",
+        "env_prefix": "",
+        "extra": "ignore",
+    }
+
+
+class RateLimitSettings(BaseSettings):
+    """Token bucket limits of endpoints which run argon2"""
+
+    enabled: bool = Field(default=True, alias="RATE_LIMIT_ENABLED")
+    # memory - per worker, redis - shared by all workers (REDIS_URL)
+    backend: Literal["memory", "redis"] = Field(
+        default="memory", alias="RATE_LIMIT_BACKEND"
+    )
+    # buckets kept by memory backend, least recently used is dropped
+    memory_size: int = Field(default=100_000, alias="RATE_LIMIT_MEMORY_SIZE")
+
+    # burst - bucket size, per_minute - refill rate
+    login_ip_burst: int = Field(default=20, alias="LOGIN_IP_BURST")
+    login_ip_per_minute: float = Field(default=20.0, alias="LOGIN_IP_PER_MINUTE")
+    login_email_burst: int = Field(default=5, alias="LOGIN_EMAIL_BURST")
+    login_email_per_minute: float = Field(default=5.0, alias="LOGIN_EMAIL_PER_MINUTE")
+    register_ip_burst: int = Field(default=5, alias="REGISTER_IP_BURST")
+    register_ip_per_minute: float = Field(default=5.0, alias="REGISTER_IP_PER_MINUTE")
+
+    model_config = {
+        "env_file": ".env",
+        "env_prefix": "",
+        "extra": "ignore",
+    }
+
+
+class SessionSettings(BaseSettings):
+    """Refresh token sessions settings"""
+
+    # memory - per worker, redis - shared by all workers and pods (REDIS_URL)
+    backend: Literal["memory", "redis"] = Field(
+        default="memory", alias="SESSION_BACKEND"
+    )
+    # session lives this long after last refresh
+    refresh_token_expire_days: float = Field(
+        default=30.0, gt=0, alias="REFRESH_TOKEN_EXPIRE_DAYS"
+    )
+    # every worker reads sessions revoked by other workers this often
+    revocation_sync_interval_seconds: float = Field(
+        default=2.0, gt=0, alias="SESSION_REVOCATION_SYNC_INTERVAL_SECONDS"
+    )
+
+    model_config = {
+        "env_file": ".env",
+        "env_prefix": "",
+        "extra": "ignore",
+    }
+
+
+class SnapshotSettings(BaseSettings):
+    """Daily balance snapshot settings"""
+
+    refresh_enabled: bool = Field(default=True, alias="SNAPSHOT_REFRESH_ENABLED")
+    refresh_interval_seconds: float = Field(
+        default=60.0, alias="SNAPSHOT_REFRESH_INTERVAL_SECONDS"
+    )
+    # transactions per refresh step, bigger backlog is done in several steps
+    refresh_batch_size: int = Field(default=50_000, alias="SNAPSHOT_REFRESH_BATCH_SIZE")
+    # completed_at is time of transaction start, so transactions completed
+    # in last seconds can still be uncommitted, refresher does not take them
+    settle_seconds: float = Field(default=60.0, alias="SNAPSHOT_SETTLE_SECONDS")
+
+    model_config = {
+        "env_file": ".env",
+        "env_prefix": "",
+        "extra": "ignore",
+    }
+
+
+class ServerSettings(BaseSettings):
+    """uvicorn settings of production run (python run.py prod)"""
+
+    host: str = Field(default="0.0.0.0", alias="SERVER_HOST")
+    port: int = Field(default=8000, alias="SERVER_PORT")
+    workers: int = Field(default=1, ge=1, alias="WEB_CONCURRENCY")
+    # in-flight requests are drained this long on SIGTERM, then cancelled
+    graceful_timeout_seconds: int = Field(
+        default=30, alias="SERVER_GRACEFUL_TIMEOUT_SECONDS"
+    )
+    keepalive_seconds: int = Field(default=5, alias="SERVER_KEEPALIVE_SECONDS")
+    # trust X-Forwarded-For / X-Forwarded-Proto from these addresses
+    forwarded_allow_ips: str = Field(default="127.0.0.1", alias="FORWARDED_ALLOW_IPS")
+
+    model_config = {
+        "env_file": ".env",
+        "env_prefix": "",
+        "extra": "ignore",
+    }
+
+
+class MetricsSettings(BaseSettings):
+    """Prometheus metrics and Server-Timing settings"""
+
+    enabled: bool = Field(default=True, alias="METRICS_ENABLED")
+    # Server-Timing header with db / hash / serialize time of request
+    server_timing: bool = Field(default=True, alias="SERVER_TIMING_ENABLED")
+
     model_config = {
         "env_file": ".env",
         "env_prefix": "",
@@ -51,8 +293,16 @@ class AppSettings(BaseSettings):
     description: str = "Microservice banking application"
     api_v1_prefix: str = "/api/v1"
 
-    database: DatabaseSettings = DatabaseSettings()
-    security: SecuritySettings = SecuritySettings()
+    # groups are read from env when AppSettings is made, not on import
+    database: DatabaseSettings = Field(default_factory=DatabaseSettings)
+    security: SecuritySettings = Field(default_factory=SecuritySettings)
+    snapshots: SnapshotSettings = Field(default_factory=SnapshotSettings)
+    cache: CacheSettings = Field(default_factory=CacheSettings)
+    idempotency: IdempotencySettings = Field(default_factory=IdempotencySettings)
+    rate_limit: RateLimitSettings = Field(default_factory=RateLimitSettings)
+    sessions: SessionSettings = Field(default_factory=SessionSettings)
+    metrics: MetricsSettings = Field(default_factory=MetricsSettings)
+    server: ServerSettings = Field(default_factory=ServerSettings)
 
     model_config = {
         "env_file": ".env",
@@ -62,3 +312,18 @@ class AppSettings(BaseSettings):
 
 
 settings = AppSettings()
+
+
+def apply_settings(app_settings: AppSettings) -> None:
+    """
+    Make app_settings settings of this process: fields of module-level
+    settings are replaced in place, so modules which imported it (token
+    signing, caches, rate limits ...) read same values as application
+
+    args:
+        app_settings: settings of create_app
+    """
+    if app_settings is settings:
+        return
+    for name in AppSettings.model_fields:
+        setattr(settings, name, getattr(app_settings, name))
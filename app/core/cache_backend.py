@@ -0,0 +1,368 @@
+import hashlib
+import json
+import logging
+import random
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import date, datetime
+from enum import Enum
+from functools import wraps
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Awaitable,
+    Callable,
+    Generic,
+    Optional,
+    Sequence,
+    Type,
+    TypeVar,
+)
+from uuid import UUID
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.config import CacheSettings, settings
+from app.core.cache import ExpiringLRUCache
+
+if TYPE_CHECKING:
+    from redis import asyncio as aioredis
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class CacheBackend(ABC):
+    """
+    Key-value storage of cache, values are bytes. Backend never raises
+    on storage failure, failed get is miss and failed write is skipped
+    """
+
+    name: str = "abstract"
+
+    def __init__(self):
+        self.errors = 0
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        """Take value or None if missing"""
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        """Put value for ttl seconds"""
+
+    @abstractmethod
+    async def add(self, key: str, value: bytes, ttl: float) -> bool:
+        """Put value only if key is missing, False - key exists"""
+
+    @abstractmethod
+    async def delete(self, *keys: str) -> None:
+        """Remove entries"""
+
+    async def close(self) -> None:
+        """Release connections"""
+
+
+class NullCacheBackend(CacheBackend):
+    """Cache is disabled, every get is miss"""
+
+    name = "none"
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return None
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        pass
+
+    async def add(self, key: str, value: bytes, ttl: float) -> bool:
+        return True
+
+    async def delete(self, *keys: str) -> None:
+        pass
+
+
+class MemoryCacheBackend(CacheBackend):
+    """
+    Cache in memory of this worker, invalidation does not reach other
+    workers, so entries there live until ttl
+
+    args:
+        maxsize: max count of entries
+    """
+
+    name = "memory"
+
+    def __init__(self, maxsize: int):
+        super().__init__()
+        self._cache: ExpiringLRUCache[str, bytes] = ExpiringLRUCache(maxsize)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self._cache.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._cache.set(key, value, expires_at=time.time() + ttl)
+
+    async def add(self, key: str, value: bytes, ttl: float) -> bool:
+        # no await between check and set, so it is atomic in event loop
+        if self._cache.get(key) is not None:
+            return False
+        self._cache.set(key, value, expires_at=time.time() + ttl)
+        return True
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._cache.delete(key)
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Cache in redis, shared by all workers and pods
+
+    args:
+        client: redis.asyncio client (real server or fakeredis for tests)
+    """
+
+    name = "redis"
+
+    def __init__(self, client: "aioredis.Redis"):
+        # redis is slow to import, only redis backend imports it
+        from redis.exceptions import RedisError
+
+        super().__init__()
+        self.client = client
+        self._errors = (RedisError, OSError)
+
+    @classmethod
+    def from_url(cls, url: str, timeout: float) -> "RedisCacheBackend":
+        from redis import asyncio as aioredis
+
+        return cls(
+            aioredis.Redis.from_url(
+                url, socket_timeout=timeout, socket_connect_timeout=timeout
+            )
+        )
+
+    def _failed(self, operation: str) -> None:
+        self.errors += 1
+        logger.warning("redis cache %s failed", operation, exc_info=True)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        try:
+            return await self.client.get(key)
+        except self._errors:
+            self._failed("get")
+            return None
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        try:
+            await self.client.set(key, value, px=max(1, int(ttl * 1000)))
+        except self._errors:
+            self._failed("set")
+
+    async def add(self, key: str, value: bytes, ttl: float) -> bool:
+        try:
+            return bool(
+                await self.client.set(key, value, px=max(1, int(ttl * 1000)), nx=True)
+            )
+        except self._errors:
+            # without redis every caller goes on, as if cache is disabled
+            self._failed("add")
+            return True
+
+    async def delete(self, *keys: str) -> None:
+        if not keys:
+            return
+        try:
+            await self.client.delete(*keys)
+        except self._errors:
+            self._failed("delete")
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+def create_cache_backend(config: CacheSettings) -> CacheBackend:
+    """Backend selected by CACHE_BACKEND"""
+    if config.backend == "redis":
+        return RedisCacheBackend.from_url(
+            config.redis_url, config.redis_timeout_seconds
+        )
+    if config.backend == "memory":
+        return MemoryCacheBackend(config.memory_size)
+    return NullCacheBackend()
+
+
+# made on first use or set in lifespan, so import does not connect
+_backend: Optional[CacheBackend] = None
+
+
+def get_cache_backend() -> CacheBackend:
+    """Backend of this worker, created from settings on first call"""
+    global _backend
+    if _backend is None:
+        _backend = create_cache_backend(settings.cache)
+    return _backend
+
+
+def set_cache_backend(backend: Optional[CacheBackend]) -> None:
+    """Replace backend of this worker, None - create from settings on next use"""
+    global _backend
+    _backend = backend
+
+
+@dataclass
+class CacheMetrics:
+    """Counters of one cached lookup in this worker"""
+
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+# namespace -> counters
+cache_metrics: dict[str, CacheMetrics] = {}
+
+
+def cache_key(namespace: str, *parts: Any) -> str:
+    """
+    Versioned key: prefix, CACHE_KEY_VERSION, namespace, parts
+
+    args:
+        namespace: name of lookup, with version of value format
+        parts: arguments of lookup
+    """
+    config = settings.cache
+    return ":".join(
+        [config.key_prefix, f"v{config.key_version}", namespace, *map(str, parts)]
+    )
+
+
+def jittered_ttl(ttl: float) -> float:
+    jitter = settings.cache.ttl_jitter
+    return ttl * random.uniform(1 - jitter, 1 + jitter)
+
+
+def _to_json(value: Any) -> Any:
+    if isinstance(value, (UUID, Enum)):
+        return str(value.value if isinstance(value, Enum) else value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not serializable")
+
+
+class ModelCodec(Generic[T]):
+    """
+    JSON codec of ORM model, decoded object is detached from session.
+    version is hash of columns, so entries of old model are not read
+    after migration. Excluded columns (secrets) are not written, they are
+    None in decoded object
+
+    args:
+        model: ORM model class
+        exclude: names of columns which are not cached
+    """
+
+    def __init__(self, model: Type[T], exclude: Sequence[str] = ()):
+        self.model = model
+        self.columns = [
+            attr for attr in inspect(model).column_attrs if attr.key not in exclude
+        ]
+        # set to None, detached object can not load missing attributes
+        self.excluded = [
+            attr.key for attr in inspect(model).column_attrs if attr.key in exclude
+        ]
+        self.types = {}
+        for attr in self.columns:
+            try:
+                self.types[attr.key] = attr.columns[0].type.python_type
+            except NotImplementedError:
+                self.types[attr.key] = object
+        signature = ",".join(
+            f"{attr.key}:{attr.columns[0].type}" for attr in self.columns
+        )
+        self.version = hashlib.sha1(signature.encode()).hexdigest()[:8]
+
+    def dumps(self, obj: T) -> bytes:
+        return json.dumps(
+            {attr.key: getattr(obj, attr.key) for attr in self.columns},
+            default=_to_json,
+        ).encode()
+
+    def loads(self, raw: bytes) -> T:
+        data = json.loads(raw)
+        values = dict.fromkeys(self.excluded)
+        for attr in self.columns:
+            value = data.get(attr.key)
+            if value is not None:
+                python_type = self.types[attr.key]
+                if python_type is datetime:
+                    value = datetime.fromisoformat(value)
+                elif python_type is date:
+                    value = date.fromisoformat(value)
+                elif issubclass(python_type, (UUID, Enum)):
+                    value = python_type(value)
+            values[attr.key] = value
+
+        obj = self.model(**values)
+        make_transient_to_detached(obj)
+        return obj
+
+
+def cached(
+    namespace: str, codec: ModelCodec, ttl: Optional[float] = None
+) -> Callable[
+    [Callable[..., Awaitable[Optional[T]]]], Callable[..., Awaitable[Optional[T]]]
+]:
+    """
+    Cache-aside for async repository lookup: value is taken from cache
+    backend, on miss from method and put to cache (None is not cached).
+    Key is built from positional arguments (keyword ones are rejected, same
+    lookup would get other key), key(*args) of wrapped method gives it for
+    invalidation, metrics - its counters
+
+    args:
+        namespace: name of lookup
+        codec: codec of returned model
+        ttl: seconds, default CACHE_TTL_SECONDS (with jitter)
+    """
+    namespace = f"{namespace}.{codec.version}"
+    metrics = cache_metrics.setdefault(namespace, CacheMetrics())
+
+    def decorator(method):
+        @wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            if kwargs:
+                raise TypeError(
+                    f"{method.__qualname__} is cached, pass arguments by position"
+                )
+            key = cache_key(namespace, *args)
+            backend = get_cache_backend()
+            raw = await backend.get(key)
+            if raw is not None:
+                metrics.hits += 1
+                return codec.loads(raw)
+
+            metrics.misses += 1
+            value = await method(self, *args)
+            if value is not None:
+                await backend.set(
+                    key,
+                    codec.dumps(value),
+                    jittered_ttl(
+                        ttl if ttl is not None else settings.cache.ttl_seconds
+                    ),
+                )
+            return value
+
+        wrapper.key = lambda *args: cache_key(namespace, *args)
+        wrapper.metrics = metrics
+        return wrapper
+
+    return decorator
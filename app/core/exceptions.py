@@ -1,3 +1,5 @@
+import math
+
 from fastapi import HTTPException, status
 
 
@@ -36,6 +38,21 @@ class InvalidCredentialsException(FinFlowException):
         )
 
 
+class InvalidRefreshTokenException(FinFlowException):
+    """Refresh token is unknown, expired, revoked or already used"""
+
+    def __init__(self):
+        self.detail = "Invalid or expired refresh token"
+        super().__init__(self.detail)
+
+    def to_http_exception(self) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=self.detail,
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
 class UserAlreadyExistsException(FinFlowException):
     """User alreade exists"""
 
@@ -78,3 +95,49 @@ class InvalidTransactionException(FinFlowException):
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=self.detail,
         )
+
+
+class InvalidCursorException(FinFlowException):
+    """Pagination cursor is malformed"""
+
+    def __init__(self, cursor: str):
+        self.detail = f"Invalid pagination cursor: {cursor}"
+        super().__init__(self.detail)
+
+    def to_http_exception(self) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=self.detail,
+        )
+
+
+class ServiceOverloadedException(FinFlowException):
+    """Service is overloaded, client should retry later"""
+
+    def __init__(self, reason: str, retry_after: int = 1):
+        self.detail = f"Service overloaded: {reason}"
+        self.retry_after = retry_after
+        super().__init__(self.detail)
+
+    def to_http_exception(self) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=self.detail,
+            headers={"Retry-After": str(self.retry_after)},
+        )
+
+
+class RateLimitExceededException(FinFlowException):
+    """Too many requests, client should retry after retry_after seconds"""
+
+    def __init__(self, retry_after: float):
+        self.retry_after = max(1, math.ceil(retry_after))
+        self.detail = f"Too many requests, retry after {self.retry_after} seconds"
+        super().__init__(self.detail)
+
+    def to_http_exception(self) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=self.detail,
+            headers={"Retry-After": str(self.retry_after)},
+        )
@@ -0,0 +1,260 @@
+import asyncio
+import base64
+import hashlib
+import json
+from typing import Iterable, Optional
+
+from starlette.datastructures import Headers
+from starlette.requests import ClientDisconnect
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import IdempotencySettings, settings
+from app.core.cache_backend import cache_key, get_cache_backend
+
+IDEMPOTENCY_HEADER = "idempotency-key"
+REPLAYED_HEADER = b"idempotent-replayed"
+MAX_KEY_LENGTH = 255
+# client errors which retry with same body gets again, others (401, 403,
+# 429 ...) may pass later, so key is released and retry runs request
+STORED_ERROR_STATUSES = frozenset({400, 409, 422})
+# responses of these carry tokens (import - passwords of many users), they
+# run as without key, so nothing of them is written to cache backend.
+# register is not here: its response has no secret and body goes only to
+# fingerprint hash (paths under api prefix)
+CREDENTIAL_PATHS = (
+    "/users/import",
+    "/users/login",
+    "/users/refresh",
+    "/users/logout",
+)
+
+
+def _digest(*parts: bytes) -> str:
+    hasher = hashlib.sha256()
+    for part in parts:
+        hasher.update(len(part).to_bytes(8, "big"))
+        hasher.update(part)
+    return hasher.hexdigest()
+
+
+async def _read_body(receive: Receive, limit: int) -> Optional[bytes]:
+    """
+    Whole request body, None if it is bigger than limit
+
+    raises:
+        ClientDisconnect: client has gone before body was read
+    """
+    chunks = []
+    size = 0
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            raise ClientDisconnect()
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > limit:
+            return None
+        chunks.append(chunk)
+        if not message.get("more_body", False):
+            return b"".join(chunks)
+
+
+class IdempotencyMiddleware:
+    """
+    Run POST request with Idempotency-Key header only once: key, request
+    fingerprint and response are kept in cache backend for
+    IDEMPOTENCY_TTL_SECONDS, retry gets stored response. Duplicate which
+    comes while first request is running waits for it. Keys are scoped
+    by Authorization header. Only 2xx and STORED_ERROR_STATUSES responses
+    are stored, after others retry runs request again. Requests to
+    excluded paths (credentials) run as without key. Needs shared (redis)
+    backend to work across workers
+
+    args:
+        app: ASGI application
+        config: idempotency settings
+        excluded_paths: paths which are never stored
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        config: Optional[IdempotencySettings] = None,
+        excluded_paths: Iterable[str] = (),
+    ):
+        self.app = app
+        self.config = config or settings.idempotency
+        self.excluded_paths = frozenset(excluded_paths)
+        # requests running in this worker, duplicates wait for event
+        self._running: dict[str, asyncio.Event] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "POST"
+            or not self.config.enabled
+            or scope["path"] in self.excluded_paths
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        idempotency_key = headers.get(IDEMPOTENCY_HEADER)
+        if idempotency_key is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not 0 < len(idempotency_key) <= MAX_KEY_LENGTH:
+            response = JSONResponse(
+                {"detail": f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters"},
+                status_code=400,
+            )
+            await response(scope, receive, send)
+            return
+
+        try:
+            body = await _read_body(receive, self.config.max_body_bytes)
+        except ClientDisconnect:
+            # nobody waits for response, key is not claimed
+            return
+        if body is None:
+            response = JSONResponse(
+                {"detail": "Request body is too large for Idempotency-Key"},
+                status_code=413,
+            )
+            await response(scope, receive, send)
+            return
+
+        key = cache_key(
+            "idempotency",
+            _digest(headers.get("authorization", "").encode()),
+            _digest(idempotency_key.encode()),
+        )
+        fingerprint = _digest(
+            scope["method"].encode(),
+            scope["path"].encode(),
+            scope.get("query_string", b""),
+            body,
+        )
+
+        backend = get_cache_backend()
+        running = json.dumps({"state": "running", "fingerprint": fingerprint}).encode()
+        while True:
+            raw = await backend.get(key)
+            if raw is None:
+                if await backend.add(key, running, self.config.lock_seconds):
+                    break
+                continue
+
+            record = json.loads(raw)
+            if record["fingerprint"] != fingerprint:
+                response = JSONResponse(
+                    {"detail": "Idempotency-Key is already used for other request"},
+                    status_code=422,
+                )
+                await response(scope, receive, send)
+                return
+
+            if record["state"] == "done":
+                await self._replay(record, send)
+                return
+
+            await self._wait(key)
+
+        await self._run(scope, receive, send, key, fingerprint, body)
+
+    async def _wait(self, key: str) -> None:
+        """wait for running duplicate, other worker is polled"""
+        event = self._running.get(key)
+        if event is None:
+            await asyncio.sleep(self.config.poll_seconds)
+            return
+        try:
+            await asyncio.wait_for(event.wait(), self.config.lock_seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _run(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+        key: str,
+        fingerprint: str,
+        body: bytes,
+    ) -> None:
+        backend = get_cache_backend()
+        body_sent = False
+        status = 500
+        response_headers: list = []
+        chunks: list[bytes] = []
+        size = 0
+
+        async def receive_body() -> Message:
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        async def send_and_keep(message: Message) -> None:
+            nonlocal status, response_headers, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                response_headers = message.get("headers", [])
+            elif message["type"] == "http.response.body":
+                chunk = message.get("body", b"")
+                size += len(chunk)
+                chunks.append(chunk)
+            await send(message)
+
+        event = asyncio.Event()
+        self._running[key] = event
+        try:
+            await self.app(scope, receive_body, send_and_keep)
+        except BaseException:
+            await backend.delete(key)
+            raise
+        else:
+            stored = 200 <= status < 300 or status in STORED_ERROR_STATUSES
+            if not stored or size > self.config.max_body_bytes:
+                await backend.delete(key)
+            else:
+                record = {
+                    "state": "done",
+                    "fingerprint": fingerprint,
+                    "status": status,
+                    "headers": [
+                        [name.decode("latin-1"), value.decode("latin-1")]
+                        for name, value in response_headers
+                    ],
+                    "body": base64.b64encode(b"".join(chunks)).decode(),
+                }
+                await backend.set(
+                    key, json.dumps(record).encode(), self.config.ttl_seconds
+                )
+        finally:
+            self._running.pop(key, None)
+            event.set()
+
+    @staticmethod
+    async def _replay(record: dict, send: Send) -> None:
+        headers = [
+            (name.encode("latin-1"), value.encode("latin-1"))
+            for name, value in record["headers"]
+        ]
+        headers.append((REPLAYED_HEADER, b"true"))
+        await send(
+            {
+                "type": "http.response.start",
+                "status": record["status"],
+                "headers": headers,
+            }
+        )
+        await send(
+            {
+                "type": "http.response.body",
+                "body": base64.b64decode(record["body"]),
+            }
+        )
@@ -0,0 +1,226 @@
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import wraps
+from typing import Iterator, Optional
+
+from fastapi.routing import APIRoute
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import MetricsSettings, settings
+from app.db.query_stats import QueryStats, track_queries
+
+# uvicorn --workers N: every worker writes its metrics to files in this
+# directory, /metrics of any worker reads all of them
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+UNMATCHED_ROUTE = "unmatched"
+
+REQUEST_DURATION = Histogram(
+    "finflow_http_request_duration_seconds",
+    "Latency of HTTP requests",
+    ["method", "route", "status"],
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "finflow_http_requests_in_progress",
+    "HTTP requests being handled now",
+    ["method", "route"],
+    multiprocess_mode="livesum",
+)
+REQUEST_ERRORS = Counter(
+    "finflow_http_request_errors_total",
+    "HTTP requests which ended with 5xx or unhandled exception",
+    # kind: response - app answered 5xx, exception - it raised (status 500)
+    ["method", "route", "status", "kind"],
+)
+REQUEST_QUERIES = Histogram(
+    "finflow_http_request_db_queries",
+    "SQL statements executed by HTTP request",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+
+
+@dataclass
+class RequestTimings:
+    """
+    Time spent by request in hashing pool and serialization (seconds),
+    DB time is in QueryStats
+    """
+
+    queries: QueryStats
+    hash: float = 0.0
+    serialize: float = 0.0
+    # set when endpoint returns, rest until response start is serialization
+    endpoint_done: Optional[float] = None
+    db_at_endpoint_done: float = 0.0
+
+
+request_timings: ContextVar[Optional[RequestTimings]] = ContextVar(
+    "request_timings", default=None
+)
+
+
+@contextmanager
+def timed(phase: str) -> Iterator[None]:
+    """
+    Add time of block to phase of current request, no-op outside requests
+
+    args:
+        phase: field of RequestTimings (hash, serialize)
+    """
+    timings = request_timings.get()
+    if timings is None:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        setattr(timings, phase, getattr(timings, phase) + time.perf_counter() - started)
+
+
+class TimedRoute(APIRoute):
+    """
+    Route which counts its in-flight requests and marks when endpoint
+    returns, so time until response start (response_model validation and
+    JSON encoding) goes to serialize phase
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        @wraps(endpoint)
+        async def timed_endpoint(*args, **kwargs):
+            result = await endpoint(*args, **kwargs)
+            timings = request_timings.get()
+            if timings is not None:
+                timings.endpoint_done = time.perf_counter()
+                timings.db_at_endpoint_done = timings.queries.duration
+            return result
+
+        super().__init__(path, timed_endpoint, **kwargs)
+
+    async def handle(self, scope: Scope, receive: Receive, send: Send) -> None:
+        gauge = REQUESTS_IN_PROGRESS.labels(scope["method"], self.path)
+        gauge.inc()
+        try:
+            await super().handle(scope, receive, send)
+        finally:
+            gauge.dec()
+
+
+def _server_timing(timings: RequestTimings, total: float) -> bytes:
+    queries = timings.queries
+    return (
+        f'db;dur={queries.duration * 1000:.2f};desc="{queries.count} queries", '
+        f"hash;dur={timings.hash * 1000:.2f}, "
+        f"serialize;dur={timings.serialize * 1000:.2f}, "
+        f"total;dur={total * 1000:.2f}"
+    ).encode()
+
+
+class MetricsMiddleware:
+    """
+    Track SQL statements of every request, record latency histogram, query
+    count and error counter per route template and status, add
+    Server-Timing header to responses
+
+    args:
+        app: ASGI application
+        config: metrics settings
+    """
+
+    def __init__(self, app: ASGIApp, config: Optional[MetricsSettings] = None):
+        self.app = app
+        self.config = config or settings.metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        started = time.perf_counter()
+        status = 500
+
+        with track_queries(f"{method} {scope['path']}") as queries:
+            timings = RequestTimings(queries=queries)
+            token = request_timings.set(timings)
+
+            async def send_with_metrics(message: Message) -> None:
+                nonlocal status
+                if message["type"] == "http.response.start":
+                    status = message["status"]
+                    now = time.perf_counter()
+                    if timings.endpoint_done is not None:
+                        timings.serialize = max(
+                            0.0,
+                            now
+                            - timings.endpoint_done
+                            - (queries.duration - timings.db_at_endpoint_done),
+                        )
+                    if self.config.server_timing:
+                        message["headers"] = [
+                            *message.get("headers", []),
+                            (b"server-timing", _server_timing(timings, now - started)),
+                        ]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_metrics)
+            except Exception:
+                status = 500
+                self._record(scope, status, queries, started, error="exception")
+                raise
+            else:
+                error = "response" if status >= 500 else None
+                self._record(scope, status, queries, started, error=error)
+            finally:
+                request_timings.reset(token)
+
+    def _record(
+        self,
+        scope: Scope,
+        status: int,
+        queries: QueryStats,
+        started: float,
+        error: Optional[str],
+    ) -> None:
+        if not self.config.enabled:
+            return
+
+        method = scope["method"]
+        matched = scope.get("route")
+        route = getattr(matched, "path", None) or UNMATCHED_ROUTE
+        REQUEST_DURATION.labels(method, route, str(status)).observe(
+            time.perf_counter() - started
+        )
+        REQUEST_QUERIES.labels(method, route).observe(queries.count)
+        if error is not None:
+            REQUEST_ERRORS.labels(method, route, str(status), error).inc()
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Prometheus text exposition of metrics of all workers and content type"""
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+def mark_worker_dead() -> None:
+    """Drop live gauges of this worker from multiprocess directory"""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
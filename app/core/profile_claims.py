@@ -0,0 +1,181 @@
+import asyncio
+import json
+import logging
+import time
+from dataclasses import asdict, dataclass
+from enum import Enum
+from typing import Optional
+
+from app.config import SecuritySettings, settings
+from app.core.cache_backend import cache_key, get_cache_backend
+
+logger = logging.getLogger(__name__)
+
+# snapshot made this close to change can hold row read before it
+# (login reads user before argon2, clocks of pods differ a little)
+CHANGE_MARGIN_SECONDS = 5.0
+# startup replay stops after this many missing entries in a row
+REPLAY_MAX_MISSES = 100
+
+
+class ProfileState(str, Enum):
+    """What to do with profile snapshot of token"""
+
+    FRESH = "fresh"
+    STALE = "stale"
+    REVOKED = "revoked"
+
+
+@dataclass
+class ProfileChange:
+    """User was changed (or deactivated) at changed_at (unix time)"""
+
+    user_id: str
+    changed_at: float
+    active: bool = True
+
+    def dumps(self) -> bytes:
+        return json.dumps(asdict(self)).encode()
+
+    @classmethod
+    def loads(cls, raw: bytes) -> "ProfileChange":
+        return cls(**json.loads(raw))
+
+
+class ProfileVersions:
+    """
+    Last profile change of users in memory of this worker. Changes go to
+    feed in cache backend (entry per change, numbered by add of next free
+    number), every worker reads feed every PROFILE_SYNC_INTERVAL_SECONDS.
+    Entries live as long as snapshots are trusted, so startup replays them.
+    Feed is shared only with redis backend, memory backend keeps changes
+    inside of worker
+    """
+
+    def __init__(self):
+        self.config: SecuritySettings = settings.security
+        self.changes: dict[str, ProfileChange] = {}
+        # number of last entry read from feed, None - not read yet
+        self._cursor: Optional[int] = None
+
+    def configure(self, config: SecuritySettings) -> None:
+        """Settings of snapshots, known changes are dropped"""
+        self.config = config
+        self.changes = {}
+        self._cursor = None
+
+    @property
+    def retention(self) -> float:
+        """seconds change is kept, snapshots older than it are not trusted"""
+        return self.config.profile_claims_max_age_seconds + CHANGE_MARGIN_SECONDS
+
+    def check(self, user_id: str, version: float) -> ProfileState:
+        """
+        State of profile snapshot of user
+
+        args:
+            user_id: "sub" of token
+            version: unix time when snapshot was made
+        """
+        change = self.changes.get(user_id)
+        if change is not None and not change.active:
+            return ProfileState.REVOKED
+        if time.time() - version > self.config.profile_claims_max_age_seconds:
+            return ProfileState.STALE
+        if change is not None and version < change.changed_at + CHANGE_MARGIN_SECONDS:
+            return ProfileState.STALE
+        return ProfileState.FRESH
+
+    def apply(self, change: ProfileChange) -> None:
+        known = self.changes.get(change.user_id)
+        if known is None or known.changed_at <= change.changed_at:
+            self.changes[change.user_id] = change
+
+    def _key(self, part: object) -> str:
+        return cache_key("profile_feed", part)
+
+    async def _head(self) -> int:
+        raw = await get_cache_backend().get(self._key("head"))
+        return int(raw) if raw else 0
+
+    async def publish(self, user_id: str, active: bool = True) -> None:
+        """
+        Announce change of user to all workers, this worker applies it at once
+
+        args:
+            user_id: changed user
+            active: False - tokens of user are rejected
+        """
+        change = ProfileChange(user_id, time.time(), active)
+        self.apply(change)
+
+        backend = get_cache_backend()
+        raw = change.dumps()
+        number = await self._head() + 1
+        # concurrent writers take next free number
+        while not await backend.add(self._key(number), raw, self.retention):
+            number += 1
+        await backend.set(self._key("head"), str(number).encode(), self.retention)
+
+    async def sync(self) -> int:
+        """Read new entries of feed, returns count of applied changes"""
+        backend = get_cache_backend()
+        head = await self._head()
+        applied = 0
+
+        if self._cursor is None:
+            # replay entries which are still kept, newest first
+            misses = 0
+            number = head
+            while number > 0 and misses < REPLAY_MAX_MISSES:
+                raw = await backend.get(self._key(number))
+                if raw is None:
+                    misses += 1
+                else:
+                    misses = 0
+                    self.apply(ProfileChange.loads(raw))
+                    applied += 1
+                number -= 1
+            self._cursor = head
+        elif head < self._cursor:
+            # feed expired (no changes for retention) and is numbered again
+            self._cursor = 0
+
+        # head is written after entry, writers may be ahead of it
+        number = self._cursor + 1
+        while True:
+            raw = await backend.get(self._key(number))
+            if raw is None:
+                if number > head:
+                    break
+            else:
+                self.apply(ProfileChange.loads(raw))
+                applied += 1
+            self._cursor = number
+            number += 1
+
+        self._prune()
+        return applied
+
+    def _prune(self) -> None:
+        expired = time.time() - self.retention
+        for user_id in [
+            user_id
+            for user_id, change in self.changes.items()
+            if change.changed_at < expired
+        ]:
+            del self.changes[user_id]
+
+    async def run(self) -> None:
+        """Read feed forever, every PROFILE_SYNC_INTERVAL_SECONDS"""
+        while True:
+            await asyncio.sleep(self.config.profile_sync_interval_seconds)
+            try:
+                await self.sync()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("profile changes sync failed")
+
+
+profile_versions = ProfileVersions()
@@ -0,0 +1,210 @@
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional
+
+from app.config import CacheSettings, RateLimitSettings, settings
+from app.core.exceptions import RateLimitExceededException
+
+if TYPE_CHECKING:
+    from redis import asyncio as aioredis
+
+logger = logging.getLogger(__name__)
+
+# KEYS[1] - bucket, ARGV - capacity, tokens per second, cost.
+# redis clock is used, so workers with different clocks share one bucket
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+
+local retry_after = 0
+if tokens >= cost then
+    tokens = tokens - cost
+else
+    retry_after = (cost - tokens) / rate
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return tostring(retry_after)
+"""
+
+
+@dataclass(frozen=True)
+class TokenBucket:
+    """
+    Limit of one kind of requests: bucket holds up to capacity tokens,
+    refilled with rate tokens per second, every request takes one
+
+    args:
+        name: name of limit, part of key
+        capacity: max burst
+        rate: tokens per second
+    """
+
+    name: str
+    capacity: int
+    rate: float
+
+    @classmethod
+    def per_minute(cls, name: str, burst: int, per_minute: float) -> "TokenBucket":
+        return cls(name=name, capacity=burst, rate=per_minute / 60)
+
+
+class RateLimitBackend(ABC):
+    """Storage of token buckets"""
+
+    name: str = "abstract"
+
+    @abstractmethod
+    async def take(self, bucket: TokenBucket, key: str, cost: int = 1) -> float:
+        """
+        Take tokens from bucket of key, returns 0 when allowed, else
+        seconds until tokens are available (nothing is taken)
+        """
+
+    async def close(self) -> None:
+        """Release connections"""
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """
+    Buckets in memory of this worker, every worker has own limit
+
+    args:
+        maxsize: max count of buckets, least recently used is dropped
+    """
+
+    name = "memory"
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._buckets: OrderedDict[tuple[str, str], tuple[float, float]] = OrderedDict()
+
+    async def take(self, bucket: TokenBucket, key: str, cost: int = 1) -> float:
+        now = time.monotonic()
+        bucket_key = (bucket.name, key)
+        tokens, updated = self._buckets.get(bucket_key, (bucket.capacity, now))
+        tokens = min(bucket.capacity, tokens + (now - updated) * bucket.rate)
+
+        retry_after = 0.0
+        if tokens >= cost:
+            tokens -= cost
+        else:
+            retry_after = (cost - tokens) / bucket.rate
+
+        self._buckets[bucket_key] = (tokens, now)
+        self._buckets.move_to_end(bucket_key)
+        if len(self._buckets) > self.maxsize:
+            self._buckets.popitem(last=False)
+        return retry_after
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """
+    Buckets in redis, one limit for all workers and pods, bucket is
+    updated by lua script in one round trip
+
+    args:
+        client: redis.asyncio client
+        prefix: prefix of keys
+    """
+
+    name = "redis"
+
+    def __init__(self, client: "aioredis.Redis", prefix: str = "finflow:ratelimit"):
+        # redis is slow to import, only redis backend imports it
+        from redis.exceptions import RedisError
+
+        self.client = client
+        self._errors = (RedisError, OSError)
+        self.prefix = prefix
+        self._script = client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    async def take(self, bucket: TokenBucket, key: str, cost: int = 1) -> float:
+        try:
+            retry_after = await self._script(
+                keys=[f"{self.prefix}:{bucket.name}:{key}"],
+                args=[bucket.capacity, bucket.rate, cost],
+            )
+        except self._errors:
+            # limiter must not take login down with redis
+            logger.warning("redis rate limit failed", exc_info=True)
+            return 0.0
+        return float(retry_after)
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+def create_rate_limit_backend(
+    config: RateLimitSettings, cache: Optional[CacheSettings] = None
+) -> RateLimitBackend:
+    """
+    Backend selected by RATE_LIMIT_BACKEND
+
+    args:
+        config: rate limit settings
+        cache: settings with REDIS_URL for redis backend
+    """
+    if config.backend == "redis":
+        from redis import asyncio as aioredis
+
+        cache = cache or settings.cache
+        return RedisRateLimitBackend(
+            aioredis.Redis.from_url(
+                cache.redis_url,
+                socket_timeout=cache.redis_timeout_seconds,
+                socket_connect_timeout=cache.redis_timeout_seconds,
+            ),
+            prefix=f"{cache.key_prefix}:ratelimit",
+        )
+    return MemoryRateLimitBackend(config.memory_size)
+
+
+# made on first use or set in lifespan, so import does not connect
+_backend: Optional[RateLimitBackend] = None
+
+
+def get_rate_limit_backend() -> RateLimitBackend:
+    """Backend of this worker, created from settings on first call"""
+    global _backend
+    if _backend is None:
+        _backend = create_rate_limit_backend(settings.rate_limit)
+    return _backend
+
+
+def set_rate_limit_backend(backend: Optional[RateLimitBackend]) -> None:
+    """Replace backend of this worker, None - create from settings on next use"""
+    global _backend
+    _backend = backend
+
+
+async def check_rate_limit(*checks: tuple[TokenBucket, str]) -> None:
+    """
+    Take token from every bucket in order, first empty bucket stops
+    request, tokens of next buckets are not taken
+
+    args:
+        checks: pairs of bucket and key (ip, email)
+
+    raises:
+        RateLimitExceededException with seconds until retry
+    """
+    if not settings.rate_limit.enabled:
+        return
+    backend = get_rate_limit_backend()
+    for bucket, key in checks:
+        retry_after = await backend.take(bucket, key)
+        if retry_after > 0:
+            raise RateLimitExceededException(retry_after)
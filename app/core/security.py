@@ -1,14 +1,125 @@
+import asyncio
+import hashlib
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Any
+from typing import Any, Callable, TypeVar
 from uuid import UUID
 
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 
 from app.config import settings
+from app.core.cache import CacheStats, ExpiringLRUCache
+from app.core.exceptions import ServiceOverloadedException
+from app.core.metrics import timed
 
 pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
 
+T = TypeVar("T")
+
+
+class HashingPool:
+    """
+    Bounded thread pool for argon2 calls, keeps them off the event loop.
+    argon2-cffi releases the GIL, so threads give real parallelism
+    """
+
+    def __init__(self, max_workers: int, max_pending: int, batch_slots: int = 2):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        # waiting callers are batch jobs, they must not take all slots
+        self.batch_slots = min(batch_slots, max_pending)
+        self._executor: ThreadPoolExecutor | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+        self._batch_semaphore: asyncio.Semaphore | None = None
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        """count of calls running or waiting in pool"""
+        return self._pending
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="argon2",
+            )
+        return self._executor
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_pending)
+        return self._semaphore
+
+    def _get_batch_semaphore(self) -> asyncio.Semaphore:
+        if self._batch_semaphore is None:
+            self._batch_semaphore = asyncio.Semaphore(self.batch_slots)
+        return self._batch_semaphore
+
+    async def run(self, func: Callable[..., T], *args, wait: bool = False) -> T:
+        """
+        Run func in pool
+
+        args:
+            func: blocking function
+            wait: wait for free slot instead of reject when queue is full,
+                for batch jobs, they run at most HASH_POOL_BATCH_SLOTS at once
+
+        raises:
+            ServiceOverloadedException if queue is full and wait is False
+        """
+        semaphore = self._get_semaphore()
+        if not wait and semaphore.locked():
+            raise ServiceOverloadedException("too many password operations")
+
+        # waiting for slot and hashing go to hash phase of Server-Timing
+        with timed("hash"):
+            if not wait:
+                return await self._run_in_slot(semaphore, func, *args)
+            async with self._get_batch_semaphore():
+                return await self._run_in_slot(semaphore, func, *args)
+
+    async def _run_in_slot(
+        self, semaphore: asyncio.Semaphore, func: Callable[..., T], *args
+    ) -> T:
+        async with semaphore:
+            self._pending += 1
+            try:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self._get_executor(), func, *args)
+            finally:
+                self._pending -= 1
+
+    def configure(self, max_workers: int, max_pending: int, batch_slots: int) -> None:
+        """Change size of pool, threads are started by next call"""
+        self.shutdown()
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.batch_slots = min(batch_slots, max_pending)
+
+    def shutdown(self) -> None:
+        """stop worker threads"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self._semaphore = None
+        self._batch_semaphore = None
+
+
+hashing_pool = HashingPool(
+    max_workers=settings.security.hash_pool_workers,
+    max_pending=settings.security.hash_pool_max_pending,
+    batch_slots=settings.security.hash_pool_batch_slots,
+)
+
+# key is sha256 digest of token, value is decoded claims
+token_cache: ExpiringLRUCache[bytes, dict[str, Any]] = ExpiringLRUCache(
+    maxsize=settings.security.token_cache_size,
+)
+
 
 class PasswordManager:
     """Manager for work with passwords"""
@@ -23,6 +134,24 @@ class PasswordManager:
         """Check password with hash"""
         return pwd_context.verify(plain_password, hashed_password)
 
+    @staticmethod
+    async def hash_password_async(password: str, wait: bool = False) -> str:
+        """
+        Hashing password in hashing pool
+
+        args:
+            password: plain password
+            wait: wait for free slot instead of reject (for batch jobs)
+        """
+        return await hashing_pool.run(pwd_context.hash, password, wait=wait)
+
+    @staticmethod
+    async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+        """Check password with hash in hashing pool"""
+        return await hashing_pool.run(
+            pwd_context.verify, plain_password, hashed_password
+        )
+
 
 class TokenManager:
     """Manager for work with JWT Tokens"""
@@ -31,6 +160,7 @@ class TokenManager:
     def create_access_token(
         data: dict[str, Any],
         expires_delta: timedelta | None = None,
+        profile: dict[str, Any] | None = None,
     ) -> str:
         """
         Create JWT Access token
@@ -38,10 +168,15 @@ class TokenManager:
         args:
             data: data for transformate to token
             expires_delta: time alive token
+            profile: JSON of user profile, put to "profile" claim with
+                time of snapshot in "pv" (PROFILE_CLAIMS_ENABLED)
         """
 
         to_encode = data.copy()
 
+        if profile is not None:
+            to_encode.update({"profile": profile, "pv": time.time()})
+
         if expires_delta:
             expire = datetime.utcnow() + expires_delta
         else:
@@ -59,6 +194,39 @@ class TokenManager:
 
         return encoded_jwt
 
+    @staticmethod
+    def create_refresh_token(session_id: str | None = None) -> tuple[str, str, str]:
+        """
+        Create opaque refresh token "<session_id>.<secret>", only hash of
+        secret is stored
+
+        args:
+            session_id: session of rotated token, default - new session
+
+        returns:
+            token, session_id, sha256 of secret
+        """
+        session_id = session_id or secrets.token_urlsafe(16)
+        secret = secrets.token_urlsafe(32)
+        return (
+            f"{session_id}.{secret}",
+            session_id,
+            hashlib.sha256(secret.encode()).hexdigest(),
+        )
+
+    @staticmethod
+    def parse_refresh_token(token: str) -> tuple[str, str] | None:
+        """
+        Split refresh token
+
+        returns:
+            session_id and sha256 of secret or None if token is malformed
+        """
+        session_id, _, secret = token.partition(".")
+        if not session_id or not secret:
+            return None
+        return session_id, hashlib.sha256(secret.encode()).hexdigest()
+
     @staticmethod
     def decode_token(token: str) -> dict[str, Any]:
         """
@@ -80,6 +248,37 @@ class TokenManager:
         except JWTError:
             raise
 
+    @staticmethod
+    def decode_token_cached(token: str) -> dict[str, Any]:
+        """
+        Decode JWT Token, reuse claims of already verified token
+
+        args:
+            token: JWT Token
+
+        raises:
+            if token is not valid or expired
+        """
+        key = hashlib.sha256(token.encode()).digest()
+
+        payload = token_cache.get(key)
+        if payload is not None:
+            return payload
+
+        payload = TokenManager.decode_token(token)
+
+        # only tokens with exp are cached, entry is evicted with token
+        expires_at = payload.get("exp")
+        if isinstance(expires_at, (int, float)):
+            token_cache.set(key, payload, expires_at=expires_at)
+
+        return payload
+
+    @staticmethod
+    def cache_stats() -> CacheStats:
+        """Hits and misses of verified token cache"""
+        return token_cache.stats
+
     @staticmethod
     def extract_user_id_from_token(token: str) -> UUID | None:
         """
@@ -92,7 +291,7 @@ class TokenManager:
             UUID user or None
         """
         try:
-            payload = TokenManager.decode_token(token)
+            payload = TokenManager.decode_token_cached(token)
             user_id = payload.get("sub")
 
             if user_id:
@@ -0,0 +1,327 @@
+import asyncio
+import hmac
+import logging
+import time
+from abc import ABC, abstractmethod
+from enum import Enum
+from typing import TYPE_CHECKING, Optional
+
+from app.config import CacheSettings, SessionSettings, settings
+from app.core.exceptions import ServiceOverloadedException
+
+if TYPE_CHECKING:
+    from redis import asyncio as aioredis
+
+logger = logging.getLogger(__name__)
+
+# revocations written by pods with a bit different clocks are read again
+SYNC_OVERLAP_SECONDS = 10.0
+
+# KEYS[1] - session, ARGV - presented secret hash, new secret hash, ttl ms.
+# returns {1, user} rotated, {0, ''} missing, {-1, user} old secret reused
+ROTATE_SCRIPT = """
+local state = redis.call('HMGET', KEYS[1], 'user_id', 'secret_hash')
+if not state[1] then
+    return {0, ''}
+end
+if state[2] ~= ARGV[1] then
+    return {-1, state[1]}
+end
+redis.call('HSET', KEYS[1], 'secret_hash', ARGV[2])
+redis.call('PEXPIRE', KEYS[1], ARGV[3])
+return {1, state[1]}
+"""
+
+
+class Rotation(str, Enum):
+    """Result of refresh token rotation"""
+
+    ROTATED = "rotated"
+    MISSING = "missing"
+    # secret was already rotated, token is stolen or replayed
+    REUSED = "reused"
+
+
+class SessionStore(ABC):
+    """
+    Sessions of refresh tokens: user and hash of current secret, and
+    sessions revoked lately (access tokens of them are still alive)
+    """
+
+    name: str = "abstract"
+
+    @abstractmethod
+    async def create(
+        self, session_id: str, user_id: str, secret_hash: str, ttl: float
+    ) -> None:
+        """Put new session for ttl seconds"""
+
+    @abstractmethod
+    async def rotate(
+        self, session_id: str, secret_hash: str, new_secret_hash: str, ttl: float
+    ) -> tuple[Rotation, Optional[str]]:
+        """Replace secret if secret_hash is current one, returns result and user"""
+
+    @abstractmethod
+    async def revoke(self, session_id: str, retention: float) -> float:
+        """Remove session, remember revocation for retention seconds"""
+
+    @abstractmethod
+    async def revoked_since(self, since: float) -> dict[str, float]:
+        """session_id -> revoked_at of revocations after since (unix time)"""
+
+    async def close(self) -> None:
+        """Release connections"""
+
+
+class MemorySessionStore(SessionStore):
+    """Sessions in memory of this worker, refresh works only with same worker"""
+
+    name = "memory"
+
+    def __init__(self):
+        # session_id -> (user_id, secret_hash, expires_at)
+        self._sessions: dict[str, tuple[str, str, float]] = {}
+        self._revoked: dict[str, tuple[float, float]] = {}
+        self._prune_at = 1024
+
+    def _prune(self) -> None:
+        now = time.time()
+        for session_id in [
+            key for key, value in self._sessions.items() if value[2] <= now
+        ]:
+            del self._sessions[session_id]
+        for session_id in [
+            key for key, value in self._revoked.items() if value[1] <= now
+        ]:
+            del self._revoked[session_id]
+        # amortized, expired sessions are scanned when count doubles
+        self._prune_at = max(1024, 2 * (len(self._sessions) + len(self._revoked)))
+
+    async def create(
+        self, session_id: str, user_id: str, secret_hash: str, ttl: float
+    ) -> None:
+        self._sessions[session_id] = (user_id, secret_hash, time.time() + ttl)
+        if len(self._sessions) + len(self._revoked) > self._prune_at:
+            self._prune()
+
+    async def rotate(
+        self, session_id: str, secret_hash: str, new_secret_hash: str, ttl: float
+    ) -> tuple[Rotation, Optional[str]]:
+        # no await between check and write, so it is atomic in event loop
+        session = self._sessions.get(session_id)
+        if session is None or session[2] <= time.time():
+            return Rotation.MISSING, None
+        user_id, current, _ = session
+        if not hmac.compare_digest(current, secret_hash):
+            return Rotation.REUSED, user_id
+        self._sessions[session_id] = (user_id, new_secret_hash, time.time() + ttl)
+        return Rotation.ROTATED, user_id
+
+    async def revoke(self, session_id: str, retention: float) -> float:
+        self._sessions.pop(session_id, None)
+        revoked_at = time.time()
+        self._revoked[session_id] = (revoked_at, revoked_at + retention)
+        return revoked_at
+
+    async def revoked_since(self, since: float) -> dict[str, float]:
+        return {
+            session_id: revoked_at
+            for session_id, (revoked_at, _) in self._revoked.items()
+            if revoked_at > since
+        }
+
+
+class RedisSessionStore(SessionStore):
+    """
+    Sessions in redis, shared by all workers and pods. Rotation is
+    compare-and-set in lua script, revocations are sorted set by time
+
+    args:
+        client: redis.asyncio client
+        prefix: prefix of keys
+    """
+
+    name = "redis"
+
+    def __init__(self, client: "aioredis.Redis", prefix: str = "finflow:sessions"):
+        # redis is slow to import, only redis store imports it
+        from redis.exceptions import RedisError
+
+        self.client = client
+        self._errors = (RedisError, OSError)
+        self.prefix = prefix
+        self.revoked_key = f"{prefix}:revoked"
+        self._rotate = client.register_script(ROTATE_SCRIPT)
+
+    def _key(self, session_id: str) -> str:
+        return f"{self.prefix}:{session_id}"
+
+    def _failed(self, operation: str) -> ServiceOverloadedException:
+        logger.warning("redis session store %s failed", operation, exc_info=True)
+        return ServiceOverloadedException("session store is unavailable")
+
+    async def create(
+        self, session_id: str, user_id: str, secret_hash: str, ttl: float
+    ) -> None:
+        key = self._key(session_id)
+        try:
+            async with self.client.pipeline(transaction=True) as pipe:
+                pipe.hset(key, mapping={"user_id": user_id, "secret_hash": secret_hash})
+                pipe.pexpire(key, max(1, int(ttl * 1000)))
+                await pipe.execute()
+        except self._errors:
+            raise self._failed("create")
+
+    async def rotate(
+        self, session_id: str, secret_hash: str, new_secret_hash: str, ttl: float
+    ) -> tuple[Rotation, Optional[str]]:
+        try:
+            status, user_id = await self._rotate(
+                keys=[self._key(session_id)],
+                args=[secret_hash, new_secret_hash, max(1, int(ttl * 1000))],
+            )
+        except self._errors:
+            raise self._failed("rotate")
+        if isinstance(user_id, bytes):
+            user_id = user_id.decode()
+        if int(status) == 1:
+            return Rotation.ROTATED, user_id
+        if int(status) == -1:
+            return Rotation.REUSED, user_id
+        return Rotation.MISSING, None
+
+    async def revoke(self, session_id: str, retention: float) -> float:
+        revoked_at = time.time()
+        try:
+            async with self.client.pipeline(transaction=True) as pipe:
+                pipe.delete(self._key(session_id))
+                pipe.zadd(self.revoked_key, {session_id: revoked_at})
+                pipe.zremrangebyscore(self.revoked_key, "-inf", revoked_at - retention)
+                pipe.pexpire(self.revoked_key, max(1, int(retention * 1000)))
+                await pipe.execute()
+        except self._errors:
+            raise self._failed("revoke")
+        return revoked_at
+
+    async def revoked_since(self, since: float) -> dict[str, float]:
+        try:
+            rows = await self.client.zrangebyscore(
+                self.revoked_key, f"({since}", "+inf", withscores=True
+            )
+        except self._errors:
+            raise self._failed("sync")
+        return {
+            (member.decode() if isinstance(member, bytes) else member): score
+            for member, score in rows
+        }
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+def create_session_store(
+    config: SessionSettings, cache: Optional[CacheSettings] = None
+) -> SessionStore:
+    """
+    Store selected by SESSION_BACKEND
+
+    args:
+        config: session settings
+        cache: settings with REDIS_URL for redis store
+    """
+    if config.backend == "redis":
+        from redis import asyncio as aioredis
+
+        cache = cache or settings.cache
+        return RedisSessionStore(
+            aioredis.Redis.from_url(
+                cache.redis_url,
+                socket_timeout=cache.redis_timeout_seconds,
+                socket_connect_timeout=cache.redis_timeout_seconds,
+            ),
+            prefix=f"{cache.key_prefix}:sessions",
+        )
+    return MemorySessionStore()
+
+
+# made on first use or set in lifespan, so import does not connect
+_store: Optional[SessionStore] = None
+
+
+def get_session_store() -> SessionStore:
+    """Store of this worker, created from settings on first call"""
+    global _store
+    if _store is None:
+        _store = create_session_store(settings.sessions)
+    return _store
+
+
+def set_session_store(store: Optional[SessionStore]) -> None:
+    """Replace store of this worker, None - create from settings on next use"""
+    global _store
+    _store = store
+
+
+class RevokedSessions:
+    """
+    Sessions revoked while their access tokens may be alive, in memory of
+    this worker, so check of every request is one dict lookup. New
+    revocations of other workers are read every
+    SESSION_REVOCATION_SYNC_INTERVAL_SECONDS
+    """
+
+    def __init__(self):
+        self._revoked: dict[str, float] = {}
+        self._synced_at: Optional[float] = None
+
+    def __contains__(self, session_id: object) -> bool:
+        return session_id in self._revoked
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+    @property
+    def retention(self) -> float:
+        """access tokens of revoked session expire after it"""
+        return settings.security.access_token_expire_minutes * 60
+
+    def reset(self) -> None:
+        self._revoked = {}
+        self._synced_at = None
+
+    def add(self, session_id: str, revoked_at: float) -> None:
+        self._revoked[session_id] = revoked_at
+
+    async def sync(self) -> int:
+        """Read revocations since last sync, returns count of read entries"""
+        started = time.time()
+        since = (
+            started - self.retention
+            if self._synced_at is None
+            else self._synced_at - SYNC_OVERLAP_SECONDS
+        )
+        revoked = await get_session_store().revoked_since(since)
+        self._revoked.update(revoked)
+
+        expired = started - self.retention
+        for session_id in [
+            key for key, revoked_at in self._revoked.items() if revoked_at < expired
+        ]:
+            del self._revoked[session_id]
+        self._synced_at = started
+        return len(revoked)
+
+    async def run(self, interval: float) -> None:
+        """Sync forever, every interval seconds"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.sync()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("revoked sessions sync failed")
+
+
+revoked_sessions = RevokedSessions()
@@ -1,10 +1,18 @@
 from app.db.base import Base, BaseModel
-from app.db.session import async_session_maker, engine, get_db_session
+from app.db.session import (
+    async_session_maker,
+    get_db_session,
+    get_engine,
+    get_replica_router,
+    replica_session_maker,
+)
 
 __all__ = [
     "get_db_session",
-    "engine",
+    "get_engine",
     "async_session_maker",
+    "get_replica_router",
+    "replica_session_maker",
     "Base",
     "BaseModel",
 ]
@@ -0,0 +1,136 @@
+import asyncio
+import logging
+import time
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config import DatabaseSettings
+from app.db.session import get_database
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class EngineHealth:
+    """Result of last check of one engine"""
+
+    healthy: bool = False
+    checked_at: Optional[float] = None
+    latency_ms: float = 0.0
+    checked: int = 0
+    evicted: int = 0
+    error: Optional[str] = None
+
+
+class HealthMonitor:
+    """
+    Background check of pooled connections. Idle connections are validated
+    one by one (pool is FIFO, every checkout takes next idle connection),
+    dead ones are evicted by SQLAlchemy, so requests do not pay for
+    pre ping. Result is cached for /health/ready
+    """
+
+    def __init__(self):
+        self.config: Optional[DatabaseSettings] = None
+        self.engines: dict[str, EngineHealth] = {}
+
+    def configure(self, config: DatabaseSettings) -> None:
+        """Settings of DB which is monitored, status is reset"""
+        self.config = config
+        self.engines = {}
+
+    async def _ping(self, engine: AsyncEngine) -> None:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    async def check_engine(
+        self, engine: AsyncEngine, validate_idle: bool
+    ) -> EngineHealth:
+        """
+        Ping engine, with validate_idle every idle connection of pool
+
+        args:
+            engine: engine to check
+            validate_idle: check all idle connections instead of one
+        """
+        health = EngineHealth()
+        started = time.perf_counter()
+        rounds = max(engine.pool.checkedin(), 1) if validate_idle else 1
+        for _ in range(rounds):
+            try:
+                await asyncio.wait_for(
+                    self._ping(engine), timeout=self.config.DB_HEALTH_CHECK_TIMEOUT
+                )
+                health.checked += 1
+            except exc.DBAPIError as e:
+                if not e.connection_invalidated:
+                    health.error = str(e.orig)
+                    break
+                # connection is dropped from pool, next one is checked
+                health.evicted += 1
+            except (asyncio.TimeoutError, OSError, exc.SQLAlchemyError) as e:
+                health.error = repr(e)
+                break
+
+        health.healthy = health.error is None and health.checked > 0
+        if not health.healthy and health.error is None:
+            health.error = "no live connection"
+        health.latency_ms = round((time.perf_counter() - started) * 1000, 3)
+        health.checked_at = time.monotonic()
+        return health
+
+    async def check(self) -> None:
+        """Check primary and replicas, replica which is down is skipped for reads"""
+        database = get_database()
+        validate_idle = self.config.DB_PING_STRATEGY == "monitor"
+
+        names = ["primary"] + [
+            f"replica-{index}" for index in range(len(database.replica_engines))
+        ]
+        results = await asyncio.gather(
+            *(self.check_engine(engine, validate_idle) for engine in database.engines)
+        )
+        for name, engine, health in zip(names, database.engines, results):
+            if health.evicted:
+                logger.warning("%s: evicted %d dead connections", name, health.evicted)
+            if not health.healthy:
+                logger.warning("%s is unhealthy: %s", name, health.error)
+                if engine is not database.engine:
+                    database.replica_router.mark_down(engine)
+        self.engines = dict(zip(names, results))
+
+    def ready(self) -> bool:
+        """Primary was healthy on last check and check is not stale"""
+        primary = self.engines.get("primary")
+        if primary is None or not primary.healthy:
+            return False
+        # monitor which hangs or died does not keep worker ready
+        max_age = 3 * self.config.DB_HEALTH_CHECK_INTERVAL
+        return time.monotonic() - primary.checked_at <= max_age
+
+    def status(self) -> dict:
+        """Cached status, age of check instead of monotonic time"""
+        now = time.monotonic()
+        engines = {}
+        for name, health in self.engines.items():
+            item = asdict(health)
+            item["age_seconds"] = round(now - item.pop("checked_at"), 3)
+            engines[name] = item
+        return {"ready": self.ready(), "database": engines}
+
+    async def run(self) -> None:
+        """Check engines forever, every DB_HEALTH_CHECK_INTERVAL seconds"""
+        while True:
+            await asyncio.sleep(self.config.DB_HEALTH_CHECK_INTERVAL)
+            try:
+                await self.check()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("DB health check failed")
+
+
+health_monitor = HealthMonitor()
@@ -0,0 +1,112 @@
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class QueryStats:
+    """Queries of one request: count, DB time (seconds), runs per statement"""
+
+    count: int = 0
+    duration: float = 0.0
+    statements: Counter = field(default_factory=Counter)
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """statements executed at least threshold times"""
+        return [
+            (statement, runs)
+            for statement, runs in self.statements.most_common()
+            if runs >= threshold
+        ]
+
+
+query_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def parameters_shape(parameters: Any, many: bool) -> str:
+    """
+    Types of statement parameters without values (no personal data in logs)
+
+    args:
+        parameters: DBAPI parameters of cursor execute
+        many: executemany, parameters is list of parameter sets
+    """
+    if many and isinstance(parameters, (list, tuple)):
+        if not parameters:
+            return "0 x ()"
+        return f"{len(parameters)} x {parameters_shape(parameters[0], False)}"
+    if isinstance(parameters, dict):
+        types = ", ".join(
+            f"{key}: {type(value).__name__}" for key, value in parameters.items()
+        )
+        return f"{{{types}}}"
+    if isinstance(parameters, (list, tuple)):
+        return f"({', '.join(type(value).__name__ for value in parameters)})"
+    return type(parameters).__name__
+
+
+@contextmanager
+def track_queries(label: str) -> Iterator[QueryStats]:
+    """
+    Count queries made inside block, in debug mode warn about statement
+    executed DB_REPEATED_QUERY_THRESHOLD or more times (N+1 or repeated
+    lookup of same row)
+
+    args:
+        label: what is tracked, e.g. "GET /api/v1/users/me"
+    """
+    stats = QueryStats()
+    token = query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        query_stats.reset(token)
+        if settings.debug:
+            threshold = settings.database.DB_REPEATED_QUERY_THRESHOLD
+            for statement, runs in stats.repeated(threshold):
+                logger.warning(
+                    "%s executed same statement %d times: %s",
+                    label,
+                    runs,
+                    " ".join(statement.split()),
+                )
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, many):
+    if context is not None:
+        context._query_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, many):
+    started = getattr(context, "_query_started", None)
+    if started is None:
+        return
+    duration = time.perf_counter() - started
+
+    stats = query_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.duration += duration
+        if settings.debug:
+            stats.statements[statement] += 1
+
+    if duration * 1000 >= settings.database.DB_SLOW_QUERY_MS:
+        logger.warning(
+            "slow query %.1f ms, parameters %s: %s",
+            duration * 1000,
+            parameters_shape(parameters, many),
+            " ".join(statement.split()),
+        )
@@ -0,0 +1,61 @@
+import itertools
+import time
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import Session
+
+# key in session.info, set when session wrote something
+WROTE_KEY = "wrote"
+
+
+class ReplicaRouter:
+    """
+    Round-robin choice of read replica, replica which failed is skipped
+    for retry_after seconds, without healthy replicas reads go to primary
+    """
+
+    def __init__(self, engines: list[AsyncEngine], retry_after: float = 30.0):
+        self.engines = engines
+        self.retry_after = retry_after
+        self._cycle = itertools.cycle(engines) if engines else None
+        self._down_until: dict[int, float] = {}
+
+    def next_engine(self) -> AsyncEngine | None:
+        """Take next healthy replica or None"""
+        if self._cycle is None:
+            return None
+
+        now = time.monotonic()
+        for _ in range(len(self.engines)):
+            engine = next(self._cycle)
+            if self._down_until.get(id(engine), 0.0) <= now:
+                return engine
+        return None
+
+    def engine_for_read(self, session: AsyncSession) -> AsyncEngine | None:
+        """
+        Replica for read in session or None for primary,
+        session which already wrote reads only primary (read your writes)
+        """
+        if session.info.get(WROTE_KEY):
+            return None
+        return self.next_engine()
+
+    def mark_down(self, engine: AsyncEngine) -> None:
+        """Skip replica for a while after connection error"""
+        self._down_until[id(engine)] = time.monotonic() + self.retry_after
+
+
+# flag stays after commit, so rest of request reads primary,
+# replicas may lag behind commit
+@event.listens_for(Session, "after_flush")
+def _mark_wrote_after_flush(session, flush_context):
+    session.info[WROTE_KEY] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_wrote_on_dml(orm_execute_state):
+    # bulk INSERT / UPDATE / DELETE statements do not flush
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info[WROTE_KEY] = True
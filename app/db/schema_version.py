@@ -0,0 +1,42 @@
+from pathlib import Path
+
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
+
+
+def head_revisions() -> set[str]:
+    """Heads of migration scripts in migrations/versions"""
+    script = ScriptDirectory.from_config(Config(str(ALEMBIC_INI)))
+    return set(script.get_heads())
+
+
+async def current_revisions(engine: AsyncEngine) -> set[str]:
+    """Revisions in alembic_version table of DB"""
+    async with engine.connect() as connection:
+        heads = await connection.run_sync(
+            lambda sync: MigrationContext.configure(sync).get_current_heads()
+        )
+    return set(heads)
+
+
+async def check_schema_at_head(engine: AsyncEngine) -> None:
+    """
+    Check that all migrations are applied to DB
+
+    args:
+        engine: engine of primary DB
+
+    raises:
+        RuntimeError if DB revision is not head of migrations
+    """
+    current = await current_revisions(engine)
+    heads = head_revisions()
+    if current != heads:
+        raise RuntimeError(
+            f"DB schema is at {sorted(current) or 'no revision'}, migrations head "
+            f"is {sorted(heads)}, run `alembic upgrade head`"
+        )
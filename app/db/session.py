@@ -1,25 +1,179 @@
+import asyncio
+import logging
+from contextlib import AsyncExitStack
+from typing import Any, Callable
+
+from sqlalchemy import exc
 from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
+from sqlalchemy.orm import Session
 
-from app.config import settings
+from app.config import DatabaseSettings, settings
+from app.db.pool import InstrumentedAsyncPool
+from app.db.replicas import ReplicaRouter
 
-# create async engine for connect to DB
-engine = create_async_engine(
-    settings.database.async_url,
-    future=True,
-    echo=settings.debug,
-    pool_pre_ping=True,  # check connection before use
-)
+logger = logging.getLogger(__name__)
 
-# just async session
-async_session_maker = async_sessionmaker(
-    engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-)
+
+class ReconnectingSession(Session):
+    """
+    Session which repeats its first statement once when pooled connection
+    turns out dead (no pre ping on checkout). Only first statement of
+    empty session is repeated, rollback there loses nothing
+    """
+
+    def _retry_first_use(self, method: Callable[..., Any], *args, **kwargs) -> Any:
+        first_use = (
+            self.get_transaction() is None
+            and not self.identity_map
+            and not self.new
+            and not self.deleted
+        )
+        try:
+            return method(*args, **kwargs)
+        except exc.DBAPIError as e:
+            if not (first_use and e.connection_invalidated):
+                raise
+            logger.warning("dead pooled connection, statement is repeated: %s", e.orig)
+            self.rollback()
+            return method(*args, **kwargs)
+
+    def execute(self, *args, **kwargs):
+        return self._retry_first_use(super().execute, *args, **kwargs)
+
+    def scalar(self, *args, **kwargs):
+        return self._retry_first_use(super().scalar, *args, **kwargs)
+
+    def scalars(self, *args, **kwargs):
+        return self._retry_first_use(super().scalars, *args, **kwargs)
+
+
+class Database:
+    """
+    Engines of primary and read replicas with session maker, pools are
+    tuned by DB_POOL_* settings
+
+    args:
+        config: DB settings
+        echo: log SQL statements
+    """
+
+    def __init__(self, config: DatabaseSettings, echo: bool = False):
+        self.config = config
+        self.engine = self._create_engine(config.async_url, echo)
+        # engines of read replicas, same pool settings as primary
+        self.replica_engines = [
+            self._create_engine(url, echo) for url in config.replica_urls
+        ]
+        self.replica_router = ReplicaRouter(
+            self.replica_engines,
+            retry_after=config.DB_REPLICA_RETRY_AFTER,
+        )
+        self.session_maker = async_sessionmaker(
+            self.engine,
+            class_=AsyncSession,
+            sync_session_class=ReconnectingSession,
+            expire_on_commit=False,
+        )
+
+    def _create_engine(self, url: str, echo: bool) -> AsyncEngine:
+        return create_async_engine(
+            url,
+            future=True,
+            echo=echo,
+            poolclass=InstrumentedAsyncPool,
+            **self.config.engine_options,
+        )
+
+    @property
+    def engines(self) -> list[AsyncEngine]:
+        return [self.engine, *self.replica_engines]
+
+
+# made on first use or by init_database in lifespan, so import of app
+# does not create engines
+_database: Database | None = None
+
+
+def init_database(config: DatabaseSettings, echo: bool = False) -> Database:
+    """Create engines of this worker from config"""
+    global _database
+    _database = Database(config, echo=echo)
+    return _database
+
+
+def get_database() -> Database:
+    """Engines of this worker, created from settings on first call"""
+    if _database is None:
+        return init_database(settings.database, echo=settings.debug)
+    return _database
+
+
+def get_engine() -> AsyncEngine:
+    """Engine of primary DB"""
+    return get_database().engine
+
+
+def get_replica_router() -> ReplicaRouter:
+    """Router of read replicas"""
+    return get_database().replica_router
+
+
+def async_session_maker(**kwargs) -> AsyncSession:
+    """New session of primary DB"""
+    return get_database().session_maker(**kwargs)
+
+
+def replica_session_maker() -> AsyncSession:
+    """Session for read only work, bound to next replica (or primary)"""
+    database = get_database()
+    return database.session_maker(
+        bind=database.replica_router.next_engine() or database.engine
+    )
+
+
+def __getattr__(name: str):
+    # engine, replica_engines and replica_router of older imports
+    if name in ("engine", "replica_engines", "replica_router"):
+        return getattr(get_database(), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+async def prewarm_pool(engine: AsyncEngine, size: int) -> None:
+    """
+    Open size connections of pool at once and return them to pool,
+    first requests of worker do not pay for connect
+
+    args:
+        engine: engine which pool is opened
+        size: connections to open, more than pool_size would be discarded
+    """
+    size = min(size, engine.pool.size())
+    async with AsyncExitStack() as stack:
+        await asyncio.gather(
+            *(stack.enter_async_context(engine.connect()) for _ in range(size))
+        )
+
+
+async def prewarm_pools() -> None:
+    """Open DB_POOL_MIN_SIZE connections to primary and every replica"""
+    database = get_database()
+    size = database.config.DB_POOL_MIN_SIZE
+    await asyncio.gather(*(prewarm_pool(item, size) for item in database.engines))
+
+
+async def dispose_engines() -> None:
+    """Close pooled connections of primary and replicas, next use creates them"""
+    global _database
+    if _database is None:
+        return
+    database, _database = _database, None
+    for item in database.engines:
+        await item.dispose()
 
 
 async def get_db_session() -> AsyncSession:
@@ -33,3 +187,22 @@ async def get_db_session() -> AsyncSession:
             raise
         finally:
             await session.close()
+
+
+def get_pool_status() -> dict:
+    """Current state of connection pool of engine"""
+    database = get_database()
+    pool = database.engine.pool
+    wait_stats = pool.wait_stats
+
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": database.config.DB_MAX_OVERFLOW,
+        "checkouts": wait_stats.checkouts,
+        "timeouts": wait_stats.timeouts,
+        "avg_wait_ms": wait_stats.avg_wait * 1000,
+        "max_wait_ms": wait_stats.max_wait * 1000,
+    }
@@ -1,76 +1,296 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager, suppress
+from typing import Optional
+
 from app.core.exceptions import (
     FinFlowException,
     InsufficientFundsException,
     InvalidCredentialsException,
+    InvalidCursorException,
+    InvalidRefreshTokenException,
     InvalidTransactionException,
+    RateLimitExceededException,
     ResourceNotFoundException,
+    ServiceOverloadedException,
     UserAlreadyExistsException,
 )
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Response
+from fastapi.responses import JSONResponse
+from fastapi.exception_handlers import http_exception_handler
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.api.v1 import users
-from app.config import settings
-
-app = FastAPI(
-    title=settings.title,
-    version=settings.version,
-    description=settings.description,
-    debug=settings.debug,
+from app.api.v1 import accounts, internal, transactions, users
+from app.config import AppSettings, apply_settings, settings
+from app.core.cache_backend import (
+    create_cache_backend,
+    get_cache_backend,
+    set_cache_backend,
 )
-
-# CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+from app.core.idempotency import CREDENTIAL_PATHS, IdempotencyMiddleware
+from app.core.metrics import MetricsMiddleware, mark_worker_dead, render_metrics
+from app.core.profile_claims import profile_versions
+from app.core.rate_limit import (
+    create_rate_limit_backend,
+    get_rate_limit_backend,
+    set_rate_limit_backend,
 )
+from app.core.security import hashing_pool, token_cache
+from app.core.sessions import (
+    create_session_store,
+    get_session_store,
+    revoked_sessions,
+    set_session_store,
+)
+from app.db.health import health_monitor
+from app.db.session import dispose_engines, init_database, prewarm_pools
+from app.repositories.user import principal_cache
+from app.services.balance_snapshot import BalanceSnapshotService
+
+logger = logging.getLogger(__name__)
+
+
+def _lifespan(app_settings: AppSettings):
+    """Engines, cache clients and hashing pool live between startup and shutdown"""
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        init_database(app_settings.database, echo=app_settings.debug)
+        set_cache_backend(create_cache_backend(app_settings.cache))
+        set_rate_limit_backend(
+            create_rate_limit_backend(app_settings.rate_limit, app_settings.cache)
+        )
+        set_session_store(
+            create_session_store(app_settings.sessions, app_settings.cache)
+        )
+        hashing_pool.configure(
+            max_workers=app_settings.security.hash_pool_workers,
+            max_pending=app_settings.security.hash_pool_max_pending,
+            batch_slots=app_settings.security.hash_pool_batch_slots,
+        )
+        token_cache.configure(maxsize=app_settings.security.token_cache_size)
+        principal_cache.configure(
+            maxsize=app_settings.security.principal_cache_size,
+            ttl=app_settings.security.principal_cache_ttl_seconds,
+        )
+        # server accepts requests after startup, so pools are open by then
+        await prewarm_pools()
+        # /health/ready answers from first check until next one
+        health_monitor.configure(app_settings.database)
+        await health_monitor.check()
+        monitor = asyncio.create_task(health_monitor.run())
+
+        if app_settings.sessions.backend != "redis" and app_settings.server.workers > 1:
+            logger.warning(
+                "refresh tokens work only with worker of login without "
+                "SESSION_BACKEND=redis"
+            )
+        revoked_sessions.reset()
+        # store logs failure, sync task tries again
+        with suppress(ServiceOverloadedException):
+            await revoked_sessions.sync()
+        revocations = asyncio.create_task(
+            revoked_sessions.run(app_settings.sessions.revocation_sync_interval_seconds)
+        )
+
+        profiles = None
+        if app_settings.security.profile_claims_enabled:
+            if (
+                app_settings.cache.backend != "redis"
+                and app_settings.server.workers > 1
+            ):
+                logger.warning(
+                    "profile changes reach other workers only with CACHE_BACKEND=redis"
+                )
+            profile_versions.configure(app_settings.security)
+            await profile_versions.sync()
+            profiles = asyncio.create_task(profile_versions.run())
+
+        refresher = None
+        if app_settings.snapshots.refresh_enabled:
+            refresher = asyncio.create_task(
+                BalanceSnapshotService.run_refresher(app_settings.snapshots)
+            )
+
+        yield
+
+        for task in (refresher, monitor, revocations, profiles):
+            if task is None:
+                continue
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+
+        await get_cache_backend().close()
+        set_cache_backend(None)
+        await get_rate_limit_backend().close()
+        set_rate_limit_backend(None)
+        await get_session_store().close()
+        set_session_store(None)
+        await dispose_engines()
+        hashing_pool.shutdown()
+        mark_worker_dead()
+
+    return lifespan
 
 
 # exception handlers
-@app.exception_handler(ResourceNotFoundException)
 async def resource_not_found_exception_handler(request, exc: ResourceNotFoundException):
-    return exc.to_http_exception()
+    return await http_exception_handler(request, exc.to_http_exception())
 
 
-@app.exception_handler(InvalidCredentialsException)
 async def invalid_credentials_exception_handler(
     request, exc: InvalidCredentialsException
 ):
-    return exc.to_http_exception()
+    return await http_exception_handler(request, exc.to_http_exception())
 
 
-@app.exception_handler(UserAlreadyExistsException)
 async def user_already_exists_exception_handler(
     request, exc: UserAlreadyExistsException
 ):
-    return exc.to_http_exception()
+    return await http_exception_handler(request, exc.to_http_exception())
 
 
-@app.exception_handler(InsufficientFundsException)
 async def insufficient_funds_exception_handler(
     request, exc: InsufficientFundsException
 ):
-    return exc.to_http_exception()
+    return await http_exception_handler(request, exc.to_http_exception())
 
 
-@app.exception_handler(InvalidTransactionException)
 async def invalid_transaction_exception_handler(
     request, exc: InvalidTransactionException
 ):
-    return exc.to_http_exception()
+    return await http_exception_handler(request, exc.to_http_exception())
 
 
-# routes
-app.include_router(
-    users.router,
-    prefix=settings.api_v1_prefix,
-)
+async def invalid_cursor_exception_handler(request, exc: InvalidCursorException):
+    return await http_exception_handler(request, exc.to_http_exception())
+
+
+async def service_overloaded_exception_handler(
+    request, exc: ServiceOverloadedException
+):
+    return await http_exception_handler(request, exc.to_http_exception())
+
+
+async def invalid_refresh_token_exception_handler(
+    request, exc: InvalidRefreshTokenException
+):
+    return await http_exception_handler(request, exc.to_http_exception())
+
+
+async def rate_limit_exceeded_exception_handler(
+    request, exc: RateLimitExceededException
+):
+    return await http_exception_handler(request, exc.to_http_exception())
+
+
+def create_app(app_settings: Optional[AppSettings] = None) -> FastAPI:
+    """
+    Build application, nothing is connected until lifespan startup.
+    app_settings become settings of whole process (apply_settings), code
+    outside of app reads them from app.config.settings, so process holds
+    one application: last create_app wins
+
+    args:
+        app_settings: settings, default - read from env and .env on import
+    """
+    app_settings = app_settings or settings
+    apply_settings(app_settings)
+
+    app = FastAPI(
+        title=app_settings.title,
+        version=app_settings.version,
+        description=app_settings.description,
+        debug=app_settings.debug,
+        lifespan=_lifespan(app_settings),
+    )
+    app.state.settings = app_settings
+
+    # retried POST requests with Idempotency-Key run once
+    app.add_middleware(
+        IdempotencyMiddleware,
+        config=app_settings.idempotency,
+        excluded_paths=[
+            f"{app_settings.api_v1_prefix}{path}" for path in CREDENTIAL_PATHS
+        ],
+    )
+
+    # CORS
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # latency histograms for /metrics and Server-Timing, outermost middleware
+    app.add_middleware(MetricsMiddleware, config=app_settings.metrics)
+
+    # exception handlers
+    app.add_exception_handler(
+        ResourceNotFoundException, resource_not_found_exception_handler
+    )
+    app.add_exception_handler(
+        InvalidCredentialsException, invalid_credentials_exception_handler
+    )
+    app.add_exception_handler(
+        UserAlreadyExistsException, user_already_exists_exception_handler
+    )
+    app.add_exception_handler(
+        InsufficientFundsException, insufficient_funds_exception_handler
+    )
+    app.add_exception_handler(
+        InvalidTransactionException, invalid_transaction_exception_handler
+    )
+    app.add_exception_handler(InvalidCursorException, invalid_cursor_exception_handler)
+    app.add_exception_handler(
+        ServiceOverloadedException, service_overloaded_exception_handler
+    )
+    app.add_exception_handler(
+        RateLimitExceededException, rate_limit_exceeded_exception_handler
+    )
+    app.add_exception_handler(
+        InvalidRefreshTokenException, invalid_refresh_token_exception_handler
+    )
+
+    # routes
+    for router in (users.router, accounts.router, transactions.router, internal.router):
+        app.include_router(router, prefix=app_settings.api_v1_prefix)
+
+    app.add_api_route("/health", health_check, methods=["GET"])
+    app.add_api_route("/health/ready", readiness_check, methods=["GET"])
+    app.add_api_route("/metrics", metrics, methods=["GET"], include_in_schema=False)
+
+    return app
 
 
-@app.get("/health")
 async def health_check():
     """Health check endpoint"""
     return {"status": "ok"}
+
+
+async def readiness_check():
+    """
+    Ready when last background check of primary DB passed,
+    probes do not query DB
+    """
+    status = health_monitor.status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
+async def metrics():
+    """Prometheus metrics of all workers"""
+    content, media_type = render_metrics()
+    return Response(content=content, media_type=media_type)
+
+
+def __getattr__(name: str):
+    # `uvicorn app.main:app` builds default application on first access,
+    # import of app.main (create_app in tests) does not
+    if name == "app":
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
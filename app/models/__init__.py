@@ -1,5 +1,22 @@
+from app.models.account import (
+    Account,
+    AccountBalanceSlot,
+    AccountStatus,
+    AccountType,
+)
+from app.models.balance_snapshot import DailyBalanceSnapshot, SnapshotWatermark
+from app.models.transaction import Transaction, TransactionStatus, TransactionType
 from app.models.user import User
 
 __all__ = [
+    "Account",
+    "AccountBalanceSlot",
+    "AccountStatus",
+    "AccountType",
+    "DailyBalanceSnapshot",
+    "SnapshotWatermark",
+    "Transaction",
+    "TransactionStatus",
+    "TransactionType",
     "User",
 ]
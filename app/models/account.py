@@ -1,7 +1,16 @@
 from enum import Enum as PythonEnum
 from uuid import uuid4
 
-from sqlalchemy import Boolean, Column, Enum, Float, ForeignKey, Index, String
+from sqlalchemy import (
+    Boolean,
+    Column,
+    Enum,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+)
 from sqlalchemy.dialects.postgresql import UUID
 
 from app.db.base import BaseModel
@@ -31,7 +40,7 @@ class Account(BaseModel):
 
     user_id = Column(
         UUID(as_uuid=True),
-        ForeignKey("user.user_id"),
+        ForeignKey("users.user_id"),
         nullable=False,
         index=True,
         comment="ID owner bank account",
@@ -80,6 +89,14 @@ class Account(BaseModel):
         comment="Check what bank account is primary or not",
     )
 
+    balance_slots = Column(
+        Integer,
+        nullable=False,
+        default=0,
+        server_default="0",
+        comment="Count of balance slots for hot account (0 - balance is in this row)",
+    )
+
     __table_args__ = (
         Index("idx_account_user_id", "user_id"),
         Index("idx_account_status", "status"),
@@ -88,3 +105,35 @@ class Account(BaseModel):
 
     def __repr__(self) -> str:
         return f"<Account(account_id={self.account_id}, number={self.account_number}, balance={self.balance})>"
+
+
+class AccountBalanceSlot(BaseModel):
+    """
+    Part of balance of hot account, credits go to random slot,
+    so concurrent credits do not wait for one row lock
+    """
+
+    __tablename__ = "account_balance_slots"
+
+    account_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("accounts.account_id", ondelete="CASCADE"),
+        primary_key=True,
+        comment="ID bank account",
+    )
+
+    slot = Column(
+        Integer,
+        primary_key=True,
+        comment="Number of slot",
+    )
+
+    balance = Column(
+        Float,
+        nullable=False,
+        default=0.0,
+        comment="Part of account balance",
+    )
+
+    def __repr__(self) -> str:
+        return f"<AccountBalanceSlot(account_id={self.account_id}, slot={self.slot}, balance={self.balance})>"
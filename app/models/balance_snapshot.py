@@ -0,0 +1,89 @@
+from sqlalchemy import Column, Date, DateTime, Float, ForeignKey, String
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.db.base import BaseModel
+
+
+class DailyBalanceSnapshot(BaseModel):
+    """
+    Balance of account for one day, built from completed transactions
+    (day of completed_at), days without transactions have no row
+    """
+
+    __tablename__ = "daily_balance_snapshot"
+
+    account_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("accounts.account_id", ondelete="CASCADE"),
+        primary_key=True,
+        comment="ID bank account",
+    )
+
+    day = Column(
+        Date,
+        primary_key=True,
+        comment="Day of snapshot",
+    )
+
+    opening = Column(
+        Float,
+        nullable=False,
+        default=0.0,
+        comment="Balance at start of day",
+    )
+
+    closing = Column(
+        Float,
+        nullable=False,
+        default=0.0,
+        comment="Balance at end of day",
+    )
+
+    credits = Column(
+        Float,
+        nullable=False,
+        default=0.0,
+        comment="Sum of incoming transactions for day",
+    )
+
+    debits = Column(
+        Float,
+        nullable=False,
+        default=0.0,
+        comment="Sum of outgoing transactions for day",
+    )
+
+    def __repr__(self) -> str:
+        return f"<DailyBalanceSnapshot(account_id={self.account_id}, day={self.day}, closing={self.closing})>"
+
+
+class SnapshotWatermark(BaseModel):
+    """
+    Last transaction (completed_at, transaction_id) which is already in
+    snapshots, row is locked while snapshots are refreshed
+    """
+
+    __tablename__ = "snapshot_watermark"
+
+    name = Column(
+        String(50),
+        primary_key=True,
+        comment="Name of snapshot",
+    )
+
+    completed_at = Column(
+        DateTime,
+        nullable=True,
+        comment="completed_at of last processed transaction",
+    )
+
+    transaction_id = Column(
+        UUID(as_uuid=True),
+        nullable=True,
+        comment="ID of last processed transaction",
+    )
+
+    def __repr__(self) -> str:
+        return (
+            f"<SnapshotWatermark(name={self.name}, completed_at={self.completed_at})>"
+        )
@@ -1,7 +1,17 @@
 from enum import Enum as PythonEnum
 from uuid import uuid4
 
-from sqlalchemy import Column, Enum, Float, ForeignKey, Index, String, Text
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Enum,
+    Float,
+    ForeignKey,
+    Index,
+    String,
+    Text,
+    text,
+)
 from sqlalchemy.dialects.postgresql import UUID
 
 from app.db.base import BaseModel
@@ -35,10 +45,16 @@ class Transaction(BaseModel):
         UUID(as_uuid=True),
         ForeignKey("accounts.account_id"),
         nullable=False,
-        index=True,
         comment="ID bank account",
     )
 
+    to_account_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("accounts.account_id"),
+        nullable=True,
+        comment="ID receiver bank account (for transfer)",
+    )
+
     transaction_type = Column(
         Enum(TransactionType),
         nullable=False,
@@ -78,9 +94,51 @@ class Transaction(BaseModel):
         comment="Tracking reference number",
     )
 
+    completed_at = Column(
+        DateTime,
+        nullable=True,
+        comment="when transaction was completed",
+    )
+
     __table_args__ = (
-        Index("idx_transaction_from_account", "from_account_id"),
-        Index("idx_transaction_to_account", "to_account_id"),
+        # account statement: newest first by account, filter columns are
+        # included, so filters are checked without reading table rows
+        Index(
+            "idx_transaction_from_account_created",
+            "from_account_id",
+            "created_at",
+            "transaction_id",
+            postgresql_include=["status", "transaction_type", "amount"],
+        ),
+        Index(
+            "idx_transaction_to_account_created",
+            "to_account_id",
+            "created_at",
+            "transaction_id",
+            postgresql_include=["status", "transaction_type", "amount"],
+        ),
+        # balance snapshots: refresher walks completions in order,
+        # balance as of date reads completions of one account for one day
+        Index(
+            "idx_transaction_completed",
+            "completed_at",
+            "transaction_id",
+            postgresql_where=text("completed_at IS NOT NULL"),
+        ),
+        Index(
+            "idx_transaction_from_account_completed",
+            "from_account_id",
+            "completed_at",
+            postgresql_include=["transaction_type", "amount"],
+            postgresql_where=text("completed_at IS NOT NULL"),
+        ),
+        Index(
+            "idx_transaction_to_account_completed",
+            "to_account_id",
+            "completed_at",
+            postgresql_include=["transaction_type", "amount"],
+            postgresql_where=text("completed_at IS NOT NULL"),
+        ),
         Index("idx_transaction_status", "status"),
         Index("idx_transaction_type", "transaction_type"),
     )
@@ -58,6 +58,8 @@ class User(BaseModel):
     __table_args__ = (
         Index("idx_user_email", "email"),
         Index("idx_user_is_active", "is_active"),
+        # keyset pagination order
+        Index("idx_user_created_at_user_id", "created_at", "user_id"),
     )
 
     def __repr__(self) -> str:
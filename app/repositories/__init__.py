@@ -1,7 +1,13 @@
+from app.repositories.account import AccountRepository
+from app.repositories.balance_snapshot import BalanceSnapshotRepository
 from app.repositories.base import BaseRepository
+from app.repositories.transaction import TransactionRepository
 from app.repositories.user import UserRepository
 
 __all__ = [
+    "AccountRepository",
+    "BalanceSnapshotRepository",
     "BaseRepository",
+    "TransactionRepository",
     "UserRepository",
 ]
@@ -0,0 +1,137 @@
+from typing import Iterable, Optional
+from uuid import UUID
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.account import Account, AccountBalanceSlot
+from app.repositories.base import BaseRepository
+
+
+class AccountRepository(BaseRepository[Account]):
+    """Repository for work with bank accounts"""
+
+    def __init__(self, session: AsyncSession):
+        super().__init__(session, Account)
+
+    async def get_by_account_id(self, account_id: UUID) -> Optional[Account]:
+        """
+        Take account by UUID
+
+        args:
+            account_id: UUID account
+        """
+        result = await self._read(
+            select(Account).where(Account.account_id == account_id)
+        )
+        return result.scalars().first()
+
+    async def get_many(self, account_ids: Iterable[UUID]) -> dict[UUID, Account]:
+        """
+        Take fresh accounts from primary without locks
+
+        args:
+            account_ids: UUIDs accounts
+        """
+        result = await self.session.execute(
+            select(Account)
+            .where(Account.account_id.in_(list(set(account_ids))))
+            .execution_options(populate_existing=True)
+        )
+        return {account.account_id: account for account in result.scalars().all()}
+
+    async def lock_many(self, account_ids: Iterable[UUID]) -> dict[UUID, Account]:
+        """
+        Lock accounts with SELECT ... FOR UPDATE in order of account_id,
+        same order for every transfer, so two transfers can not deadlock
+
+        args:
+            account_ids: UUIDs accounts
+        """
+        result = await self.session.execute(
+            select(Account)
+            .where(Account.account_id.in_(list(set(account_ids))))
+            .order_by(Account.account_id)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )
+        return {account.account_id: account for account in result.scalars().all()}
+
+    async def lock_slots(self, account_id: UUID) -> list[AccountBalanceSlot]:
+        """
+        Lock all balance slots of hot account in order of slot
+
+        args:
+            account_id: UUID account
+        """
+        result = await self.session.execute(
+            select(AccountBalanceSlot)
+            .where(AccountBalanceSlot.account_id == account_id)
+            .order_by(AccountBalanceSlot.slot)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )
+        return list(result.scalars().all())
+
+    async def credit_slot(self, account_id: UUID, slot: int, amount: float) -> bool:
+        """
+        Add amount to one balance slot with atomic UPDATE (locks only that slot)
+
+        args:
+            account_id: UUID account
+            slot: number of slot
+            amount: amount for add
+
+        returns:
+            False if slot does not exist (sharding was disabled)
+        """
+        result = await self.session.execute(
+            update(AccountBalanceSlot)
+            .where(
+                AccountBalanceSlot.account_id == account_id,
+                AccountBalanceSlot.slot == slot,
+            )
+            .values(balance=AccountBalanceSlot.balance + amount)
+        )
+        return result.rowcount > 0
+
+    async def sum_slots(self, account_id: UUID) -> float:
+        """
+        Summed balance of all slots
+
+        args:
+            account_id: UUID account
+        """
+        result = await self._read(
+            select(func.coalesce(func.sum(AccountBalanceSlot.balance), 0.0)).where(
+                AccountBalanceSlot.account_id == account_id
+            )
+        )
+        return result.scalar_one()
+
+    async def create_slots(self, account_id: UUID, balances: list[float]) -> None:
+        """
+        Create balance slots, slot number is index in balances
+
+        args:
+            account_id: UUID account
+            balances: balance of every slot
+        """
+        self.session.add_all(
+            AccountBalanceSlot(account_id=account_id, slot=slot, balance=balance)
+            for slot, balance in enumerate(balances)
+        )
+        await self.session.flush()
+
+    async def delete_slots(self, account_id: UUID) -> None:
+        """
+        Delete all balance slots of account
+
+        args:
+            account_id: UUID account
+        """
+        await self.session.execute(
+            delete(AccountBalanceSlot).where(
+                AccountBalanceSlot.account_id == account_id
+            )
+        )
@@ -0,0 +1,136 @@
+from datetime import date, datetime
+from typing import Iterable, Optional
+from uuid import UUID
+
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.balance_snapshot import DailyBalanceSnapshot, SnapshotWatermark
+from app.repositories.base import BaseRepository
+
+# name of watermark row of daily balance snapshots
+DAILY_BALANCE = "daily_balance"
+
+
+class BalanceSnapshotRepository(BaseRepository[DailyBalanceSnapshot]):
+    """
+    Repository for work with daily balance snapshots, snapshots and watermark
+    are read from primary, so they are always consistent with each other
+    """
+
+    def __init__(self, session: AsyncSession):
+        super().__init__(session, DailyBalanceSnapshot)
+
+    async def get_db_time(self) -> datetime:
+        """Current time of DB, same clock which fills completed_at"""
+        return await self.session.scalar(select(func.localtimestamp()))
+
+    async def ensure_watermark(self, name: str = DAILY_BALANCE) -> None:
+        """
+        Create empty watermark if it does not exist yet
+
+        args:
+            name: name of snapshot
+        """
+        if await self.session.get(SnapshotWatermark, name) is not None:
+            return
+        self.session.add(SnapshotWatermark(name=name))
+        try:
+            await self.session.commit()
+        except IntegrityError:
+            # created by other worker
+            await self.session.rollback()
+
+    async def get_watermark(
+        self, name: str = DAILY_BALANCE, lock: bool = False
+    ) -> Optional[SnapshotWatermark]:
+        """
+        Take watermark, with lock - SELECT ... FOR UPDATE SKIP LOCKED,
+        None when other worker is refreshing snapshots
+
+        args:
+            name: name of snapshot
+            lock: lock watermark until end of transaction
+        """
+        query = select(SnapshotWatermark).where(SnapshotWatermark.name == name)
+        if lock:
+            query = query.with_for_update(skip_locked=True)
+        result = await self.session.execute(
+            query.execution_options(populate_existing=True)
+        )
+        return result.scalars().first()
+
+    async def get_latest(
+        self, account_id: UUID, before: Optional[date] = None
+    ) -> Optional[DailyBalanceSnapshot]:
+        """
+        Take last snapshot of account
+
+        args:
+            account_id: UUID account
+            before: take last snapshot before this day
+        """
+        query = select(DailyBalanceSnapshot).where(
+            DailyBalanceSnapshot.account_id == account_id
+        )
+        if before is not None:
+            query = query.where(DailyBalanceSnapshot.day < before)
+        result = await self.session.execute(
+            query.order_by(DailyBalanceSnapshot.day.desc()).limit(1)
+        )
+        return result.scalars().first()
+
+    async def get_latest_many(
+        self, account_ids: Iterable[UUID]
+    ) -> dict[UUID, DailyBalanceSnapshot]:
+        """
+        Take last snapshot of every account
+
+        args:
+            account_ids: UUIDs accounts
+        """
+        account_ids = list(set(account_ids))
+        if not account_ids:
+            return {}
+
+        last_days = (
+            select(
+                DailyBalanceSnapshot.account_id,
+                func.max(DailyBalanceSnapshot.day),
+            )
+            .where(DailyBalanceSnapshot.account_id.in_(account_ids))
+            .group_by(DailyBalanceSnapshot.account_id)
+        )
+        result = await self.session.execute(
+            select(DailyBalanceSnapshot).where(
+                tuple_(DailyBalanceSnapshot.account_id, DailyBalanceSnapshot.day).in_(
+                    last_days
+                )
+            )
+        )
+        return {s.account_id: s for s in result.scalars().all()}
+
+    async def sum_days(
+        self, account_id: UUID, day_from: date, day_to: Optional[date] = None
+    ) -> tuple[float, float]:
+        """
+        Take (credits, debits) of account from snapshots of days
+
+        args:
+            account_id: UUID account
+            day_from: first day
+            day_to: day after last day, None - up to last snapshot
+        """
+        query = select(
+            func.coalesce(func.sum(DailyBalanceSnapshot.credits), 0.0),
+            func.coalesce(func.sum(DailyBalanceSnapshot.debits), 0.0),
+        ).where(
+            DailyBalanceSnapshot.account_id == account_id,
+            DailyBalanceSnapshot.day >= day_from,
+        )
+        if day_to is not None:
+            query = query.where(DailyBalanceSnapshot.day < day_to)
+
+        credits, debits = (await self.session.execute(query)).one()
+        return credits, debits
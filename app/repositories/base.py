@@ -1,12 +1,92 @@
+import base64
+import binascii
+import json
 from abc import ABC, abstractmethod
-from typing import Generic, List, Optional, Type, TypeVar
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Generic, List, Optional, Sequence, Type, TypeVar
+from uuid import uuid4
 
-from sqlalchemy import select
+from sqlalchemy import (
+    column,
+    exc,
+    func,
+    inspect,
+    literal,
+    literal_column,
+    select,
+    table,
+    text,
+    tuple_,
+)
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Result
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Executable
+
+from app.core.cache_backend import get_cache_backend
+from app.core.exceptions import InvalidCursorException
+from app.db.session import get_replica_router
 
 ModelType = TypeVar("ModelType")
 
 
+def encode_cursor(created_at: datetime, primary_key: Any) -> str:
+    """Make opaque cursor from position (created_at, primary key)"""
+    raw = json.dumps([created_at.isoformat(), str(primary_key)])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, str]:
+    """
+    Take position (created_at, primary key) from cursor
+
+    raises:
+        InvalidCursorException if cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, primary_key = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), primary_key
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise InvalidCursorException(cursor)
+
+
+@dataclass
+class Page(Generic[ModelType]):
+    """One page of keyset pagination"""
+
+    items: List[ModelType]
+    next_cursor: Optional[str]
+
+
+@dataclass
+class BulkConflict:
+    """Input row which hit existing row"""
+
+    index: int
+    row: dict
+    primary_key: Any = None
+
+
+@dataclass
+class BulkResult:
+    """
+    Result of bulk write
+
+    inserted: primary keys of new rows
+    conflicts: rows which hit existing row (skipped by create_many,
+        updated by upsert_many)
+    """
+
+    inserted: List[Any] = field(default_factory=list)
+    conflicts: List[BulkConflict] = field(default_factory=list)
+
+
+# postgres accept at most 32767 bind parameters in one statement
+MAX_BIND_PARAMS = 32767
+
+
 class BaseRepository(ABC, Generic[ModelType]):
     """
     Base repository for all models, need for default CRUD operations
@@ -16,6 +96,24 @@ class BaseRepository(ABC, Generic[ModelType]):
         self.session = session
         self.model = model
 
+    async def _read(self, statement: Executable) -> Result:
+        """
+        Execute read only statement on replica (round robin), primary is used
+        when no replica is configured or healthy, replica fails to connect,
+        or session already wrote something in this request
+        """
+        replica = get_replica_router().engine_for_read(self.session)
+        if replica is None:
+            return await self.session.execute(statement)
+
+        try:
+            return await self.session.execute(
+                statement, bind_arguments={"bind": replica.sync_engine}
+            )
+        except (exc.OperationalError, exc.InterfaceError, OSError):
+            get_replica_router().mark_down(replica)
+            return await self.session.execute(statement)
+
     async def create(self, obj_in: dict) -> ModelType:
         """
         Create new post in DB
@@ -29,18 +127,233 @@ class BaseRepository(ABC, Generic[ModelType]):
         await self.session.flush()
         return db_obj
 
+    def _fill_defaults(self, rows: Sequence[dict]) -> List[dict]:
+        """
+        Apply python side column defaults (uuid4, constants), so primary
+        keys are known before insert. SQL defaults like now() stay for DB,
+        all rows must have same keys
+        """
+        columns = [
+            c
+            for c in self.model.__table__.columns
+            if c.default is not None and not c.default.is_clause_element
+        ]
+        filled = []
+        for row in rows:
+            row = dict(row)
+            for c in columns:
+                if row.get(c.key) is None:
+                    row[c.key] = (
+                        c.default.arg(None) if c.default.is_callable else c.default.arg
+                    )
+            filled.append(row)
+        return filled
+
+    def _insert(self):
+        """dialect insert construct with ON CONFLICT support"""
+        if self.session.bind.dialect.name == "sqlite":
+            return sqlite.insert(self.model.__table__)
+        return postgresql.insert(self.model.__table__)
+
+    def _chunk_size(self, rows: Sequence[dict], chunk_size: int) -> int:
+        width = max(len(rows[0]), 1) if rows else 1
+        return max(1, min(chunk_size, MAX_BIND_PARAMS // width))
+
+    async def create_many(
+        self,
+        rows: Sequence[dict],
+        conflict_target: Optional[Sequence[str]] = None,
+        chunk_size: int = 1000,
+        copy_threshold: Optional[int] = 10_000,
+    ) -> BulkResult:
+        """
+        Create many posts with multi-row INSERT ... ON CONFLICT DO NOTHING RETURNING,
+        rows which conflict with existing ones are skipped and reported
+
+        args:
+            rows: dicts with data for create
+            conflict_target: unique columns for conflict check (default primary key)
+            chunk_size: rows per statement
+            copy_threshold: batches from that size go through asyncpg COPY
+                (postgres only, None - never)
+        """
+        primary_key = inspect(self.model).primary_key[0]
+        target = list(conflict_target or [primary_key.key])
+        rows = self._fill_defaults(rows)
+        result = BulkResult()
+
+        use_copy = (
+            copy_threshold is not None
+            and len(rows) >= copy_threshold
+            and self.session.bind.dialect.driver == "asyncpg"
+        )
+        size = len(rows) if use_copy else self._chunk_size(rows, chunk_size)
+
+        for start in range(0, len(rows), size):
+            chunk = rows[start : start + size]
+            if use_copy:
+                returned = await self._copy_chunk(chunk, target, primary_key)
+            else:
+                stmt = (
+                    self._insert()
+                    .values(chunk)
+                    .on_conflict_do_nothing(index_elements=target)
+                    .returning(
+                        primary_key, *[self.model.__table__.c[k] for k in target]
+                    )
+                )
+                returned = (await self.session.execute(stmt)).all()
+
+            # returned rows are new, other keys of chunk hit existing rows
+            written = {tuple(r[1:]): r[0] for r in returned}
+            for offset, row in enumerate(chunk):
+                key = tuple(row[k] for k in target)
+                if key in written:
+                    result.inserted.append(written.pop(key))
+                else:
+                    result.conflicts.append(BulkConflict(start + offset, row))
+
+        return result
+
+    async def _copy_chunk(
+        self, chunk: List[dict], target: List[str], primary_key
+    ) -> list:
+        """
+        COPY rows to temp table, then move them with single INSERT ... SELECT,
+        so conflicts still are skipped instead of failing COPY
+        """
+        source = self.model.__table__
+        staging_name = f"_bulk_{source.name}_{uuid4().hex[:8]}"
+        keys = list(chunk[0])
+
+        await self.session.execute(
+            text(
+                f'CREATE TEMP TABLE "{staging_name}" ON COMMIT DROP '
+                f'AS SELECT * FROM "{source.name}" WITH NO DATA'
+            )
+        )
+
+        # COPY skip SQLAlchemy types, so values go through bind processors
+        dialect = self.session.bind.dialect
+        processors = [source.c[k].type.bind_processor(dialect) for k in keys]
+        records = [
+            tuple(
+                proc(row[k]) if proc and row[k] is not None else row[k]
+                for k, proc in zip(keys, processors)
+            )
+            for row in chunk
+        ]
+        connection = await self.session.connection()
+        raw = await connection.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            staging_name, records=records, columns=keys
+        )
+
+        # SQL defaults (now()) are applied while moving from staging table
+        staging = table(staging_name, *[column(c.name) for c in source.columns])
+        values = []
+        for c in source.columns:
+            if c.default is not None and c.default.is_clause_element:
+                values.append(func.coalesce(staging.c[c.name], c.default.arg))
+            else:
+                values.append(staging.c[c.name])
+
+        stmt = (
+            postgresql.insert(source)
+            .from_select([c.name for c in source.columns], select(*values))
+            .on_conflict_do_nothing(index_elements=target)
+            .returning(primary_key, *[source.c[k] for k in target])
+        )
+        returned = (await self.session.execute(stmt)).all()
+        await self.session.execute(text(f'DROP TABLE "{staging_name}"'))
+        return returned
+
+    async def upsert_many(
+        self,
+        rows: Sequence[dict],
+        conflict_target: Sequence[str],
+        update_columns: Optional[Sequence[str]] = None,
+        chunk_size: int = 1000,
+    ) -> BulkResult:
+        """
+        Create or update many posts with INSERT ... ON CONFLICT DO UPDATE RETURNING,
+        rows which updated existing posts are reported as conflicts
+
+        args:
+            rows: dicts with data
+            conflict_target: unique columns for conflict check
+            update_columns: columns to overwrite on conflict (default all given,
+                except conflict target and primary key)
+            chunk_size: rows per statement
+        """
+        source = self.model.__table__
+        primary_key = inspect(self.model).primary_key[0]
+        target = list(conflict_target)
+        result = BulkResult()
+
+        if not rows:
+            return result
+
+        # defaults are not given values, they must not overwrite existing posts
+        if update_columns is None:
+            update_columns = [
+                k for k in rows[0] if k not in target and k != primary_key.key
+            ]
+        rows = self._fill_defaults(rows)
+
+        # postgres: xmax = 0 only for freshly inserted row
+        if self.session.bind.dialect.name == "postgresql":
+            is_new = literal_column("xmax = 0")
+        else:
+            is_new = literal(True)
+
+        size = self._chunk_size(rows, chunk_size)
+        for start in range(0, len(rows), size):
+            chunk = rows[start : start + size]
+
+            # one statement can not update same row twice, last row wins
+            latest = {}
+            for offset, row in enumerate(chunk):
+                key = tuple(row[k] for k in target)
+                if key in latest:
+                    result.conflicts.append(
+                        BulkConflict(start + latest[key], chunk[latest[key]])
+                    )
+                latest[key] = offset
+            unique = [chunk[offset] for offset in latest.values()]
+
+            stmt = self._insert().values(unique)
+            set_ = {k: stmt.excluded[k] for k in update_columns}
+            if "updated_at" in source.c and "updated_at" not in set_:
+                set_["updated_at"] = func.now()
+            stmt = stmt.on_conflict_do_update(
+                index_elements=target, set_=set_
+            ).returning(primary_key, is_new, *[source.c[k] for k in target])
+            returned = {
+                tuple(r[2:]): (r[0], r[1])
+                for r in (await self.session.execute(stmt)).all()
+            }
+
+            for key, offset in latest.items():
+                written_key, inserted = returned[key]
+                if inserted:
+                    result.inserted.append(written_key)
+                else:
+                    result.conflicts.append(
+                        BulkConflict(start + offset, chunk[offset], written_key)
+                    )
+
+        return result
+
     async def get_by_id(self, obj_id: int) -> Optional[ModelType]:
         """
         Take object from id
 
         args:
-            obj_od: object id
+            obj_od: object id (primary key)
         """
 
-        result = await self.session.execute(
-            select(self.model).where(self.model.id == obj_id)
-        )
-        return result.scalars().first()
+        return await self.session.get(self.model, obj_id)
 
     async def get_all(self, skip: int = 0, limit: int = 10) -> List[ModelType]:
         """
@@ -50,11 +363,58 @@ class BaseRepository(ABC, Generic[ModelType]):
             skip: how many posts for skip
             limit: max count posts
         """
-        result = await self.session.execute(
-            select(self.model).offset(skip).limit(limit)
-        )
+        result = await self._read(select(self.model).offset(skip).limit(limit))
         return result.scalars().all()
 
+    async def get_page(
+        self,
+        *filters,
+        cursor: Optional[str] = None,
+        limit: int = 10,
+        descending: bool = False,
+    ) -> Page[ModelType]:
+        """
+        Take objects with keyset pagination ordered by (created_at, primary key),
+        unlike OFFSET cost of page does not depend on page number
+
+        args:
+            filters: extra where clauses
+            cursor: next_cursor from previous page, None for first page
+            limit: max count posts
+            descending: newest first
+        """
+        primary_key = inspect(self.model).primary_key[0]
+        created_at = self.model.created_at
+        position = tuple_(created_at, primary_key)
+
+        query = select(self.model).where(*filters)
+
+        if cursor:
+            cursor_created_at, cursor_key = decode_cursor(cursor)
+            try:
+                cursor_key = primary_key.type.python_type(cursor_key)
+            except (TypeError, ValueError):
+                raise InvalidCursorException(cursor)
+            after = tuple_(cursor_created_at, cursor_key)
+            query = query.where(position < after if descending else position > after)
+
+        if descending:
+            query = query.order_by(created_at.desc(), primary_key.desc())
+        else:
+            query = query.order_by(created_at, primary_key)
+
+        # one extra row tells there is next page
+        result = await self._read(query.limit(limit + 1))
+        items = list(result.scalars().all())
+
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            last = items[-1]
+            next_cursor = encode_cursor(last.created_at, getattr(last, primary_key.key))
+
+        return Page(items=items, next_cursor=next_cursor)
+
     async def update(self, obj_id: any, obj_in: dict) -> Optional[ModelType]:
         """
         Update existing post
@@ -67,7 +427,7 @@ class BaseRepository(ABC, Generic[ModelType]):
         if not db_obj:
             return None
 
-        for key, value in db_obj.items():
+        for key, value in obj_in.items():
             if value is not None:
                 setattr(db_obj, key, value)
 
@@ -81,7 +441,7 @@ class BaseRepository(ABC, Generic[ModelType]):
         args:
             obj_id: ID object
         """
-        db_obj = self.get_by_id(obj_id)
+        db_obj = await self.get_by_id(obj_id)
         if not db_obj:
             return False
 
@@ -89,10 +449,25 @@ class BaseRepository(ABC, Generic[ModelType]):
         await self.session.flush()
         return True
 
+    async def _invalidate(self, *keys: str) -> None:
+        """
+        Drop cache entries now and once more after commit, concurrent
+        request could read old row and put it back before commit
+
+        args:
+            keys: cache keys
+        """
+        await get_cache_backend().delete(*keys)
+        self.session.info.setdefault("cache_invalidate", set()).update(keys)
+
     async def commit(self):
         """commit changes for db"""
         await self.session.commit()
+        keys = self.session.info.pop("cache_invalidate", None)
+        if keys:
+            await get_cache_backend().delete(*keys)
 
     async def rollback(self):
         """back changes on db"""
         await self.session.rollback()
+        self.session.info.pop("cache_invalidate", None)
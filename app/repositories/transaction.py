@@ -0,0 +1,332 @@
+from datetime import datetime
+from typing import AsyncIterator, Optional, Sequence
+from uuid import UUID
+
+from sqlalchemy import (
+    Date,
+    Row,
+    Select,
+    case,
+    func,
+    literal,
+    or_,
+    select,
+    tuple_,
+    union_all,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.exceptions import InvalidCursorException
+from app.models.transaction import Transaction, TransactionType
+from app.repositories.base import BaseRepository, Page, decode_cursor, encode_cursor
+from app.schemas.transaction import StatementFilter
+
+# columns of export, order is order of CSV columns
+EXPORT_COLUMNS = (
+    "transaction_id",
+    "created_at",
+    "transaction_type",
+    "status",
+    "from_account_id",
+    "to_account_id",
+    "amount",
+    "currency",
+    "reference_number",
+    "description",
+)
+
+
+class TransactionRepository(BaseRepository[Transaction]):
+    """Repository for work with transactions"""
+
+    def __init__(self, session: AsyncSession):
+        super().__init__(session, Transaction)
+
+    async def get_by_transaction_id(
+        self, transaction_id: UUID
+    ) -> Optional[Transaction]:
+        """
+        Take transaction by UUID
+
+        args:
+            transaction_id: UUID transaction
+        """
+        result = await self._read(
+            select(Transaction).where(Transaction.transaction_id == transaction_id)
+        )
+        return result.scalars().first()
+
+    async def stream_for_account(
+        self, account_id: UUID, fetch_size: int = 2000
+    ) -> AsyncIterator[Sequence[Row]]:
+        """
+        Stream all transactions of account (sent and received) in batches
+        of plain rows through server side cursor, no ORM objects are built
+
+        args:
+            account_id: UUID account
+            fetch_size: rows per fetch from cursor
+        """
+        table = Transaction.__table__
+        statement = (
+            select(*(table.c[name] for name in EXPORT_COLUMNS))
+            .where(
+                or_(
+                    table.c.from_account_id == account_id,
+                    table.c.to_account_id == account_id,
+                )
+            )
+            .order_by(table.c.created_at, table.c.transaction_id)
+            .execution_options(yield_per=fetch_size)
+        )
+
+        connection = await self.session.connection()
+        result = await connection.stream(statement)
+        async for rows in result.partitions():
+            yield rows
+
+    def statement_query(
+        self,
+        account_id: UUID,
+        filters: StatementFilter,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+    ) -> Select:
+        """
+        Query of account statement, newest first. Sent and received
+        transactions are taken by own (account, created_at) index with LIMIT,
+        then merged, so query never sorts whole history of account
+
+        args:
+            account_id: UUID account
+            filters: type, status, date range and amount
+            cursor: next_cursor from previous page
+            limit: page size
+        """
+        conditions = []
+        if filters.transaction_type is not None:
+            conditions.append(Transaction.transaction_type == filters.transaction_type)
+        if filters.status is not None:
+            conditions.append(Transaction.status == filters.status)
+        if filters.date_from is not None:
+            conditions.append(Transaction.created_at >= filters.date_from)
+        if filters.date_to is not None:
+            conditions.append(Transaction.created_at < filters.date_to)
+        if filters.amount_min is not None:
+            conditions.append(Transaction.amount >= filters.amount_min)
+        if filters.amount_max is not None:
+            conditions.append(Transaction.amount <= filters.amount_max)
+
+        if cursor:
+            created_at, transaction_id = decode_cursor(cursor)
+            try:
+                transaction_id = UUID(transaction_id)
+            except ValueError:
+                raise InvalidCursorException(cursor)
+            conditions.append(
+                tuple_(Transaction.created_at, Transaction.transaction_id)
+                < tuple_(created_at, transaction_id)
+            )
+
+        def branch(account_column):
+            latest = (
+                select(Transaction.transaction_id, Transaction.created_at)
+                .where(account_column == account_id, *conditions)
+                .order_by(
+                    Transaction.created_at.desc(), Transaction.transaction_id.desc()
+                )
+                .limit(limit + 1)
+                .subquery()
+            )
+            return select(latest.c.transaction_id, latest.c.created_at)
+
+        latest = union_all(
+            branch(Transaction.from_account_id), branch(Transaction.to_account_id)
+        ).subquery()
+
+        return (
+            select(Transaction)
+            .join(latest, Transaction.transaction_id == latest.c.transaction_id)
+            .order_by(latest.c.created_at.desc(), latest.c.transaction_id.desc())
+            .limit(limit + 1)
+        )
+
+    async def get_statement(
+        self,
+        account_id: UUID,
+        filters: StatementFilter,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+    ) -> Page[Transaction]:
+        """
+        Take page of account statement with keyset pagination
+
+        args:
+            account_id: UUID account
+            filters: type, status, date range and amount
+            cursor: next_cursor from previous page
+            limit: page size
+        """
+        result = await self._read(
+            self.statement_query(account_id, filters, cursor, limit)
+        )
+        items = list(result.scalars().all())
+
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            next_cursor = encode_cursor(items[-1].created_at, items[-1].transaction_id)
+
+        return Page(items=items, next_cursor=next_cursor)
+
+    async def get_completed_batch_end(
+        self,
+        after: Optional[tuple[datetime, UUID]],
+        before: datetime,
+        limit: int,
+    ) -> Optional[Row]:
+        """
+        Take last (completed_at, transaction_id) and size of next batch of
+        completed transactions in order of completion
+
+        args:
+            after: last processed (completed_at, transaction_id), None - from start
+            before: transactions completed from this time are not taken
+            limit: max size of batch
+        """
+        position = tuple_(Transaction.completed_at, Transaction.transaction_id)
+        conditions = [
+            Transaction.completed_at.isnot(None),
+            Transaction.completed_at < before,
+        ]
+        if after is not None:
+            conditions.append(position > tuple_(*after))
+
+        batch = (
+            select(Transaction.completed_at, Transaction.transaction_id)
+            .where(*conditions)
+            .order_by(Transaction.completed_at, Transaction.transaction_id)
+            .limit(limit)
+            .subquery()
+        )
+        result = await self.session.execute(
+            select(
+                batch.c.completed_at,
+                batch.c.transaction_id,
+                func.count().over().label("size"),
+            )
+            .order_by(batch.c.completed_at.desc(), batch.c.transaction_id.desc())
+            .limit(1)
+        )
+        return result.first()
+
+    async def get_daily_totals(
+        self,
+        after: Optional[tuple[datetime, UUID]],
+        until: tuple[datetime, UUID],
+    ) -> Sequence[Row]:
+        """
+        Take credits and debits of every account by day of completion for
+        transactions completed in (after, until], ordered by account and day.
+        Deposit credits from_account, other types debit from_account and
+        credit to_account
+
+        args:
+            after: last processed (completed_at, transaction_id), None - from start
+            until: last (completed_at, transaction_id) of batch
+        """
+        position = tuple_(Transaction.completed_at, Transaction.transaction_id)
+        conditions = [Transaction.completed_at.isnot(None), position <= tuple_(*until)]
+        if after is not None:
+            conditions.append(position > tuple_(*after))
+
+        batch = (
+            select(
+                Transaction.from_account_id,
+                Transaction.to_account_id,
+                Transaction.transaction_type,
+                Transaction.amount,
+                func.date(Transaction.completed_at, type_=Date).label("day"),
+            )
+            .where(*conditions)
+            .subquery()
+        )
+        is_deposit = batch.c.transaction_type == TransactionType.DEPOSIT
+        legs = union_all(
+            select(
+                batch.c.from_account_id.label("account_id"),
+                batch.c.day,
+                case((is_deposit, batch.c.amount), else_=0.0).label("credit"),
+                case((is_deposit, 0.0), else_=batch.c.amount).label("debit"),
+            ),
+            select(
+                batch.c.to_account_id,
+                batch.c.day,
+                batch.c.amount,
+                literal(0.0),
+            ).where(batch.c.to_account_id.isnot(None), ~is_deposit),
+        ).subquery()
+
+        result = await self.session.execute(
+            select(
+                legs.c.account_id,
+                legs.c.day,
+                func.sum(legs.c.credit).label("credits"),
+                func.sum(legs.c.debit).label("debits"),
+            )
+            .group_by(legs.c.account_id, legs.c.day)
+            .order_by(legs.c.account_id, legs.c.day)
+        )
+        return result.all()
+
+    async def get_account_flows(
+        self,
+        account_id: UUID,
+        end: datetime,
+        start: Optional[datetime] = None,
+        after: Optional[tuple[datetime, UUID]] = None,
+    ) -> tuple[float, float]:
+        """
+        Take (credits, debits) of account for transactions completed
+        before end, sent and received are read by own index
+
+        args:
+            account_id: UUID account
+            end: transactions completed from this time are not taken
+            start: take transactions completed from this time
+            after: take transactions after (completed_at, transaction_id)
+        """
+        position = tuple_(Transaction.completed_at, Transaction.transaction_id)
+        conditions = [
+            Transaction.completed_at.isnot(None),
+            Transaction.completed_at < end,
+        ]
+        if start is not None:
+            conditions.append(Transaction.completed_at >= start)
+        if after is not None:
+            conditions.append(position > tuple_(*after))
+
+        is_deposit = Transaction.transaction_type == TransactionType.DEPOSIT
+        sent = (
+            select(
+                func.coalesce(
+                    func.sum(case((is_deposit, Transaction.amount), else_=0.0)), 0.0
+                ).label("credits"),
+                func.coalesce(
+                    func.sum(case((is_deposit, 0.0), else_=Transaction.amount)), 0.0
+                ).label("debits"),
+            )
+            .where(Transaction.from_account_id == account_id, *conditions)
+            .subquery()
+        )
+        received = (
+            select(func.coalesce(func.sum(Transaction.amount), 0.0))
+            .where(Transaction.to_account_id == account_id, ~is_deposit, *conditions)
+            .scalar_subquery()
+        )
+
+        result = await self.session.execute(
+            select(sent.c.credits + received, sent.c.debits)
+        )
+        credits, debits = result.one()
+        return credits, debits
@@ -1,11 +1,38 @@
-from typing import Optional
+from typing import Optional, Sequence
 from uuid import UUID
 
-from sqlalchemy import select
+from sqlalchemy import inspect, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
 
+from app.config import settings
+from app.core.cache import ExpiringLRUCache
+from app.core.cache_backend import ModelCodec, cached
+from app.core.profile_claims import profile_versions
 from app.models.user import User
-from app.repositories.base import BaseRepository
+from app.repositories.base import BaseRepository, BulkResult, Page
+
+# active users for authenticated requests, invalidated by UserRepository writes
+principal_cache: ExpiringLRUCache[UUID, User] = ExpiringLRUCache(
+    maxsize=settings.security.principal_cache_size,
+    ttl=settings.security.principal_cache_ttl_seconds,
+)
+
+# users in shared cache backend, invalidated by UserRepository writes,
+# password hash is never written to cache (users from it have None)
+user_codec: ModelCodec[User] = ModelCodec(User, exclude=("password_hash",))
+
+# key in session.info, user_id -> active, published after commit
+PROFILE_CHANGES_KEY = "profile_changes"
+
+
+def _detached_copy(user: User) -> User:
+    """copy loaded user, so cached object is not bound to request session"""
+    copy = User(
+        **{attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs}
+    )
+    make_transient_to_detached(copy)
+    return copy
 
 
 class UserRepository(BaseRepository[User]):
@@ -16,24 +43,106 @@ class UserRepository(BaseRepository[User]):
 
     async def get_by_email(self, email: str) -> Optional[User]:
         """
-        Receives the user by email
+        Receives the user by email with password hash, for login (not cached)
 
         args:
             email: user email
         """
-        result = await self.session.execute(select(User).where(User.email == email))
+        result = await self._read(select(User).where(User.email == email))
         return result.scalars().first()
 
+    @cached("user.by_id", user_codec)
     async def get_by_user_id(self, user_id: UUID) -> Optional[User]:
         """
-        Take user by UUID
+        Take user by UUID (cached without password hash, user is detached
+        from session)
 
         args:
             user_id: UUID user
         """
-        result = await self.session.execute(select(User).where(User.user_id == user_id))
+        result = await self._read(select(User).where(User.user_id == user_id))
         return result.scalars().first()
 
+    async def get_active_principal(self, user_id: UUID) -> Optional[User]:
+        """
+        Take active user for authenticated request, cached for
+        PRINCIPAL_CACHE_TTL_SECONDS. Miss reads DB, not shared cache (entries
+        of memory backend live CACHE_TTL_SECONDS in every worker), so
+        deactivation is seen within principal ttl
+
+        args:
+            user_id: UUID user
+
+        returns:
+            None if user is missing or deactivated
+        """
+        user = principal_cache.get(user_id)
+        if user is not None:
+            return user
+
+        result = await self._read(select(User).where(User.user_id == user_id))
+        user = result.scalars().first()
+        if user is None or not user.is_active:
+            return None
+        principal_cache.set(user_id, _detached_copy(user))
+        return user
+
+    async def _invalidate_user(self, user_id: UUID) -> None:
+        principal_cache.delete(user_id)
+        await self._invalidate(UserRepository.get_by_user_id.key(user_id))
+
+    def _profile_changed(self, user_id: UUID, active: bool = True) -> None:
+        """profile snapshots in tokens of user are outdated after commit"""
+        if settings.security.profile_claims_enabled:
+            self.session.info.setdefault(PROFILE_CHANGES_KEY, {})[str(user_id)] = active
+
+    async def commit(self):
+        await super().commit()
+        changes = self.session.info.pop(PROFILE_CHANGES_KEY, None)
+        for user_id, active in (changes or {}).items():
+            await profile_versions.publish(user_id, active)
+
+    async def rollback(self):
+        await super().rollback()
+        self.session.info.pop(PROFILE_CHANGES_KEY, None)
+
+    async def create(self, obj_in: dict) -> User:
+        user = await super().create(obj_in)
+        await self._invalidate_user(user.user_id)
+        return user
+
+    async def update(self, obj_id: UUID, obj_in: dict) -> Optional[User]:
+        user = await super().update(obj_id, obj_in)
+        if user is not None:
+            await self._invalidate_user(obj_id)
+            self._profile_changed(obj_id, user.is_active)
+        return user
+
+    async def delete(self, obj_id: UUID) -> bool:
+        deleted = await super().delete(obj_id)
+        if deleted:
+            await self._invalidate_user(obj_id)
+            self._profile_changed(obj_id, active=False)
+        return deleted
+
+    async def upsert_many(
+        self,
+        rows: Sequence[dict],
+        conflict_target: Sequence[str] = ("email",),
+        update_columns: Optional[Sequence[str]] = None,
+        chunk_size: int = 1000,
+    ) -> BulkResult:
+        result = await super().upsert_many(
+            rows, conflict_target, update_columns, chunk_size
+        )
+        for conflict in result.conflicts:
+            if conflict.primary_key is not None:
+                await self._invalidate_user(conflict.primary_key)
+                self._profile_changed(
+                    conflict.primary_key, conflict.row.get("is_active", True)
+                )
+        return result
+
     async def get_activate_users(self, skip: int = 0, limit: int = 10) -> list[User]:
         """
         Get only active users
@@ -42,11 +151,23 @@ class UserRepository(BaseRepository[User]):
             skip: number of entries to skip
             limit: maximum number of entires
         """
-        result = await self.session.execute(
+        result = await self._read(
             select(User).where(User.is_active == True).offset(skip).limit(limit)
         )
         return result.scalars().all()
 
+    async def get_active_users_page(
+        self, cursor: Optional[str] = None, limit: int = 10
+    ) -> Page[User]:
+        """
+        Get only active users with keyset pagination
+
+        args:
+            cursor: next_cursor from previous page
+            limit: maximum number of entires
+        """
+        return await self.get_page(User.is_active == True, cursor=cursor, limit=limit)
+
     async def user_exists(self, email: str) -> bool:
         """
         Check what user exists with that email
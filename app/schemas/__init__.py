@@ -1,8 +1,53 @@
-from app.schemas.user import UserCreate, UserLogin, UserResponse, UserUpdate
+from app.schemas.account import (
+    AccountBalance,
+    BalanceAsOf,
+    BalancePeriod,
+    BalanceSlotsUpdate,
+    BalanceSummary,
+)
+from app.schemas.internal import CacheLookupStatus, CacheStatus, PoolStatus
+from app.schemas.transaction import (
+    StatementFilter,
+    StatementPage,
+    TransactionResponse,
+    TransferCreate,
+)
+from app.schemas.user import (
+    RefreshRequest,
+    TokenPair,
+    TokenResponse,
+    UserCreate,
+    UserImportConflict,
+    UserImportError,
+    UserImportResult,
+    UserLogin,
+    UserPage,
+    UserResponse,
+    UserUpdate,
+)
 
 __all__ = [
+    "AccountBalance",
+    "BalanceAsOf",
+    "BalancePeriod",
+    "BalanceSlotsUpdate",
+    "BalanceSummary",
+    "CacheLookupStatus",
+    "CacheStatus",
+    "PoolStatus",
+    "RefreshRequest",
+    "StatementFilter",
+    "StatementPage",
+    "TokenPair",
+    "TokenResponse",
+    "TransactionResponse",
+    "TransferCreate",
     "UserCreate",
+    "UserImportConflict",
+    "UserImportError",
+    "UserImportResult",
     "UserLogin",
+    "UserPage",
     "UserResponse",
     "UserUpdate",
 ]
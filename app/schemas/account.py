@@ -0,0 +1,54 @@
+from datetime import date, datetime
+from uuid import UUID
+
+from pydantic import BaseModel, Field, model_validator
+
+
+class AccountBalance(BaseModel):
+    """Schema for response with account balance"""
+
+    account_id: UUID
+    balance: float
+    currency: str
+    balance_slots: int
+
+
+class BalanceSlotsUpdate(BaseModel):
+    """Schema for enabling balance sharding of hot account"""
+
+    slots: int = Field(..., ge=0, le=256, description="0 - disable sharding")
+
+
+class BalanceAsOf(BaseModel):
+    """Schema for response with account balance at moment in past"""
+
+    account_id: UUID
+    at: datetime
+    balance: float
+    currency: str
+
+
+class BalancePeriod(BaseModel):
+    """Days of balance summary, both days are included"""
+
+    date_from: date
+    date_to: date
+
+    @model_validator(mode="after")
+    def check_order(self) -> "BalancePeriod":
+        if self.date_to < self.date_from:
+            raise ValueError("date_to must not be before date_from")
+        return self
+
+
+class BalanceSummary(BaseModel):
+    """Schema for response with balance summary of period (monthly statement)"""
+
+    account_id: UUID
+    date_from: date
+    date_to: date
+    opening: float
+    credits: float
+    debits: float
+    closing: float
+    currency: str
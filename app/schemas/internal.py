@@ -0,0 +1,31 @@
+from pydantic import BaseModel
+
+
+class PoolStatus(BaseModel):
+    """Schema for DB connection pool state"""
+
+    size: int
+    checked_out: int
+    idle: int
+    overflow: int
+    max_overflow: int
+    checkouts: int
+    timeouts: int
+    avg_wait_ms: float
+    max_wait_ms: float
+
+
+class CacheLookupStatus(BaseModel):
+    """Schema for counters of one cached lookup"""
+
+    hits: int
+    misses: int
+    hit_rate: float
+
+
+class CacheStatus(BaseModel):
+    """Schema for shared cache state of this worker"""
+
+    backend: str
+    errors: int
+    lookups: dict[str, CacheLookupStatus]
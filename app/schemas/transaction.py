@@ -0,0 +1,52 @@
+from datetime import datetime
+from uuid import UUID
+
+from pydantic import BaseModel, Field
+
+from app.models.transaction import TransactionStatus, TransactionType
+
+
+class TransferCreate(BaseModel):
+    """Schema for transfer between accounts"""
+
+    from_account_id: UUID
+    to_account_id: UUID
+    amount: float = Field(..., gt=0)
+    description: str | None = Field(None, max_length=500)
+    reference_number: str | None = Field(None, max_length=50)
+
+
+class TransactionResponse(BaseModel):
+    """Schema for response with transaction data"""
+
+    transaction_id: UUID
+    from_account_id: UUID
+    to_account_id: UUID | None
+    transaction_type: TransactionType
+    amount: float
+    currency: str
+    status: TransactionStatus
+    description: str | None
+    reference_number: str | None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class StatementFilter(BaseModel):
+    """Filters of account statement"""
+
+    transaction_type: TransactionType | None = None
+    status: TransactionStatus | None = None
+    date_from: datetime | None = None
+    date_to: datetime | None = None
+    amount_min: float | None = Field(None, ge=0)
+    amount_max: float | None = Field(None, ge=0)
+
+
+class StatementPage(BaseModel):
+    """Schema for page of account statement, newest first"""
+
+    items: list[TransactionResponse]
+    next_cursor: str | None = None
@@ -28,6 +28,9 @@ class UserUpdate(BaseModel):
 class UserResponse(UserBase):
     """Schema for response with user data"""
 
+    # email is validated on write, responses built from ORM skip
+    # email-validator (it is most of the cost of model_validate)
+    email: str = Field(..., json_schema_extra={"format": "email"})
     user_id: UUID
     is_active: bool
     is_verified: bool
@@ -38,8 +41,79 @@ class UserResponse(UserBase):
         from_attributes = True
 
 
+class TokenResponse(UserResponse):
+    """Response with token after login"""
+
+    access_token: str
+    # None when session store is unavailable, client logs in again
+    refresh_token: str | None = None
+    token_type: str = "bearer"
+
+    @classmethod
+    def for_user(
+        cls, user: UserResponse, access_token: str, refresh_token: str | None = None
+    ) -> "TokenResponse":
+        """
+        Response of login from already validated user, without validation
+
+        args:
+            user: user response
+            access_token: JWT token
+            refresh_token: refresh token of new session
+        """
+        return cls.model_construct(
+            _fields_set=user.model_fields_set | {"access_token", "refresh_token"},
+            **dict(user),
+            access_token=access_token,
+            refresh_token=refresh_token,
+        )
+
+
+class RefreshRequest(BaseModel):
+    """Schema for refresh and logout"""
+
+    refresh_token: str = Field(..., min_length=1, max_length=255)
+
+
+class TokenPair(BaseModel):
+    """Schema for response of refresh, old refresh token is not valid anymore"""
+
+    access_token: str
+    refresh_token: str
+    token_type: str = "bearer"
+
+
 class UserLogin(BaseModel):
     """Schema for login"""
 
     email: EmailStr
     password: str
+
+
+class UserPage(BaseModel):
+    """Schema for page of users"""
+
+    items: list[UserResponse]
+    next_cursor: str | None = None
+
+
+class UserImportConflict(BaseModel):
+    """Line of import with email which already exists"""
+
+    line: int
+    email: EmailStr
+
+
+class UserImportError(BaseModel):
+    """Line of import which is not valid user"""
+
+    line: int
+    detail: str
+
+
+class UserImportResult(BaseModel):
+    """Schema for result of bulk user import"""
+
+    inserted: int = 0
+    conflicts: list[UserImportConflict] = []
+    errors: list[UserImportError] = []
@@ -1,5 +1,9 @@
+from app.services.account import AccountService
+from app.services.transaction import TransactionService
 from app.services.user import UserService
 
 __all__ = [
+    "AccountService",
+    "TransactionService",
     "UserService",
 ]
@@ -0,0 +1,189 @@
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.exceptions import ResourceNotFoundException
+from app.models.account import Account
+from app.repositories.account import AccountRepository
+from app.repositories.transaction import TransactionRepository
+from app.schemas.account import (
+    AccountBalance,
+    BalanceAsOf,
+    BalancePeriod,
+    BalanceSummary,
+)
+from app.services.balance_snapshot import BalanceSnapshotService
+from app.schemas.transaction import (
+    StatementFilter,
+    StatementPage,
+    TransactionResponse,
+)
+
+
+class AccountService:
+    """Service for work with bank accounts"""
+
+    def __init__(self, session: AsyncSession):
+        self.repository = AccountRepository(session)
+        self.session = session
+
+    async def get_own_account(self, user_id: UUID, account_id: UUID) -> Account:
+        """
+        Take account of user
+
+        args:
+            user_id: UUID owner
+            account_id: UUID account
+        """
+        account = await self.repository.get_by_account_id(account_id)
+
+        # foreign account looks same as missing one
+        if account is None or account.user_id != user_id:
+            raise ResourceNotFoundException("Account", account_id)
+
+        return account
+
+    async def get_balance(self, user_id: UUID, account_id: UUID) -> AccountBalance:
+        """
+        Take balance, for hot account it is sum of all slots
+
+        args:
+            user_id: UUID owner
+            account_id: UUID account
+        """
+        account = await self.get_own_account(user_id, account_id)
+
+        balance = account.balance
+        if account.balance_slots:
+            balance = await self.repository.sum_slots(account_id)
+
+        return AccountBalance(
+            account_id=account.account_id,
+            balance=balance,
+            currency=account.currency,
+            balance_slots=account.balance_slots,
+        )
+
+    async def get_balance_as_of(
+        self, user_id: UUID, account_id: UUID, at: datetime
+    ) -> BalanceAsOf:
+        """
+        Take balance at moment in past from daily snapshots
+
+        args:
+            user_id: UUID owner
+            account_id: UUID account
+            at: moment, transactions completed before it are counted
+        """
+        account = await self.get_own_account(user_id, account_id)
+
+        balance = await BalanceSnapshotService(self.session).get_balance_at(
+            account_id, at
+        )
+
+        return BalanceAsOf(
+            account_id=account.account_id,
+            at=at,
+            balance=balance,
+            currency=account.currency,
+        )
+
+    async def get_balance_summary(
+        self, user_id: UUID, account_id: UUID, period: BalancePeriod
+    ) -> BalanceSummary:
+        """
+        Take opening, closing, credits and debits for days from daily snapshots
+
+        args:
+            user_id: UUID owner
+            account_id: UUID account
+            period: first and last day
+        """
+        account = await self.get_own_account(user_id, account_id)
+
+        opening, credits, debits, closing = await BalanceSnapshotService(
+            self.session
+        ).get_period(account_id, period.date_from, period.date_to)
+
+        return BalanceSummary(
+            account_id=account.account_id,
+            date_from=period.date_from,
+            date_to=period.date_to,
+            opening=opening,
+            credits=credits,
+            debits=debits,
+            closing=closing,
+            currency=account.currency,
+        )
+
+    async def get_statement(
+        self,
+        user_id: UUID,
+        account_id: UUID,
+        filters: StatementFilter,
+        cursor: str | None = None,
+        limit: int = 50,
+    ) -> StatementPage:
+        """
+        Take page of statement of own account, newest first
+
+        args:
+            user_id: UUID owner
+            account_id: UUID account
+            filters: type, status, date range and amount
+            cursor: next_cursor from previous page
+            limit: page size
+        """
+        await self.get_own_account(user_id, account_id)
+
+        page = await TransactionRepository(self.session).get_statement(
+            account_id, filters, cursor=cursor, limit=limit
+        )
+
+        return StatementPage(
+            items=[TransactionResponse.model_validate(t) for t in page.items],
+            next_cursor=page.next_cursor,
+        )
+
+    async def set_balance_slots(
+        self, user_id: UUID, account_id: UUID, slots: int
+    ) -> AccountBalance:
+        """
+        Split balance of hot account to slots (0 - collect it back to account row),
+        concurrent credits to hot account lock only one random slot
+
+        args:
+            user_id: UUID owner
+            account_id: UUID account
+            slots: count of slots
+        """
+        await self.get_own_account(user_id, account_id)
+
+        # row lock waits for transfers which credit account without slots
+        account = (await self.repository.lock_many([account_id]))[account_id]
+
+        balance = account.balance
+        if account.balance_slots:
+            locked = await self.repository.lock_slots(account_id)
+            balance = sum(slot.balance for slot in locked)
+            await self.repository.delete_slots(account_id)
+
+        if slots:
+            # whole balance to first slot, debits drain largest slots first
+            await self.repository.create_slots(
+                account_id, [balance] + [0.0] * (slots - 1)
+            )
+            account.balance = 0.0
+        else:
+            account.balance = balance
+        account.balance_slots = slots
+
+        await self.repository.commit()
+
+        return AccountBalance(
+            account_id=account.account_id,
+            balance=balance,
+            currency=account.currency,
+            balance_slots=account.balance_slots,
+        )
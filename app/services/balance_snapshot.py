@@ -0,0 +1,205 @@
+import asyncio
+import logging
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import SnapshotSettings, settings
+from app.db.session import async_session_maker
+from app.models.balance_snapshot import SnapshotWatermark
+from app.repositories.balance_snapshot import BalanceSnapshotRepository
+from app.repositories.transaction import TransactionRepository
+
+logger = logging.getLogger(__name__)
+
+
+def _position(watermark: Optional[SnapshotWatermark]) -> Optional[tuple]:
+    """(completed_at, transaction_id) of last transaction in snapshots"""
+    if watermark is None or watermark.completed_at is None:
+        return None
+    return watermark.completed_at, watermark.transaction_id
+
+
+def _naive(moment: datetime) -> datetime:
+    """DB keeps naive UTC time"""
+    if moment.tzinfo is None:
+        return moment
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+class BalanceSnapshotService:
+    """
+    Service for daily balance snapshots. Snapshots hold balance which is
+    built from completed transactions, balance at any moment is last
+    snapshot before it plus transactions of one day (or transactions after
+    watermark, when refresher is behind)
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.repository = BalanceSnapshotRepository(session)
+        self.transactions = TransactionRepository(session)
+        self.session = session
+
+    async def refresh(self, batch_size: int, settle_seconds: float) -> int:
+        """
+        Add next batch of completed transactions to snapshots and move
+        watermark in same DB transaction, returns count of processed
+        transactions (0 - nothing to do or other worker is refreshing)
+
+        args:
+            batch_size: max count of transactions
+            settle_seconds: transactions completed last seconds are not taken
+        """
+        watermark = await self.repository.get_watermark(lock=True)
+        if watermark is None:
+            await self.session.rollback()
+            return 0
+
+        after = _position(watermark)
+        before = await self.repository.get_db_time() - timedelta(seconds=settle_seconds)
+        end = await self.transactions.get_completed_batch_end(after, before, batch_size)
+        if end is None:
+            await self.session.rollback()
+            return 0
+
+        until = (end.completed_at, end.transaction_id)
+        totals = await self.transactions.get_daily_totals(after, until)
+
+        # completions are processed in order, so days of batch are never
+        # before last snapshot of account, only last snapshot can change
+        previous = {
+            account_id: {
+                "account_id": snapshot.account_id,
+                "day": snapshot.day,
+                "opening": snapshot.opening,
+                "credits": snapshot.credits,
+                "debits": snapshot.debits,
+                "closing": snapshot.closing,
+            }
+            for account_id, snapshot in (
+                await self.repository.get_latest_many(t.account_id for t in totals)
+            ).items()
+        }
+        rows = []
+        for total in totals:
+            last = previous.get(total.account_id)
+            if last is not None and last["day"] == total.day:
+                row = dict(
+                    last,
+                    credits=last["credits"] + total.credits,
+                    debits=last["debits"] + total.debits,
+                )
+            else:
+                row = {
+                    "account_id": total.account_id,
+                    "day": total.day,
+                    "opening": last["closing"] if last is not None else 0.0,
+                    "credits": total.credits,
+                    "debits": total.debits,
+                }
+            row["closing"] = row["opening"] + row["credits"] - row["debits"]
+            previous[total.account_id] = row
+            rows.append(row)
+
+        await self.repository.upsert_many(rows, conflict_target=("account_id", "day"))
+        watermark.completed_at, watermark.transaction_id = until
+        await self.session.commit()
+
+        return end.size
+
+    async def _balance_at(
+        self, account_id: UUID, at: datetime, processed: Optional[tuple]
+    ) -> float:
+        day_start = datetime.combine(at.date(), time.min)
+        if processed is not None and day_start <= processed[0]:
+            # days before are complete in snapshots
+            last = await self.repository.get_latest(account_id, before=at.date())
+            credits, debits = 0.0, 0.0
+            if at > day_start:
+                credits, debits = await self.transactions.get_account_flows(
+                    account_id, at, start=day_start
+                )
+        else:
+            # refresher is behind, last snapshot is state at watermark
+            last = await self.repository.get_latest(account_id)
+            credits, debits = await self.transactions.get_account_flows(
+                account_id, at, after=processed
+            )
+
+        opening = last.closing if last is not None else 0.0
+        return opening + credits - debits
+
+    async def get_balance_at(self, account_id: UUID, at: datetime) -> float:
+        """
+        Take balance of account by transactions completed before moment
+
+        args:
+            account_id: UUID account
+            at: moment
+        """
+        watermark = await self.repository.get_watermark()
+        return await self._balance_at(account_id, _naive(at), _position(watermark))
+
+    async def get_period(
+        self, account_id: UUID, date_from: date, date_to: date
+    ) -> tuple[float, float, float, float]:
+        """
+        Take (opening, credits, debits, closing) of account for days
+
+        args:
+            account_id: UUID account
+            date_from: first day
+            date_to: last day (included)
+        """
+        watermark = await self.repository.get_watermark()
+        processed = _position(watermark)
+        start = datetime.combine(date_from, time.min)
+        end = datetime.combine(date_to + timedelta(days=1), time.min)
+
+        opening = await self._balance_at(account_id, start, processed)
+
+        if processed is not None and end <= processed[0]:
+            credits, debits = await self.repository.sum_days(
+                account_id, date_from, end.date()
+            )
+        else:
+            credits, debits = await self.repository.sum_days(account_id, date_from)
+            tail_credits, tail_debits = await self.transactions.get_account_flows(
+                account_id, end, start=start, after=processed
+            )
+            credits += tail_credits
+            debits += tail_debits
+
+        return opening, credits, debits, opening + credits - debits
+
+    @staticmethod
+    async def run_refresher(config: Optional[SnapshotSettings] = None) -> None:
+        """
+        Refresh snapshots forever, every worker can run it, watermark lock
+        lets only one of them work at time
+
+        args:
+            config: snapshot settings, default - from env
+        """
+        config = config or settings.snapshots
+        while True:
+            try:
+                async with async_session_maker() as session:
+                    service = BalanceSnapshotService(session)
+                    await service.repository.ensure_watermark()
+                    # backlog is processed in batches without sleep
+                    while (
+                        await service.refresh(
+                            config.refresh_batch_size, config.settle_seconds
+                        )
+                        >= config.refresh_batch_size
+                    ):
+                        pass
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("balance snapshot refresh failed")
+
+            await asyncio.sleep(config.refresh_interval_seconds)
@@ -0,0 +1,259 @@
+import asyncio
+import csv
+import io
+import json
+import random
+from datetime import datetime
+from enum import Enum
+from typing import AsyncIterator, Literal
+from uuid import UUID
+
+from sqlalchemy import func
+from sqlalchemy.exc import DBAPIError, IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.exceptions import (
+    InsufficientFundsException,
+    InvalidTransactionException,
+    ResourceNotFoundException,
+)
+from app.db.session import replica_session_maker
+from app.models.account import Account, AccountBalanceSlot, AccountStatus
+from app.models.transaction import Transaction, TransactionStatus, TransactionType
+from app.repositories.account import AccountRepository
+from app.repositories.transaction import EXPORT_COLUMNS, TransactionRepository
+from app.schemas.transaction import TransactionResponse, TransferCreate
+
+# deadlock_detected, transfers run in READ COMMITTED, so postgres does not
+# report serialization failures (40001) for them
+RETRYABLE_SQLSTATES = {"40P01"}
+# unique constraint of transaction.reference_number (postgres default name)
+REFERENCE_NUMBER_CONSTRAINT = "transaction_reference_number_key"
+
+
+def _sqlstate(error: DBAPIError) -> str | None:
+    """SQLSTATE code of driver error (asyncpg keep it on original exception)"""
+    for candidate in (error.orig, getattr(error.orig, "__cause__", None)):
+        code = getattr(candidate, "sqlstate", None)
+        if code:
+            return code
+    return None
+
+
+def _constraint_name(error: DBAPIError) -> str | None:
+    """violated constraint, psycopg keeps it in diag, asyncpg on exception"""
+    for candidate in (error.orig, getattr(error.orig, "__cause__", None)):
+        name = getattr(getattr(candidate, "diag", None), "constraint_name", None)
+        name = name or getattr(candidate, "constraint_name", None)
+        if name:
+            return name
+    return None
+
+
+ExportFormat = Literal["csv", "ndjson"]
+
+
+def _plain(value):
+    """value of DB row to JSON/CSV friendly value"""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+class TransactionService:
+    """Service for moving money between accounts"""
+
+    # attempts after first one on deadlock
+    max_retries = 3
+    retry_backoff = 0.02
+
+    def __init__(self, session: AsyncSession):
+        self.accounts = AccountRepository(session)
+        self.repository = TransactionRepository(session)
+        self.session = session
+
+    async def transfer(
+        self, user_id: UUID, transfer: TransferCreate
+    ) -> TransactionResponse:
+        """
+        Transfer money between accounts in one DB transaction,
+        retried when postgres reports deadlock
+
+        args:
+            user_id: UUID owner of source account
+            transfer: schema with accounts and amount
+        """
+        if transfer.from_account_id == transfer.to_account_id:
+            raise InvalidTransactionException("source and destination are same")
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                transaction = await self._transfer_once(user_id, transfer)
+                await self.repository.commit()
+                return TransactionResponse.model_validate(transaction)
+            except IntegrityError as e:
+                await self.repository.rollback()
+                if _constraint_name(e) == REFERENCE_NUMBER_CONSTRAINT:
+                    raise InvalidTransactionException("reference number already used")
+                raise
+            except DBAPIError as e:
+                await self.repository.rollback()
+                if (
+                    _sqlstate(e) not in RETRYABLE_SQLSTATES
+                    or attempt == self.max_retries
+                ):
+                    raise
+                # jitter, so retried transfers do not collide again
+                await asyncio.sleep(self.retry_backoff * 2**attempt * random.random())
+            except Exception:
+                await self.repository.rollback()
+                raise
+
+    @staticmethod
+    async def export(
+        account_id: UUID, export_format: ExportFormat, fetch_size: int = 2000
+    ) -> AsyncIterator[bytes]:
+        """
+        Export all transactions of account as CSV or NDJSON chunks,
+        rows are streamed from server side cursor with own read only session,
+        so memory does not depend on size of history
+
+        args:
+            account_id: UUID account (ownership must be checked by caller)
+            export_format: csv or ndjson
+            fetch_size: rows per chunk
+        """
+        async with replica_session_maker() as session:
+            repository = TransactionRepository(session)
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+
+            if export_format == "csv":
+                writer.writerow(EXPORT_COLUMNS)
+
+            async for rows in repository.stream_for_account(account_id, fetch_size):
+                if export_format == "csv":
+                    writer.writerows(
+                        ["" if v is None else _plain(v) for v in row] for row in rows
+                    )
+                else:
+                    for row in rows:
+                        buffer.write(
+                            json.dumps(dict(zip(EXPORT_COLUMNS, map(_plain, row))))
+                        )
+                        buffer.write("\n")
+
+                yield buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate()
+
+            if buffer.tell():
+                yield buffer.getvalue().encode()
+
+    async def _transfer_once(
+        self, user_id: UUID, transfer: TransferCreate
+    ) -> Transaction:
+        accounts = await self.accounts.get_many(
+            [transfer.from_account_id, transfer.to_account_id]
+        )
+        source = accounts.get(transfer.from_account_id)
+        destination = accounts.get(transfer.to_account_id)
+
+        # foreign account looks same as missing one
+        if source is None or source.user_id != user_id:
+            raise ResourceNotFoundException("Account", transfer.from_account_id)
+        if destination is None:
+            raise ResourceNotFoundException("Account", transfer.to_account_id)
+
+        if source.status != AccountStatus.ACTIVE:
+            raise InvalidTransactionException("source account is not active")
+        if destination.status != AccountStatus.ACTIVE:
+            raise InvalidTransactionException("destination account is not active")
+        if source.currency != destination.currency:
+            raise InvalidTransactionException("accounts have different currency")
+
+        # locks are taken in order of account_id, so transfers can not deadlock,
+        # failed balance check rollbacks credit which was already done
+        source_slots = None
+        for account in sorted((source, destination), key=lambda a: a.account_id):
+            if account is source:
+                source_slots = await self._lock_for_debit(source)
+            else:
+                await self._credit(destination, transfer.amount)
+
+        if source_slots is None:
+            available = source.balance
+        else:
+            available = sum(slot.balance for slot in source_slots)
+        if available < transfer.amount:
+            raise InsufficientFundsException(available, transfer.amount)
+
+        self._debit(source, source_slots, transfer.amount)
+
+        return await self.repository.create(
+            {
+                "from_account_id": source.account_id,
+                "to_account_id": destination.account_id,
+                "transaction_type": TransactionType.TRANSFER,
+                "amount": transfer.amount,
+                "currency": source.currency,
+                "status": TransactionStatus.COMPLETED,
+                "completed_at": func.now(),
+                "description": transfer.description,
+                "reference_number": transfer.reference_number,
+            }
+        )
+
+    async def _lock_for_debit(
+        self, account: Account
+    ) -> list[AccountBalanceSlot] | None:
+        """
+        lock balance of account, returns locked slots for hot account.
+        slots are locked without row lock, set_balance_slots which commits
+        meanwhile deletes them (fewer or no slots are locked), then row lock
+        waits for it, account is read again and its slots are locked again
+        """
+        if account.balance_slots:
+            slots = await self.accounts.lock_slots(account.account_id)
+            if len(slots) == account.balance_slots:
+                return slots
+
+        await self.accounts.lock_many([account.account_id])
+        # sharding could be enabled or disabled while waiting for row lock
+        if account.balance_slots:
+            return await self.accounts.lock_slots(account.account_id)
+        return None
+
+    async def _credit(self, account: Account, amount: float) -> None:
+        """add amount, hot account is credited to random slot without row lock"""
+        if account.balance_slots:
+            slot = random.randrange(account.balance_slots)
+            if await self.accounts.credit_slot(account.account_id, slot, amount):
+                return
+
+        # row lock also waits for enabling or disabling of sharding
+        await self.accounts.lock_many([account.account_id])
+        if account.balance_slots:
+            await self.accounts.credit_slot(account.account_id, 0, amount)
+        else:
+            account.balance += amount
+
+    @staticmethod
+    def _debit(
+        account: Account, slots: list[AccountBalanceSlot] | None, amount: float
+    ) -> None:
+        """take amount, hot account is drained from largest slots first"""
+        if slots is None:
+            account.balance -= amount
+            return
+
+        for slot in sorted(slots, key=lambda s: s.balance, reverse=True):
+            taken = min(slot.balance, amount)
+            slot.balance -= taken
+            amount -= taken
+            if amount <= 0:
+                break
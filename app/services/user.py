@@ -1,17 +1,53 @@
-from datetime import timedelta
+import asyncio
+from typing import AsyncIterator
 from uuid import UUID
 
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
 from app.core.exceptions import (
     InvalidCredentialsException,
+    InvalidRefreshTokenException,
     ResourceNotFoundException,
+    ServiceOverloadedException,
     UserAlreadyExistsException,
 )
 from app.core.security import PasswordManager, TokenManager
+from app.core.sessions import Rotation, get_session_store, revoked_sessions
 from app.models.user import User
 from app.repositories.user import UserRepository
-from app.schemas.user import UserCreate, UserLogin, UserResponse
+from app.schemas.user import (
+    UserCreate,
+    UserImportConflict,
+    UserImportError,
+    UserImportResult,
+    UserLogin,
+    UserPage,
+    UserResponse,
+)
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, bytes]]:
+    """Split stream of bytes to numbered lines (from 1)"""
+    buffer = b""
+    number = 0
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            number += 1
+            yield number, line
+    if buffer:
+        yield number + 1, buffer
+
+
+def validation_detail(error: ValidationError) -> str:
+    """Fields and messages of error without input values (they hold passwords)"""
+    return "; ".join(
+        f"{'.'.join(map(str, item['loc'])) or 'line'}: {item['msg']}"
+        for item in error.errors(include_input=False, include_url=False)
+    )
 
 
 class UserService:
@@ -32,7 +68,7 @@ class UserService:
         if await self.repository.user_exists(user_create.email):
             raise UserAlreadyExistsException(user_create.email)
 
-        password_hash = PasswordManager.hash_password(user_create.password)
+        password_hash = await PasswordManager.hash_password_async(user_create.password)
 
         # create user
         user = await self.repository.create(
@@ -50,27 +86,125 @@ class UserService:
 
     async def authenticate_user(
         self, user_login: UserLogin
-    ) -> tuple[UserResponse, str]:
+    ) -> tuple[UserResponse, str, str | None]:
         """
-        Authenticate user and return access token
+        Authenticate user and start refresh session
 
         args:
             user_login: schema with email and password
+
+        returns:
+            user, access token and refresh token (None if session store
+            is unavailable)
         """
         user = await self.repository.get_by_email(user_login.email)
 
-        if not user or not PasswordManager.verify_password(
+        if not user or not await PasswordManager.verify_password_async(
             user_login.password,
             user.password_hash,
         ):
             raise InvalidCredentialsException()
 
-        access_token = TokenManager.create_access_token(
-            data={"sub": str(user.user_id)},
-            expires_delta=timedelta(minutes=30),
+        user_response = UserResponse.model_validate(user)
+
+        refresh_token, session_id, secret_hash = TokenManager.create_refresh_token()
+        try:
+            await get_session_store().create(
+                session_id, str(user.user_id), secret_hash, self._session_ttl()
+            )
+        except ServiceOverloadedException:
+            # login works without refresh token while session store is down
+            refresh_token = session_id = None
+
+        access_token = self._create_access_token(user_response, session_id)
+
+        return user_response, access_token, refresh_token
+
+    @staticmethod
+    def _session_ttl() -> float:
+        return settings.sessions.refresh_token_expire_days * 24 * 3600
+
+    @staticmethod
+    def _create_access_token(user: UserResponse, session_id: str | None) -> str:
+        """access token for ACCESS_TOKEN_EXPIRE_MINUTES, "sid" - refresh session"""
+        data = {"sub": str(user.user_id)}
+        if session_id is not None:
+            data["sid"] = session_id
+
+        profile = None
+        if settings.security.profile_claims_enabled:
+            profile = user.model_dump(mode="json")
+
+        return TokenManager.create_access_token(data=data, profile=profile)
+
+    @staticmethod
+    async def _end_session(session_id: str) -> None:
+        """refresh token stops working, access tokens are rejected after sync"""
+        revoked_at = await get_session_store().revoke(
+            session_id, revoked_sessions.retention
         )
+        revoked_sessions.add(session_id, revoked_at)
+
+    async def refresh_tokens(self, refresh_token: str) -> tuple[str, str]:
+        """
+        Rotate refresh token and issue new access token, without password
 
-        return UserResponse.model_validate(user), access_token
+        args:
+            refresh_token: current refresh token of session
+
+        returns:
+            access token and new refresh token
+
+        raises:
+            InvalidRefreshTokenException if token is unknown, expired or
+            was already used (session is ended then), or user is inactive
+        """
+        parsed = TokenManager.parse_refresh_token(refresh_token)
+        if parsed is None:
+            raise InvalidRefreshTokenException()
+        session_id, secret_hash = parsed
+
+        new_refresh_token, _, new_secret_hash = TokenManager.create_refresh_token(
+            session_id
+        )
+        rotation, user_id = await get_session_store().rotate(
+            session_id, secret_hash, new_secret_hash, self._session_ttl()
+        )
+        if rotation is Rotation.REUSED:
+            # used token came again, it is stolen or replayed: session is
+            # ended for both holders
+            await self._end_session(session_id)
+        if rotation is not Rotation.ROTATED:
+            raise InvalidRefreshTokenException()
+
+        user = await self.repository.get_active_principal(UUID(user_id))
+        if user is None or not user.is_active:
+            await self._end_session(session_id)
+            raise InvalidRefreshTokenException()
+
+        access_token = self._create_access_token(
+            UserResponse.model_validate(user), session_id
+        )
+        return access_token, new_refresh_token
+
+    async def logout(self, refresh_token: str) -> None:
+        """
+        End session of refresh token, unknown or expired token is ignored
+
+        args:
+            refresh_token: refresh token of session
+        """
+        parsed = TokenManager.parse_refresh_token(refresh_token)
+        if parsed is None:
+            return
+        session_id, secret_hash = parsed
+
+        # same hash: only check that caller has the secret
+        rotation, _ = await get_session_store().rotate(
+            session_id, secret_hash, secret_hash, self._session_ttl()
+        )
+        if rotation is not Rotation.MISSING:
+            await self._end_session(session_id)
 
     async def get_user_by_id(self, user_id: UUID) -> UserResponse:
         """
@@ -79,13 +213,27 @@ class UserService:
         args:
             user_id: UUID user
         """
-        user = await self.repository.get_user_by_id(user_id)
+        user = await self.repository.get_by_user_id(user_id)
 
         if not user:
             raise ResourceNotFoundException("User", user_id)
 
         return UserResponse.model_validate(user)
 
+    async def get_current_principal(self, user_id: UUID) -> User:
+        """
+        Take active user for authenticated request with single (cached) query
+
+        args:
+            user_id: UUID user
+        """
+        user = await self.repository.get_active_principal(user_id)
+
+        if not user:
+            raise ResourceNotFoundException("User", user_id)
+
+        return user
+
     async def get_user_profile(self, user_id: UUID) -> UserResponse:
         """
         Take current user profile
@@ -94,3 +242,87 @@ class UserService:
             user_id: UUID user
         """
         return await self.get_user_by_id(user_id)
+
+    async def list_active_users(
+        self, cursor: str | None = None, limit: int = 10
+    ) -> UserPage:
+        """
+        Take page of active users
+
+        args:
+            cursor: next_cursor from previous page
+            limit: page size
+        """
+        page = await self.repository.get_active_users_page(cursor=cursor, limit=limit)
+
+        return UserPage(
+            items=[UserResponse.model_validate(user) for user in page.items],
+            next_cursor=page.next_cursor,
+        )
+
+    async def import_users(
+        self, chunks: AsyncIterator[bytes], batch_size: int = 1000
+    ) -> UserImportResult:
+        """
+        Register users from NDJSON stream (one UserCreate per line),
+        passwords of batch are hashed in parallel, batch is inserted
+        with single statement and committed
+
+        args:
+            chunks: request body stream
+            batch_size: users per insert and commit
+        """
+        result = UserImportResult()
+        batch: list[tuple[int, UserCreate]] = []
+
+        async for number, line in iter_lines(chunks):
+            if not line.strip():
+                continue
+
+            try:
+                batch.append((number, UserCreate.model_validate_json(line)))
+            except ValidationError as e:
+                result.errors.append(
+                    UserImportError(line=number, detail=validation_detail(e))
+                )
+                continue
+
+            if len(batch) >= batch_size:
+                await self._import_batch(batch, result)
+                batch = []
+
+        if batch:
+            await self._import_batch(batch, result)
+
+        return result
+
+    async def _import_batch(
+        self, batch: list[tuple[int, UserCreate]], result: UserImportResult
+    ) -> None:
+        # batch waits for free hashing slots instead of rejecting, pool runs
+        # at most HASH_POOL_BATCH_SLOTS of them, login / register keep the rest
+        password_hashes = await asyncio.gather(
+            *(
+                PasswordManager.hash_password_async(user.password, wait=True)
+                for _, user in batch
+            )
+        )
+
+        bulk = await self.repository.create_many(
+            [
+                {
+                    "email": user.email,
+                    "first_name": user.first_name,
+                    "last_name": user.last_name,
+                    "password_hash": password_hash,
+                }
+                for (_, user), password_hash in zip(batch, password_hashes)
+            ],
+            conflict_target=["email"],
+        )
+        await self.repository.commit()
+
+        result.inserted += len(bulk.inserted)
+        for conflict in bulk.conflicts:
+            number, user = batch[conflict.index]
+            result.conflicts.append(UserImportConflict(line=number, email=user.email))
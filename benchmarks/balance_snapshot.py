@@ -0,0 +1,192 @@
+"""
+Benchmark balance as of date: daily snapshots vs full recomputation
+(needs postgres from .env, migrations at head)
+
+Seeds completed transactions of few accounts spread over many days, brings
+snapshots up to date with refresher, then compares latency of balance at
+random moments and of monthly summary with recomputation from all
+transactions of account
+
+usage:
+    python -m benchmarks.balance_snapshot --rows 2000000 --days 730
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from datetime import date, datetime, timedelta
+from uuid import uuid4
+
+from sqlalchemy import select, text
+
+from app.db.session import async_session_maker, engine
+from app.models.account import Account
+from app.models.user import User
+from app.repositories.transaction import TransactionRepository
+from app.services.balance_snapshot import BalanceSnapshotService
+
+SEED_SQL = text("""
+    INSERT INTO transaction (
+        transaction_id, from_account_id, to_account_id, transaction_type,
+        amount, currency, status, description, created_at, updated_at,
+        completed_at
+    )
+    SELECT
+        gen_random_uuid(),
+        ids[1 + (n % array_length(ids, 1))],
+        CASE WHEN n % 5 = 0 THEN NULL
+            ELSE ids[1 + ((n * 7 + 1) % array_length(ids, 1))] END,
+        (CASE WHEN n % 5 = 0 THEN 'DEPOSIT' ELSE 'TRANSFER' END)::transactiontype,
+        (n % 1000) + 1, 'USD', 'COMPLETED', 'benchmark',
+        ts, ts, ts
+    FROM generate_series(:start, :stop) AS n,
+        LATERAL (SELECT localtimestamp - :span * (n::float / :rows) AS ts) AS t,
+        (SELECT array_agg(account_id) AS ids FROM accounts
+         WHERE account_number LIKE :accounts) AS a
+    """)
+
+
+async def seed(rows: int, accounts: int, days: int) -> list:
+    async with async_session_maker() as session:
+        user = User(
+            email=f"bench-snapshot-{uuid4().hex[:12]}@example.com",
+            first_name="Bench",
+            last_name="Snapshot",
+            password_hash="not-a-hash",
+        )
+        session.add(user)
+        await session.flush()
+        prefix = f"bench-bs-{uuid4().hex[:6]}"
+        session.add_all(
+            Account(user_id=user.user_id, account_number=f"{prefix}-{i}")
+            for i in range(accounts)
+        )
+        await session.commit()
+
+        account_ids = list(
+            await session.scalars(
+                select(Account.account_id).where(
+                    Account.account_number.like(f"{prefix}-%")
+                )
+            )
+        )
+        for start in range(1, rows + 1, 1_000_000):
+            stop = min(start + 999_999, rows)
+            await session.execute(
+                SEED_SQL,
+                {
+                    "start": start,
+                    "stop": stop,
+                    "rows": rows,
+                    "span": timedelta(days=days),
+                    "accounts": f"{prefix}-%",
+                },
+            )
+            await session.commit()
+            print(f"seeded {stop} rows")
+
+        await session.execute(text("ANALYZE transaction"))
+        await session.commit()
+    return account_ids
+
+
+async def catch_up(batch_size: int) -> tuple[int, float]:
+    started = time.perf_counter()
+    processed = 0
+    async with async_session_maker() as session:
+        service = BalanceSnapshotService(session)
+        await service.repository.ensure_watermark()
+        while True:
+            count = await service.refresh(batch_size, settle_seconds=0)
+            processed += count
+            if count < batch_size:
+                break
+    return processed, time.perf_counter() - started
+
+
+async def measure(func_, arguments: list) -> tuple[float, list]:
+    samples = []
+    values = []
+    for args in arguments:
+        started = time.perf_counter()
+        values.append(await func_(*args))
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), values
+
+
+async def main(rows: int, accounts: int, days: int, samples: int, batch: int):
+    account_ids = await seed(rows, accounts, days)
+
+    processed, elapsed = await catch_up(batch)
+    print(f"refresher: {processed} transactions in {elapsed:.1f} s")
+
+    now = datetime.now()
+    moments = [
+        (
+            random.choice(account_ids),
+            now - timedelta(seconds=random.uniform(0, days * 86400)),
+        )
+        for _ in range(samples)
+    ]
+    months = []
+    for _ in range(samples):
+        first = (now - timedelta(days=random.uniform(30, days))).date().replace(day=1)
+        last = (first + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+        months.append((random.choice(account_ids), first, last))
+
+    async with async_session_maker() as session:
+        service = BalanceSnapshotService(session)
+        transactions = TransactionRepository(session)
+
+        async def snapshot_balance(account_id, at):
+            return await service.get_balance_at(account_id, at)
+
+        async def full_balance(account_id, at):
+            credits, debits = await transactions.get_account_flows(account_id, at)
+            return credits - debits
+
+        async def snapshot_month(account_id, first: date, last: date):
+            return (await service.get_period(account_id, first, last))[3]
+
+        async def full_month(account_id, first: date, last: date):
+            end = datetime.combine(last + timedelta(days=1), datetime.min.time())
+            return await full_balance(account_id, end)
+
+        results = {}
+        for name, func_, arguments in (
+            ("as of: snapshots", snapshot_balance, moments),
+            ("as of: recompute", full_balance, moments),
+            ("month: snapshots", snapshot_month, months),
+            ("month: recompute", full_month, months),
+        ):
+            results[name] = await measure(func_, arguments)
+
+    await engine.dispose()
+
+    for fast, slow in (
+        ("as of: snapshots", "as of: recompute"),
+        ("month: snapshots", "month: recompute"),
+    ):
+        mismatched = sum(
+            abs(a - b) > 1e-6 * max(1.0, abs(b))
+            for a, b in zip(results[fast][1], results[slow][1])
+        )
+        if mismatched:
+            print(f"{fast}: {mismatched} results differ from recomputation")
+
+    for name, (latency, _) in results.items():
+        print(f"{name:<20}{latency:>10.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--accounts", type=int, default=20)
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--samples", type=int, default=50)
+    parser.add_argument("--batch", type=int, default=50_000)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.rows, args.accounts, args.days, args.samples, args.batch))
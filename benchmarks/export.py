@@ -0,0 +1,115 @@
+"""
+Benchmark streaming transaction export (needs postgres from .env)
+
+Seeds transactions for one account with generate_series, then consumes
+export stream, prints rows per second and peak RSS of process.
+Run with --orm in separate process to compare with loading all ORM objects.
+
+usage:
+    python -m benchmarks.export --rows 1000000 --format csv
+    python -m benchmarks.export --rows 1000000 --orm
+"""
+
+import argparse
+import asyncio
+import resource
+import time
+from uuid import uuid4
+
+from sqlalchemy import or_, select, text
+
+from app.db.session import async_session_maker, engine
+from app.models.account import Account
+from app.models.transaction import Transaction
+from app.models.user import User
+from app.services.transaction import TransactionService
+
+SEED_SQL = text("""
+    INSERT INTO transaction (
+        transaction_id, from_account_id, to_account_id, transaction_type,
+        amount, currency, status, description, created_at, updated_at
+    )
+    SELECT
+        gen_random_uuid(), :source, :destination, 'TRANSFER',
+        (n % 1000) + 1, 'USD', 'COMPLETED', 'benchmark',
+        now() - make_interval(secs => n), now()
+    FROM generate_series(1, :rows) AS n
+    """)
+
+
+async def seed(rows: int):
+    async with async_session_maker() as session:
+        user = User(
+            email=f"bench-export-{uuid4().hex[:12]}@example.com",
+            first_name="Bench",
+            last_name="Export",
+            password_hash="not-a-hash",
+        )
+        session.add(user)
+        await session.flush()
+
+        source, destination = (
+            Account(user_id=user.user_id, account_number=uuid4().hex[:20])
+            for _ in range(2)
+        )
+        session.add_all([source, destination])
+        await session.flush()
+
+        await session.execute(
+            SEED_SQL,
+            {
+                "source": source.account_id,
+                "destination": destination.account_id,
+                "rows": rows,
+            },
+        )
+        await session.commit()
+        return source.account_id
+
+
+def peak_rss_mb() -> float:
+    # linux reports kilobytes
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def main(rows: int, export_format: str, orm: bool) -> None:
+    account_id = await seed(rows)
+    rss_before = peak_rss_mb()
+
+    started = time.perf_counter()
+    if orm:
+        async with async_session_maker() as session:
+            result = await session.execute(
+                select(Transaction).where(
+                    or_(
+                        Transaction.from_account_id == account_id,
+                        Transaction.to_account_id == account_id,
+                    )
+                )
+            )
+            exported = len(result.scalars().all())
+        mode = "orm .all()"
+    else:
+        exported = 0
+        async for chunk in TransactionService.export(account_id, export_format):
+            exported += chunk.count(b"\n")
+        if export_format == "csv":
+            exported -= 1
+        mode = f"stream {export_format}"
+    elapsed = time.perf_counter() - started
+
+    await engine.dispose()
+
+    print(f"{mode}: {exported} rows in {elapsed:.2f}s")
+    print(f"rows per second: {exported / elapsed:.0f}")
+    print(f"peak RSS: {peak_rss_mb():.1f} MB (before export {rss_before:.1f} MB)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--format", choices=["csv", "ndjson"], default="csv")
+    parser.add_argument("--orm", action="store_true")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.rows, args.format, args.orm))
@@ -0,0 +1,88 @@
+"""
+Benchmark credits to one hot account with balance sharding (needs postgres from .env)
+
+Many source accounts transfer to one destination at same time,
+measured for every count of balance slots (0 - sharding disabled).
+
+usage:
+    python -m benchmarks.hot_account --credits 2000 --concurrency 32 --slots 0 4 16 64
+"""
+
+import argparse
+import asyncio
+import time
+from uuid import uuid4
+
+from app.db.session import async_session_maker, engine
+from app.models.account import Account
+from app.models.user import User
+from app.schemas.transaction import TransferCreate
+from app.services.account import AccountService
+from app.services.transaction import TransactionService
+
+
+async def create_accounts(sources: int) -> tuple:
+    async with async_session_maker() as session:
+        user = User(
+            email=f"bench-hot-{uuid4().hex[:12]}@example.com",
+            first_name="Bench",
+            last_name="Hot",
+            password_hash="not-a-hash",
+        )
+        session.add(user)
+        await session.flush()
+
+        accounts = [
+            Account(
+                user_id=user.user_id,
+                account_number=uuid4().hex[:20],
+                balance=1_000_000.0,
+            )
+            for _ in range(sources + 1)
+        ]
+        session.add_all(accounts)
+        await session.commit()
+        return user.user_id, [account.account_id for account in accounts]
+
+
+async def run(credits: int, concurrency: int, slots: int) -> float:
+    """return credits per second"""
+    user_id, account_ids = await create_accounts(concurrency)
+    hot, sources = account_ids[0], account_ids[1:]
+
+    async with async_session_maker() as session:
+        await AccountService(session).set_balance_slots(user_id, hot, slots)
+
+    counter = iter(range(credits))
+
+    async def worker(source) -> None:
+        for _ in counter:
+            async with async_session_maker() as session:
+                await TransactionService(session).transfer(
+                    user_id,
+                    TransferCreate(
+                        from_account_id=source, to_account_id=hot, amount=1.0
+                    ),
+                )
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(source) for source in sources))
+    return credits / (time.perf_counter() - started)
+
+
+async def main(credits: int, concurrency: int, slots: list[int]) -> None:
+    print(f"credits: {credits}, concurrency: {concurrency}")
+    print(f"{'slots':<10}{'credits/s':>12}")
+    for count in slots:
+        print(f"{count:<10}{await run(credits, concurrency, count):>12.1f}")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--credits", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--slots", type=int, nargs="+", default=[0, 4, 16, 64])
+    args = parser.parse_args()
+
+    asyncio.run(main(args.credits, args.concurrency, args.slots))
@@ -0,0 +1,77 @@
+"""
+Benchmark retried POST /users/register with Idempotency-Key
+(needs postgres from .env)
+
+first request hashes password and writes user, retries with same key
+get stored response from cache backend
+
+usage:
+    python -m benchmarks.idempotency --retries 200
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from uuid import uuid4
+
+import httpx
+
+from app.config import settings
+from app.db.session import engine
+from app.main import app
+
+
+async def timed(client: httpx.AsyncClient, payload: dict, key: str) -> tuple:
+    started = time.perf_counter()
+    response = await client.post(
+        f"{settings.api_v1_prefix}/users/register",
+        json=payload,
+        headers={"Idempotency-Key": key},
+    )
+    return (time.perf_counter() - started) * 1000, response
+
+
+async def main(retries: int) -> None:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        payload = {
+            "email": f"bench-idem-{uuid4().hex[:12]}@example.com",
+            "first_name": "Bench",
+            "last_name": "Idempotency",
+            "password": "bench-password-1",
+        }
+        key = str(uuid4())
+
+        first, response = await timed(client, payload, key)
+        print(f"first request: {response.status_code}, {first:.1f} ms")
+
+        samples = []
+        for _ in range(retries):
+            latency, retry = await timed(client, payload, key)
+            assert retry.status_code == response.status_code
+            assert retry.headers.get("idempotent-replayed") == "true"
+            samples.append(latency)
+
+        # same burst without key: every retry is full request (409)
+        unkeyed = []
+        for _ in range(retries):
+            started = time.perf_counter()
+            await client.post(f"{settings.api_v1_prefix}/users/register", json=payload)
+            unkeyed.append((time.perf_counter() - started) * 1000)
+
+    await engine.dispose()
+
+    print(f"backend: {settings.cache.backend}, retries: {retries}")
+    print(f"{'with key':<14}{statistics.median(samples):>10.2f} ms median")
+    print(f"{'without key':<14}{statistics.median(unkeyed):>10.2f} ms median")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--retries", type=int, default=200)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.retries))
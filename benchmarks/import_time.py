@@ -0,0 +1,112 @@
+"""
+Import time budget of app.main
+
+imports app.main in fresh interpreters with `python -X importtime`, takes
+best of runs and fails (exit code 1) when it is over --budget-ms, when
+import creates DB engine, cache backends or session store, or imports
+modules which must be lazy (redis, alembic). Prints slowest modules by
+own time
+
+usage:
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --budget-ms 1800 --runs 5 --top 20
+
+tests/test_import_time.py runs same probe under pytest
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+# imported only by backends / commands which need them
+LAZY_MODULES = ("redis", "alembic")
+# measured ~1.75-1.9 s with lazy engines and backends, ~2.0-2.3 s before
+# them, so import of them again goes over it. IMPORT_TIME_BUDGET_MS sets
+# it for slower machines
+BUDGET_MS = float(os.environ.get("IMPORT_TIME_BUDGET_MS", 2000.0))
+
+PROBE = """
+import sys
+import app.main
+import app.core.cache_backend as cache_backend
+import app.core.rate_limit as rate_limit
+import app.core.sessions as sessions
+import app.db.session as session
+
+eager = [name for name in {lazy!r} if name in sys.modules]
+if session._database is not None:
+    eager.append("DB engine")
+if cache_backend._backend is not None or rate_limit._backend is not None:
+    eager.append("cache / rate limit backend")
+if sessions._store is not None:
+    eager.append("session store")
+print(",".join(eager))
+"""
+
+
+def parse_importtime(stderr: str) -> dict[str, tuple[int, int]]:
+    """module -> (own us, cumulative us) from -X importtime output"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        own, cumulative, name = line[len("import time:") :].split("|")
+        if not own.strip().isdigit():
+            continue
+        modules[name.strip()] = (int(own), int(cumulative))
+    return modules
+
+
+def run_once() -> tuple[dict[str, tuple[int, int]], list[str]]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE.format(lazy=LAZY_MODULES)],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    eager = [name for name in result.stdout.strip().split(",") if name]
+    return parse_importtime(result.stderr), eager
+
+
+def measure(runs: int) -> tuple[float, dict[str, tuple[int, int]], list[str]]:
+    """
+    Import app.main in runs fresh interpreters
+
+    returns:
+        import time of best run (ms), its modules and what was made on import
+    """
+    results = [run_once() for _ in range(runs)]
+    modules, eager = min(results, key=lambda run: run[0]["app.main"][1])
+    return modules["app.main"][1] / 1000, modules, eager
+
+
+def main(args: argparse.Namespace) -> int:
+    total_ms, modules, eager = measure(args.runs)
+
+    print(f"{'module':<50}{'own ms':>10}{'total ms':>10}")
+    slowest = sorted(modules.items(), key=lambda item: item[1][0], reverse=True)
+    for name, (own, cumulative) in slowest[: args.top]:
+        print(f"{name:<50}{own / 1000:>10.1f}{cumulative / 1000:>10.1f}")
+    print(
+        f"\nimport app.main: {total_ms:.0f} ms (best of {args.runs}), "
+        f"budget {args.budget_ms:.0f} ms"
+    )
+
+    ok = True
+    if total_ms > args.budget_ms:
+        print(f"OVER BUDGET by {total_ms - args.budget_ms:.0f} ms")
+        ok = False
+    if eager:
+        print(f"made on import, must be lazy: {', '.join(eager)}")
+        ok = False
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--budget-ms", type=float, default=BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15)
+
+    sys.exit(main(parser.parse_args()))
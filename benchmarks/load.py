@@ -0,0 +1,337 @@
+"""
+End-to-end load test of API: register, login and /users/me mix
+
+boots app.main:app with uvicorn against local DB (postgres from .env,
+migrations at head, or fresh aiosqlite file), or drives running server
+with --target. Reports RPS and p50/p95/p99 latency per operation, saves
+results as JSON and compares them with results of previous release
+
+usage:
+    python -m benchmarks.load --db sqlite --concurrency 16 --duration 20
+    python -m benchmarks.load --db postgres --workers 4 --mix register=1,login=2,me=7
+    python -m benchmarks.load --target http://localhost:8000 --compare baseline.json
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from uuid import uuid4
+
+import httpx
+from sqlalchemy.ext.asyncio import create_async_engine
+
+import app.models  # noqa: F401  models are registered in metadata
+from app.config import settings
+from app.db.base import Base
+from benchmarks.report import compare_report, save_report
+
+API = settings.api_v1_prefix
+PASSWORD = "load-test-password"
+
+
+@dataclass
+class Account:
+    email: str
+    token: str
+
+
+@dataclass
+class LoadState:
+    """Users made in setup, shared by all virtual clients"""
+
+    accounts: list[Account] = field(default_factory=list)
+
+
+def _new_user() -> dict:
+    return {
+        "email": f"load-{uuid4().hex[:16]}@example.com",
+        "first_name": "Load",
+        "last_name": "Test",
+        "password": PASSWORD,
+    }
+
+
+async def register(client: httpx.AsyncClient, state: LoadState) -> bool:
+    response = await client.post(f"{API}/users/register", json=_new_user())
+    return response.status_code == 201
+
+
+async def login(client: httpx.AsyncClient, state: LoadState) -> bool:
+    account = random.choice(state.accounts)
+    response = await client.post(
+        f"{API}/users/login", json={"email": account.email, "password": PASSWORD}
+    )
+    return response.status_code == 200
+
+
+async def me(client: httpx.AsyncClient, state: LoadState) -> bool:
+    account = random.choice(state.accounts)
+    response = await client.get(
+        f"{API}/users/me", headers={"Authorization": f"Bearer {account.token}"}
+    )
+    return response.status_code == 200
+
+
+OPERATIONS = {
+    "register": register,
+    "login": login,
+    "me": me,
+}
+
+
+def parse_mix(value: str) -> dict[str, float]:
+    """register=1,login=2,me=7 -> weights of operations"""
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"unknown operation {name!r}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def percentile(samples: list[float], fraction: float) -> float:
+    """nearest-rank percentile of sorted samples"""
+    if not samples:
+        return 0.0
+    index = min(len(samples) - 1, max(0, round(fraction * len(samples)) - 1))
+    return samples[index]
+
+
+def summarize(samples: list[float], errors: int, elapsed: float) -> dict:
+    samples = sorted(samples)
+    count = len(samples)
+    return {
+        "requests": count,
+        "errors": errors,
+        "rps": count / elapsed if elapsed else 0.0,
+        "mean_ms": sum(samples) / count if count else 0.0,
+        "p50_ms": percentile(samples, 0.50),
+        "p95_ms": percentile(samples, 0.95),
+        "p99_ms": percentile(samples, 0.99),
+    }
+
+
+async def setup(client: httpx.AsyncClient, users: int, concurrency: int) -> LoadState:
+    """register and login users for login and /me operations"""
+    state = LoadState()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def make() -> None:
+        async with semaphore:
+            user = _new_user()
+            response = await client.post(f"{API}/users/register", json=user)
+            response.raise_for_status()
+            response = await client.post(
+                f"{API}/users/login",
+                json={"email": user["email"], "password": PASSWORD},
+            )
+            response.raise_for_status()
+            state.accounts.append(
+                Account(user["email"], response.json()["access_token"])
+            )
+
+    await asyncio.gather(*(make() for _ in range(users)))
+    return state
+
+
+async def drive(
+    client: httpx.AsyncClient,
+    state: LoadState,
+    mix: dict[str, float],
+    concurrency: int,
+    duration: float,
+) -> dict:
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    latencies: dict[str, list[float]] = {name: [] for name in names}
+    errors = dict.fromkeys(names, 0)
+    deadline = time.perf_counter() + duration
+
+    async def virtual_client() -> None:
+        while time.perf_counter() < deadline:
+            name = random.choices(names, weights)[0]
+            started = time.perf_counter()
+            try:
+                ok = await OPERATIONS[name](client, state)
+            except httpx.HTTPError:
+                ok = False
+            latencies[name].append((time.perf_counter() - started) * 1000)
+            if not ok:
+                errors[name] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(virtual_client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    results = {
+        name: summarize(latencies[name], errors[name], elapsed) for name in names
+    }
+    results["total"] = summarize(
+        [sample for name in names for sample in latencies[name]],
+        sum(errors.values()),
+        elapsed,
+    )
+    return results
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def create_sqlite_schema(url: str) -> None:
+    engine = create_async_engine(url)
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    await engine.dispose()
+
+
+def boot_server(
+    db: str, workers: int, port: int, workdir: str, extra_env: dict | None = None
+) -> subprocess.Popen:
+    """start uvicorn with app.main:app, limits which would reject load are off"""
+    env = dict(
+        os.environ,
+        DEBUG="false",
+        RATE_LIMIT_ENABLED="false",
+        SNAPSHOT_REFRESH_ENABLED="false",
+        # /metrics of server sums metrics of all workers
+        PROMETHEUS_MULTIPROC_DIR=os.path.join(workdir, "metrics"),
+        **(extra_env or {}),
+    )
+    os.mkdir(env["PROMETHEUS_MULTIPROC_DIR"])
+    if db == "sqlite":
+        url = f"sqlite+aiosqlite:///{workdir}/finflow-load.db"
+        asyncio.run(create_sqlite_schema(url))
+        env["DB_URL"] = url
+
+    return subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "app.main:app",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+            "--log-level",
+            "warning",
+            "--no-access-log",
+        ],
+        env=env,
+    )
+
+
+async def wait_ready(base_url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while True:
+            try:
+                if (await client.get("/health")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"server at {base_url} did not start")
+            await asyncio.sleep(0.2)
+
+
+async def run_load(base_url: str, args: argparse.Namespace) -> dict:
+    await wait_ready(base_url)
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(
+        base_url=base_url, limits=limits, timeout=args.timeout
+    ) as client:
+        state = await setup(client, args.users, args.concurrency)
+        if args.warmup:
+            await drive(client, state, args.mix, args.concurrency, args.warmup)
+        return await drive(client, state, args.mix, args.concurrency, args.duration)
+
+
+def print_results(results: dict) -> None:
+    print(
+        f"{'operation':<10}{'requests':>10}{'errors':>8}{'rps':>10}"
+        f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    )
+    for name, row in results.items():
+        print(
+            f"{name:<10}{row['requests']:>10}{row['errors']:>8}{row['rps']:>10.1f}"
+            f"{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}{row['p99_ms']:>10.1f}"
+        )
+
+
+def main(args: argparse.Namespace) -> int:
+    server = None
+    with tempfile.TemporaryDirectory() as workdir:
+        if args.target:
+            base_url = args.target
+        else:
+            port = _free_port()
+            base_url = f"http://127.0.0.1:{port}"
+            server = boot_server(args.db, args.workers, port, workdir)
+
+        try:
+            results = asyncio.run(run_load(base_url, args))
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait(timeout=30)
+
+    print_results(results)
+
+    save_report(
+        "load",
+        {
+            "db": "target" if args.target else args.db,
+            "workers": None if args.target else args.workers,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "users": args.users,
+            "mix": args.mix,
+        },
+        results,
+        args.output,
+    )
+
+    if args.compare and not compare_report(
+        results,
+        args.compare,
+        higher_is_better=("rps",),
+        lower_is_better=("p95_ms", "p99_ms"),
+        tolerance=args.tolerance,
+    ):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--db", choices=["sqlite", "postgres"], default="sqlite")
+    parser.add_argument("--target", help="URL of running server, nothing is booted")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds")
+    parser.add_argument("--warmup", type=float, default=3.0, help="seconds")
+    parser.add_argument("--users", type=int, default=20, help="users for login/me")
+    parser.add_argument(
+        "--mix", type=parse_mix, default=parse_mix("register=1,login=2,me=7")
+    )
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--output", help="JSON file, default benchmarks/results/")
+    parser.add_argument("--compare", help="JSON of previous run to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,172 @@
+"""
+Microbenchmarks of functions which run on every request
+
+every benchmark is warmed up, calibrated to loops which take at least
+--min-time per sample, then timed --samples times with gc off (timeit).
+Reports per call min/median/mean/stdev/p95, saves JSON and compares
+medians with report of previous release
+
+usage:
+    python -m benchmarks.micro
+    python -m benchmarks.micro --filter token --samples 30
+    python -m benchmarks.micro --compare benchmarks/results/micro-baseline.json
+"""
+
+import argparse
+import statistics
+import sys
+import time
+import timeit
+from datetime import datetime
+from typing import Callable
+from uuid import uuid4
+
+from pydantic import TypeAdapter
+
+from app.core.security import PasswordManager, TokenManager, pwd_context, token_cache
+from app.models.user import User
+from app.schemas.user import TokenResponse, UserResponse
+from benchmarks.report import compare_report, save_report
+
+PASSWORD = "micro-benchmark-password"
+
+
+def _user() -> User:
+    now = datetime.now()
+    return User(
+        user_id=uuid4(),
+        email="micro@example.com",
+        first_name="Micro",
+        last_name="Benchmark",
+        password_hash="not-a-hash",
+        is_active=True,
+        is_verified=False,
+        created_at=now,
+        updated_at=now,
+    )
+
+
+def build_benchmarks() -> dict[str, Callable[[], object]]:
+    """name -> function without arguments, state is made once here"""
+    token = TokenManager.create_access_token({"sub": str(uuid4())})
+    refresh_token, _, _ = TokenManager.create_refresh_token()
+    password_hash = PasswordManager.hash_password(PASSWORD)
+    user = _user()
+    user_response = UserResponse.model_validate(user)
+    # login route returns TokenResponse, FastAPI checks and serializes it
+    # with response_model
+    token_response = TypeAdapter(TokenResponse)
+
+    def extract_user_id_uncached():
+        token_cache.clear()
+        return TokenManager.extract_user_id_from_token(token)
+
+    def login_response():
+        content = TokenResponse.for_user(user_response, token)
+        return token_response.dump_json(token_response.validate_python(content))
+
+    return {
+        "token.create_access_token": lambda: TokenManager.create_access_token(
+            {"sub": str(user.user_id)}
+        ),
+        "token.decode_token": lambda: TokenManager.decode_token(token),
+        "token.extract_user_id (cached)": lambda: (
+            TokenManager.extract_user_id_from_token(token)
+        ),
+        "token.extract_user_id (uncached)": extract_user_id_uncached,
+        # refresh replaces argon2 verify of login once access token expires
+        "token.create_refresh_token": TokenManager.create_refresh_token,
+        "token.parse_refresh_token": lambda: TokenManager.parse_refresh_token(
+            refresh_token
+        ),
+        "password.hash_password": lambda: PasswordManager.hash_password(PASSWORD),
+        "password.verify_password": lambda: PasswordManager.verify_password(
+            PASSWORD, password_hash
+        ),
+        "schema.UserResponse.model_validate": lambda: UserResponse.model_validate(user),
+        "route.login_response": login_response,
+    }
+
+
+def measure(
+    func: Callable[[], object], samples: int, min_time: float, warmup: float
+) -> dict:
+    """time func, numbers are microseconds per call"""
+    timer = timeit.Timer(func)
+
+    deadline = time.perf_counter() + warmup
+    while time.perf_counter() < deadline:
+        func()
+
+    loops = 1
+    while timer.timeit(loops) < min_time:
+        loops *= 2
+
+    per_call = sorted(timer.timeit(loops) / loops * 1_000_000 for _ in range(samples))
+    return {
+        "loops": loops,
+        "samples": samples,
+        "min_us": per_call[0],
+        "median_us": statistics.median(per_call),
+        "mean_us": statistics.fmean(per_call),
+        "stdev_us": statistics.stdev(per_call) if samples > 1 else 0.0,
+        "p95_us": per_call[min(samples - 1, round(0.95 * samples) - 1)],
+    }
+
+
+def main(args: argparse.Namespace) -> int:
+    argon2 = pwd_context.handler("argon2")
+    print(
+        f"argon2: time_cost={argon2.default_rounds} memory_cost={argon2.memory_cost} "
+        f"parallelism={argon2.parallelism}"
+    )
+
+    results = {}
+    print(f"{'benchmark':<40}{'median us':>12}{'p95 us':>12}{'stdev':>10}")
+    for name, func in build_benchmarks().items():
+        if args.filter and args.filter not in name:
+            continue
+        row = measure(func, args.samples, args.min_time, args.warmup)
+        results[name] = row
+        print(
+            f"{name:<40}{row['median_us']:>12.2f}{row['p95_us']:>12.2f}"
+            f"{row['stdev_us']:>10.2f}"
+        )
+
+    save_report(
+        "micro",
+        {
+            "samples": args.samples,
+            "min_time": args.min_time,
+            "warmup": args.warmup,
+            "argon2": {
+                "time_cost": argon2.default_rounds,
+                "memory_cost": argon2.memory_cost,
+                "parallelism": argon2.parallelism,
+            },
+        },
+        results,
+        args.output,
+    )
+
+    if args.compare and not compare_report(
+        results,
+        args.compare,
+        lower_is_better=("median_us",),
+        tolerance=args.tolerance,
+    ):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--filter", help="run benchmarks which name contains it")
+    parser.add_argument("--samples", type=int, default=20)
+    parser.add_argument("--min-time", type=float, default=0.05, help="seconds")
+    parser.add_argument("--warmup", type=float, default=0.2, help="seconds")
+    parser.add_argument("--output", help="JSON file, default benchmarks/results/")
+    parser.add_argument("--compare", help="JSON of previous run to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,101 @@
+"""
+Benchmark OFFSET vs keyset pagination on users table (needs postgres from .env)
+
+Seeds benchmark users once (emails "bench-*@example.com"), then measures
+latency of page 1 and deep page for both approaches.
+
+usage:
+    python -m benchmarks.pagination --users 200000 --page 10000 --limit 10
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import func, select, text
+
+from app.db.session import async_session_maker, engine
+from app.models.user import User
+from app.repositories.user import UserRepository
+
+SEED_SQL = text("""
+    INSERT INTO users (
+        user_id, email, first_name, last_name, password_hash,
+        is_active, is_verified, created_at, updated_at
+    )
+    SELECT
+        gen_random_uuid(),
+        'bench-' || n || '@example.com',
+        'Bench', 'User', 'not-a-hash',
+        true, false,
+        now() - make_interval(secs => n),
+        now()
+    FROM generate_series(:start, :stop) AS n
+    ON CONFLICT DO NOTHING
+    """)
+
+
+async def seed(users: int) -> None:
+    async with async_session_maker() as session:
+        existing = await session.scalar(
+            select(func.count()).where(User.email.like("bench-%@example.com"))
+        )
+        if existing < users:
+            await session.execute(SEED_SQL, {"start": existing + 1, "stop": users})
+            await session.commit()
+            await session.execute(text("ANALYZE users"))
+
+
+async def measure(func_, repeats: int) -> float:
+    """return median latency in ms"""
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        await func_()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+async def main(users: int, page: int, limit: int, repeats: int) -> None:
+    await seed(users)
+
+    async with async_session_maker() as session:
+        repository = UserRepository(session)
+
+        # walk to cursor of deep page once, as client would do page by page
+        cursor = None
+        for _ in range(page - 1):
+            cursor = (await repository.get_active_users_page(cursor, limit)).next_cursor
+
+        results = {
+            "offset page 1": await measure(
+                lambda: repository.get_activate_users(0, limit), repeats
+            ),
+            f"offset page {page}": await measure(
+                lambda: repository.get_activate_users((page - 1) * limit, limit),
+                repeats,
+            ),
+            "keyset page 1": await measure(
+                lambda: repository.get_active_users_page(None, limit), repeats
+            ),
+            f"keyset page {page}": await measure(
+                lambda: repository.get_active_users_page(cursor, limit), repeats
+            ),
+        }
+
+    await engine.dispose()
+
+    for name, latency in results.items():
+        print(f"{name:<24}{latency:>10.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=200_000)
+    parser.add_argument("--page", type=int, default=10_000)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.users, args.page, args.limit, args.repeats))
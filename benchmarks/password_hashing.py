@@ -0,0 +1,85 @@
+"""
+Benchmark argon2 verification: blocking call on event loop vs hashing pool
+
+Simulates a burst of /login requests (password verification) and, at the same
+time, a cheap endpoint (/health, /me) that only needs the event loop.
+Prints login throughput and cheap endpoint latency for every pool size.
+
+usage:
+    python -m benchmarks.password_hashing --logins 200 --workers 1 2 4 8
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+from app.core.security import HashingPool, PasswordManager, pwd_context
+
+
+async def probe_latency(stop: asyncio.Event, samples: list[float]) -> None:
+    """cheap request: measure how long event loop takes to answer"""
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0.005)
+        samples.append(time.perf_counter() - started - 0.005)
+
+
+async def run_burst(logins: int, hashed: str, pool: HashingPool | None) -> dict:
+    stop = asyncio.Event()
+    samples: list[float] = []
+    probe = asyncio.create_task(probe_latency(stop, samples))
+    await asyncio.sleep(0.01)
+
+    async def login() -> None:
+        if pool is None:
+            pwd_context.verify("benchmark-password", hashed)
+            await asyncio.sleep(0)
+        else:
+            await pool.run(pwd_context.verify, "benchmark-password", hashed, wait=True)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await probe
+    if pool is not None:
+        pool.shutdown()
+
+    samples.sort()
+    return {
+        "logins_per_second": logins / elapsed,
+        "probe_p50_ms": statistics.median(samples) * 1000 if samples else 0.0,
+        "probe_max_ms": samples[-1] * 1000 if samples else 0.0,
+    }
+
+
+async def main(logins: int, workers: list[int]) -> None:
+    hashed = PasswordManager.hash_password("benchmark-password")
+    print(f"cpu count: {os.cpu_count()}, logins per run: {logins}")
+    print(f"{'mode':<16}{'logins/s':>12}{'probe p50 ms':>16}{'probe max ms':>16}")
+
+    result = await run_burst(logins, hashed, pool=None)
+    print(
+        f"{'blocking':<16}{result['logins_per_second']:>12.1f}"
+        f"{result['probe_p50_ms']:>16.2f}{result['probe_max_ms']:>16.2f}"
+    )
+
+    for count in workers:
+        pool = HashingPool(max_workers=count, max_pending=logins)
+        result = await run_burst(logins, hashed, pool=pool)
+        print(
+            f"{f'pool x{count}':<16}{result['logins_per_second']:>12.1f}"
+            f"{result['probe_p50_ms']:>16.2f}{result['probe_max_ms']:>16.2f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    asyncio.run(main(args.logins, args.workers))
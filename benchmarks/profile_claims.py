@@ -0,0 +1,141 @@
+"""
+/users/me RPS with profile from DB and from token claims
+
+boots app.main:app twice with uvicorn (PROFILE_CLAIMS_ENABLED=false, then
+true), drives only /users/me with tokens issued by that server and reports
+RPS, latency and DB queries per request (from Server-Timing) of both modes.
+DB mode reads users through principal and user caches, --cold turns them
+off, so every request of DB mode queries DB
+
+usage:
+    python -m benchmarks.profile_claims --db sqlite --concurrency 16 --duration 10
+    python -m benchmarks.profile_claims --db postgres --workers 4 --cold
+"""
+
+import argparse
+import asyncio
+import re
+import sys
+import tempfile
+
+import httpx
+
+from benchmarks.load import (
+    API,
+    _free_port,
+    boot_server,
+    run_load,
+    wait_ready,
+)
+from benchmarks.report import compare_report, save_report
+
+QUERIES = re.compile(r'desc="(\d+) queries"')
+MODES = {"db": "false", "claims": "true"}
+
+
+async def queries_per_request(base_url: str, samples: int = 50) -> float:
+    """mean DB queries of /users/me, token of fresh user"""
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        user = {
+            "email": "claims-probe@example.com",
+            "first_name": "Claims",
+            "last_name": "Probe",
+            "password": "claims-probe-password",
+        }
+        await client.post(f"{API}/users/register", json=user)
+        response = await client.post(
+            f"{API}/users/login",
+            json={"email": user["email"], "password": user["password"]},
+        )
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        total = 0
+        for _ in range(samples):
+            response = await client.get(f"{API}/users/me", headers=headers)
+            match = QUERIES.search(response.headers.get("server-timing", ""))
+            total += int(match.group(1)) if match else 0
+        return total / samples
+
+
+async def measure(base_url: str, args: argparse.Namespace) -> dict:
+    results = await run_load(base_url, args)
+    await wait_ready(base_url)
+    row = results["me"]
+    row["queries"] = await queries_per_request(base_url)
+    return row
+
+
+def run_mode(mode: str, args: argparse.Namespace) -> dict:
+    extra_env = {"PROFILE_CLAIMS_ENABLED": MODES[mode], "SERVER_TIMING_ENABLED": "true"}
+    if args.cold:
+        extra_env.update(CACHE_BACKEND="none", PRINCIPAL_CACHE_TTL_SECONDS="0")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        port = _free_port()
+        server = boot_server(args.db, args.workers, port, workdir, extra_env)
+        try:
+            return asyncio.run(measure(f"http://127.0.0.1:{port}", args))
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+
+def main(args: argparse.Namespace) -> int:
+    args.mix = {"me": 1.0}
+    results = {mode: run_mode(mode, args) for mode in MODES}
+
+    print(
+        f"{'mode':<10}{'requests':>10}{'errors':>8}{'rps':>10}"
+        f"{'p50 ms':>10}{'p99 ms':>10}{'queries':>10}"
+    )
+    for mode, row in results.items():
+        print(
+            f"{mode:<10}{row['requests']:>10}{row['errors']:>8}{row['rps']:>10.1f}"
+            f"{row['p50_ms']:>10.1f}{row['p99_ms']:>10.1f}{row['queries']:>10.2f}"
+        )
+    if results["db"]["rps"]:
+        print(
+            f"\nclaims / db rps: {results['claims']['rps'] / results['db']['rps']:.2f}"
+        )
+
+    save_report(
+        "profile_claims",
+        {
+            "db": args.db,
+            "workers": args.workers,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "users": args.users,
+            "cold": args.cold,
+        },
+        results,
+        args.output,
+    )
+
+    if args.compare and not compare_report(
+        results,
+        args.compare,
+        higher_is_better=("rps",),
+        lower_is_better=("p99_ms",),
+        tolerance=args.tolerance,
+    ):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--db", choices=["sqlite", "postgres"], default="sqlite")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--warmup", type=float, default=2.0, help="seconds")
+    parser.add_argument("--users", type=int, default=20, help="users with tokens")
+    parser.add_argument("--cold", action="store_true", help="user caches are off")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--output", help="JSON file, default benchmarks/results/")
+    parser.add_argument("--compare", help="JSON of previous run to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,67 @@
+"""
+Benchmark cost of rate limit check for allowed login (IP and email buckets)
+
+memory backend runs in process, redis backend needs redis from REDIS_URL
+
+usage:
+    python -m benchmarks.rate_limit --checks 100000 --backend memory
+"""
+
+import argparse
+import asyncio
+import time
+
+from app.config import settings
+from app.core.rate_limit import (
+    MemoryRateLimitBackend,
+    TokenBucket,
+    check_rate_limit,
+    create_rate_limit_backend,
+    set_rate_limit_backend,
+)
+
+# big buckets, so every check is allowed
+BY_IP = TokenBucket.per_minute("bench_ip", 10**9, 10**9)
+BY_EMAIL = TokenBucket.per_minute("bench_email", 10**9, 10**9)
+
+
+async def run(checks: int, clients: int) -> float:
+    """return microseconds per check of both buckets"""
+    started = time.perf_counter()
+    for i in range(checks):
+        client = i % clients
+        await check_rate_limit(
+            (BY_IP, f"10.0.{client // 256}.{client % 256}"),
+            (BY_EMAIL, f"user-{client}"),
+        )
+    return (time.perf_counter() - started) / checks * 1_000_000
+
+
+async def main(checks: int, clients: int, backends: list[str]) -> None:
+    print(f"checks: {checks}, distinct clients: {clients}")
+    for name in backends:
+        if name == "memory":
+            backend = MemoryRateLimitBackend(settings.rate_limit.memory_size)
+        else:
+            backend = create_rate_limit_backend(
+                settings.rate_limit.model_copy(update={"backend": name})
+            )
+        set_rate_limit_backend(backend)
+        latency = await run(checks, clients)
+        await backend.close()
+        print(f"{name:<8}{latency:>10.2f} us/request")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--checks", type=int, default=100_000)
+    parser.add_argument("--clients", type=int, default=10_000)
+    parser.add_argument(
+        "--backend",
+        action="append",
+        choices=["memory", "redis"],
+        help="repeat for several, default memory",
+    )
+    args = parser.parse_args()
+
+    asyncio.run(main(args.checks, args.clients, args.backend or ["memory"]))
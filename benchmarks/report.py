@@ -0,0 +1,101 @@
+"""
+JSON reports of benchmarks and comparison with report of previous release
+"""
+
+import json
+import platform
+import subprocess
+from datetime import datetime, timezone
+from pathlib import Path
+
+from app.config import settings
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_report(
+    kind: str, meta: dict, results: dict, output: str | None = None
+) -> Path:
+    """
+    Write results with run metadata to JSON
+
+    args:
+        kind: name of benchmark, prefix of file name
+        meta: parameters of run
+        results: name of measurement -> numbers
+        output: file, default benchmarks/results/<kind>-<time>.json
+    """
+    report = {
+        "meta": {
+            "kind": kind,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "commit": _git_commit(),
+            "version": settings.version,
+            "python": platform.python_version(),
+            **meta,
+        },
+        "results": results,
+    }
+    if output is None:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        path = RESULTS_DIR / f"{kind}-{stamp}.json"
+    else:
+        path = Path(output)
+    path.write_text(json.dumps(report, indent=2))
+    print(f"results saved to {path}")
+    return path
+
+
+def compare_report(
+    results: dict,
+    baseline_path: str,
+    higher_is_better: tuple[str, ...] = (),
+    lower_is_better: tuple[str, ...] = (),
+    tolerance: float = 0.2,
+) -> bool:
+    """
+    Print regressions against results of baseline report,
+    returns True if there is no regression
+
+    args:
+        results: results of this run
+        baseline_path: JSON written by save_report
+        higher_is_better: keys which must not drop more than tolerance
+        lower_is_better: keys which must not grow more than tolerance
+        tolerance: allowed relative change
+    """
+    baseline = json.loads(Path(baseline_path).read_text())["results"]
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        for key in higher_is_better:
+            if current[key] < previous[key] * (1 - tolerance):
+                regressions.append(
+                    f"{name}: {key} {current[key]:.2f} < {previous[key]:.2f}"
+                )
+        for key in lower_is_better:
+            if current[key] > previous[key] * (1 + tolerance):
+                regressions.append(
+                    f"{name}: {key} {current[key]:.2f} > {previous[key]:.2f}"
+                )
+
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if not regressions:
+        print(f"no regressions against {baseline_path}")
+    return not regressions
@@ -0,0 +1,133 @@
+"""
+CPU per request of /users/login and /users/me, in process
+
+drives app made by create_app() through httpx.ASGITransport against fresh aiosqlite DB.
+argon2 runs with cheapest parameters and rate limits are off, so CPU goes
+to routing, validation and JSON serialization of responses. Reports best
+of rounds CPU time of event loop thread (includes httpx client) and wall
+time per request, saves JSON and compares CPU with report of previous
+release
+
+usage:
+    python -m benchmarks.serialization
+    python -m benchmarks.serialization --requests 5000 --compare baseline.json
+"""
+
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+
+import httpx
+
+from app.config import settings
+from benchmarks.report import compare_report, save_report
+
+PASSWORD = "serialization-password"
+
+
+async def measure(
+    client: httpx.AsyncClient, request, requests: int, rounds: int
+) -> dict:
+    """best of rounds, CPU is of event loop thread only (no sqlite, argon2)"""
+    for _ in range(min(requests, 200)):
+        await request(client)
+
+    cpu = []
+    wall = []
+    for _ in range(rounds):
+        cpu_started = time.thread_time()
+        wall_started = time.perf_counter()
+        for _ in range(requests):
+            response = await request(client)
+            response.raise_for_status()
+        cpu.append((time.thread_time() - cpu_started) / requests * 1_000_000)
+        wall.append((time.perf_counter() - wall_started) / requests * 1_000_000)
+    return {
+        "requests": requests,
+        "rounds": rounds,
+        "cpu_us": min(cpu),
+        "wall_us": min(wall),
+    }
+
+
+async def run(app, api: str, requests: int, rounds: int) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        user = {
+            "email": "serialization@example.com",
+            "first_name": "Bench",
+            "last_name": "Serialization",
+            "password": PASSWORD,
+        }
+        (await client.post(f"{api}/users/register", json=user)).raise_for_status()
+        credentials = {"email": user["email"], "password": PASSWORD}
+        response = await client.post(f"{api}/users/login", json=credentials)
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        async def login(client: httpx.AsyncClient) -> httpx.Response:
+            return await client.post(f"{api}/users/login", json=credentials)
+
+        async def me(client: httpx.AsyncClient) -> httpx.Response:
+            return await client.get(f"{api}/users/me", headers=headers)
+
+        return {
+            "login": await measure(client, login, requests, rounds),
+            "me": await measure(client, me, requests, rounds),
+        }
+
+
+def main(args: argparse.Namespace) -> int:
+    with tempfile.TemporaryDirectory() as workdir:
+        url = f"sqlite+aiosqlite:///{workdir}/finflow-serialization.db"
+        # create_app reads settings, services read them per call
+        settings.database.DB_URL = url
+        settings.debug = False
+        settings.rate_limit.enabled = False
+        settings.snapshots.refresh_enabled = False
+        from app.core.security import pwd_context
+        from app.main import create_app
+        from benchmarks.load import create_sqlite_schema
+
+        pwd_context.update(
+            argon2__rounds=1, argon2__memory_cost=8, argon2__parallelism=1
+        )
+        asyncio.run(create_sqlite_schema(url))
+        results = asyncio.run(
+            run(create_app(), settings.api_v1_prefix, args.requests, args.rounds)
+        )
+
+    print(f"{'route':<10}{'cpu us':>10}{'wall us':>10}")
+    for name, row in results.items():
+        print(f"{name:<10}{row['cpu_us']:>10.1f}{row['wall_us']:>10.1f}")
+
+    save_report(
+        "serialization",
+        {"requests": args.requests, "rounds": args.rounds},
+        results,
+        args.output,
+    )
+
+    if args.compare and not compare_report(
+        results,
+        args.compare,
+        lower_is_better=("cpu_us",),
+        tolerance=args.tolerance,
+    ):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=1000, help="per round")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--output", help="JSON file, default benchmarks/results/")
+    parser.add_argument("--compare", help="JSON of previous run to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.1)
+
+    sys.exit(main(parser.parse_args()))
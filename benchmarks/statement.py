@@ -0,0 +1,154 @@
+"""
+Benchmark account statement query (needs postgres from .env, migrations at head)
+
+Seeds transactions spread over many accounts (10M rows by default, takes a
+while), then prints EXPLAIN (ANALYZE, BUFFERS) of statement query for one
+account and latency of first and deep pages with and without filters.
+Plan must show index scans on idx_transaction_*_account_created and no Sort
+over whole account history.
+
+usage:
+    python -m benchmarks.statement --rows 10000000 --accounts 10000
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects import postgresql
+
+from app.db.session import async_session_maker, engine
+from app.models.account import Account
+from app.models.transaction import Transaction, TransactionStatus
+from app.models.user import User
+from app.repositories.transaction import TransactionRepository
+from app.schemas.transaction import StatementFilter
+
+SEED_SQL = text("""
+    INSERT INTO transaction (
+        transaction_id, from_account_id, to_account_id, transaction_type,
+        amount, currency, status, description, created_at, updated_at
+    )
+    SELECT
+        gen_random_uuid(),
+        ids[1 + (n % array_length(ids, 1))],
+        ids[1 + ((n * 7 + 1) % array_length(ids, 1))],
+        'TRANSFER',
+        (n % 1000) + 1, 'USD',
+        CASE WHEN n % 20 = 0 THEN 'FAILED' ELSE 'COMPLETED' END::transactionstatus,
+        'benchmark',
+        now() - make_interval(secs => n),
+        now()
+    FROM generate_series(:start, :stop) AS n,
+        (SELECT array_agg(account_id) AS ids FROM accounts
+         WHERE account_number LIKE 'bench-st-%') AS a
+    """)
+
+
+async def seed(rows: int, accounts: int) -> None:
+    async with async_session_maker() as session:
+        existing_accounts = await session.scalar(
+            select(func.count()).where(Account.account_number.like("bench-st-%"))
+        )
+        if existing_accounts < accounts:
+            user = User(
+                email=f"bench-statement-{uuid4().hex[:12]}@example.com",
+                first_name="Bench",
+                last_name="Statement",
+                password_hash="not-a-hash",
+            )
+            session.add(user)
+            await session.flush()
+            session.add_all(
+                Account(user_id=user.user_id, account_number=f"bench-st-{i}")
+                for i in range(existing_accounts, accounts)
+            )
+            await session.commit()
+
+        existing = await session.scalar(
+            select(func.count()).where(Transaction.description == "benchmark")
+        )
+        # batches keep WAL and memory of one statement reasonable
+        for start in range(existing + 1, rows + 1, 1_000_000):
+            stop = min(start + 999_999, rows)
+            await session.execute(SEED_SQL, {"start": start, "stop": stop})
+            await session.commit()
+            print(f"seeded {stop} rows")
+
+        await session.execute(text("ANALYZE transaction"))
+        await session.commit()
+
+
+async def explain(session, statement) -> str:
+    sql = statement.compile(
+        dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+    )
+    result = await session.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {sql}"))
+    return "\n".join(row[0] for row in result)
+
+
+async def measure(func_, repeats: int) -> float:
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        await func_()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+async def main(rows: int, accounts: int, repeats: int) -> None:
+    await seed(rows, accounts)
+
+    async with async_session_maker() as session:
+        account_id = await session.scalar(
+            select(Account.account_id).where(Account.account_number == "bench-st-0")
+        )
+        repository = TransactionRepository(session)
+
+        no_filters = StatementFilter()
+        filtered = StatementFilter(
+            status=TransactionStatus.COMPLETED,
+            date_from=datetime.now() - timedelta(days=30),
+            amount_min=100,
+            amount_max=500,
+        )
+
+        print(await explain(session, repository.statement_query(account_id, filtered)))
+
+        # cursor of 100th page, as client would walk
+        cursor = None
+        for _ in range(99):
+            page = await repository.get_statement(account_id, no_filters, cursor)
+            cursor = page.next_cursor
+
+        results = {
+            "page 1": await measure(
+                lambda: repository.get_statement(account_id, no_filters), repeats
+            ),
+            "page 100": await measure(
+                lambda: repository.get_statement(account_id, no_filters, cursor),
+                repeats,
+            ),
+            "page 1 filtered": await measure(
+                lambda: repository.get_statement(account_id, filtered), repeats
+            ),
+        }
+
+    await engine.dispose()
+
+    for name, latency in results.items():
+        print(f"{name:<20}{latency:>10.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--accounts", type=int, default=10_000)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.rows, args.accounts, args.repeats))
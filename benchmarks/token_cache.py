@@ -0,0 +1,48 @@
+"""
+Benchmark per-request auth cost with and without verified token cache
+
+usage:
+    python -m benchmarks.token_cache --requests 50000 --tokens 100
+"""
+
+import argparse
+import time
+from uuid import uuid4
+
+from app.core.security import TokenManager, token_cache
+
+
+def run(requests: int, tokens: list[str], cached: bool) -> float:
+    """return microseconds per extract_user_id_from_token call"""
+    token_cache.clear()
+    started = time.perf_counter()
+    for i in range(requests):
+        if not cached:
+            token_cache.clear()
+        TokenManager.extract_user_id_from_token(tokens[i % len(tokens)])
+    return (time.perf_counter() - started) / requests * 1_000_000
+
+
+def main(requests: int, token_count: int) -> None:
+    tokens = [
+        TokenManager.create_access_token({"sub": str(uuid4())})
+        for _ in range(token_count)
+    ]
+
+    uncached = run(requests, tokens, cached=False)
+    cached = run(requests, tokens, cached=True)
+    stats = TokenManager.cache_stats()
+
+    print(f"requests: {requests}, distinct tokens: {token_count}")
+    print(f"{'without cache':<16}{uncached:>10.2f} us/request")
+    print(f"{'with cache':<16}{cached:>10.2f} us/request")
+    print(f"hits: {stats.hits}, misses: {stats.misses}, hit rate: {stats.hit_rate:.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=50_000)
+    parser.add_argument("--tokens", type=int, default=100)
+    args = parser.parse_args()
+
+    main(args.requests, args.tokens)
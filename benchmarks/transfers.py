@@ -0,0 +1,104 @@
+"""
+Concurrency benchmark of TransactionService.transfer (needs postgres from .env)
+
+contended: every transfer moves money between same two accounts in both
+directions (worst case for row locks, deadlock-prone without lock ordering)
+uncontended: every worker has own pair of accounts
+
+usage:
+    python -m benchmarks.transfers --transfers 2000 --concurrency 32
+"""
+
+import argparse
+import asyncio
+import time
+from uuid import uuid4
+
+from app.db.session import async_session_maker, engine
+from app.models.account import Account
+from app.models.user import User
+from app.schemas.transaction import TransferCreate
+from app.services.transaction import TransactionService
+
+
+async def create_accounts(count: int) -> tuple:
+    async with async_session_maker() as session:
+        user = User(
+            email=f"bench-transfer-{uuid4().hex[:12]}@example.com",
+            first_name="Bench",
+            last_name="Transfer",
+            password_hash="not-a-hash",
+        )
+        session.add(user)
+        await session.flush()
+
+        accounts = [
+            Account(
+                user_id=user.user_id,
+                account_number=uuid4().hex[:20],
+                balance=1_000_000.0,
+            )
+            for _ in range(count)
+        ]
+        session.add_all(accounts)
+        await session.commit()
+        return user.user_id, [account.account_id for account in accounts]
+
+
+async def run(transfers: int, concurrency: int, contended: bool) -> dict:
+    user_id, account_ids = await create_accounts(2 if contended else 2 * concurrency)
+    latencies: list[float] = []
+    counter = iter(range(transfers))
+
+    async def worker(worker_id: int) -> None:
+        if contended:
+            pair = account_ids[0], account_ids[1]
+        else:
+            pair = account_ids[2 * worker_id], account_ids[2 * worker_id + 1]
+
+        for number in counter:
+            source, destination = pair if number % 2 else pair[::-1]
+            started = time.perf_counter()
+            async with async_session_maker() as session:
+                await TransactionService(session).transfer(
+                    user_id,
+                    TransferCreate(
+                        from_account_id=source,
+                        to_account_id=destination,
+                        amount=1.0,
+                    ),
+                )
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "transfers_per_second": transfers / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+async def main(transfers: int, concurrency: int) -> None:
+    print(f"transfers: {transfers}, concurrency: {concurrency}")
+    print(f"{'mode':<14}{'tps':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for contended in (False, True):
+        result = await run(transfers, concurrency, contended)
+        name = "contended" if contended else "uncontended"
+        print(
+            f"{name:<14}{result['transfers_per_second']:>10.1f}"
+            f"{result['p50_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+        )
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--transfers", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.transfers, args.concurrency))
@@ -0,0 +1,106 @@
+"""
+Benchmark user lookups through shared cache (needs postgres from .env,
+redis for --backend redis)
+
+Reads random users from small hot set by UUID, as authenticated requests
+do, with cache off, in memory of this process and in redis
+
+usage:
+    python -m benchmarks.user_cache --lookups 20000 --users 200
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from uuid import uuid4
+
+from app.config import settings
+from app.core.cache_backend import (
+    MemoryCacheBackend,
+    NullCacheBackend,
+    RedisCacheBackend,
+    set_cache_backend,
+)
+from app.db.session import async_session_maker, engine
+from app.repositories.user import UserRepository
+
+
+async def seed(count: int) -> list:
+    async with async_session_maker() as session:
+        repository = UserRepository(session)
+        result = await repository.create_many(
+            [
+                {
+                    "email": f"bench-cache-{uuid4().hex[:12]}@example.com",
+                    "first_name": "Bench",
+                    "last_name": "Cache",
+                    "password_hash": "not-a-hash",
+                }
+                for _ in range(count)
+            ]
+        )
+        await repository.commit()
+        return result.inserted
+
+
+async def run(backend, user_ids: list, lookups: int) -> float:
+    """return microseconds per lookup"""
+    set_cache_backend(backend)
+    metrics = UserRepository.get_by_user_id.metrics
+    metrics.hits = metrics.misses = 0
+
+    started = time.perf_counter()
+    for _ in range(lookups):
+        # one session per lookup, as one request
+        async with async_session_maker() as session:
+            await UserRepository(session).get_by_user_id(random.choice(user_ids))
+    elapsed = (time.perf_counter() - started) / lookups * 1_000_000
+
+    await backend.close()
+    return elapsed
+
+
+async def main(lookups: int, users: int, backends: list[str]) -> None:
+    user_ids = await seed(users)
+    config = settings.cache
+    factories = {
+        "none": NullCacheBackend,
+        "memory": lambda: MemoryCacheBackend(config.memory_size),
+        "redis": lambda: RedisCacheBackend.from_url(
+            config.redis_url, config.redis_timeout_seconds
+        ),
+    }
+
+    results = {}
+    for name in backends:
+        backend = factories[name]()
+        latency = await run(backend, user_ids, lookups)
+        metrics = UserRepository.get_by_user_id.metrics
+        results[name] = (latency, metrics.hit_rate, backend.errors)
+
+    await engine.dispose()
+
+    print(f"lookups: {lookups}, hot users: {users}")
+    for name, (latency, hit_rate, errors) in results.items():
+        print(
+            f"{name:<8}{latency:>10.1f} us/lookup"
+            f"   hit rate {hit_rate:.3f}   errors {errors}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lookups", type=int, default=20_000)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument(
+        "--backend",
+        action="append",
+        choices=["none", "memory", "redis"],
+        help="repeat for several, default all",
+    )
+    args = parser.parse_args()
+
+    asyncio.run(
+        main(args.lookups, args.users, args.backend or ["none", "memory", "redis"])
+    )
@@ -0,0 +1,45 @@
+"""users table and keyset pagination index
+
+Revision ID: 3f1c9a7d2b64
+Revises: c0aad8386173
+Create Date: 2026-10-17 10:12:05.418230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c9a7d2b64'
+down_revision: Union[str, Sequence[str], None] = 'c0aad8386173'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # previous revision dropped users, databases created by run.py already have it
+    op.create_table('users',
+    sa.Column('user_id', sa.UUID(), nullable=False, comment='ID user'),
+    sa.Column('email', sa.String(length=255), nullable=False, comment='Email user'),
+    sa.Column('first_name', sa.String(length=100), nullable=False, comment='First name'),
+    sa.Column('last_name', sa.String(length=100), nullable=False, comment='Last name'),
+    sa.Column('password_hash', sa.String(length=255), nullable=False, comment='Hash password'),
+    sa.Column('is_active', sa.Boolean(), nullable=False, comment='Check for active user or not'),
+    sa.Column('is_verified', sa.Boolean(), nullable=False, comment='Check what user is verified'),
+    sa.Column('created_at', sa.DateTime(), nullable=False, comment='when post created'),
+    sa.Column('updated_at', sa.DateTime(), nullable=False, comment='when post updated'),
+    sa.PrimaryKeyConstraint('user_id'),
+    if_not_exists=True,
+    )
+    op.create_index('idx_user_email', 'users', ['email'], unique=False, if_not_exists=True)
+    op.create_index('ix_users_email', 'users', ['email'], unique=True, if_not_exists=True)
+    op.create_index('idx_user_is_active', 'users', ['is_active'], unique=False, if_not_exists=True)
+    op.create_index('idx_user_created_at_user_id', 'users', ['created_at', 'user_id'], unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_user_created_at_user_id', table_name='users')
@@ -0,0 +1,83 @@
+"""accounts and transactions
+
+Revision ID: 8d2e4b6a1c93
+Revises: 3f1c9a7d2b64
+Create Date: 2026-10-17 11:03:41.902114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d2e4b6a1c93'
+down_revision: Union[str, Sequence[str], None] = '3f1c9a7d2b64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('accounts',
+    sa.Column('account_id', sa.UUID(), nullable=False, comment='Unique ID bank account'),
+    sa.Column('user_id', sa.UUID(), nullable=False, comment='ID owner bank account'),
+    sa.Column('account_number', sa.String(length=20), nullable=False, comment='Number of bank account'),
+    sa.Column('account_type', sa.Enum('CHECKING', 'SAVINGS', 'INVESTMENT', name='accounttype'), nullable=False, comment='Type of bank account (checking, saving, investment)'),
+    sa.Column('balance', sa.Float(), nullable=False, comment='Balance of bank accountt'),
+    sa.Column('currency', sa.String(length=3), nullable=False, comment='Account currency'),
+    sa.Column('status', sa.Enum('ACTIVE', 'BLOCKED', 'CLOSED', name='accountstatus'), nullable=False, comment='Status a bank account'),
+    sa.Column('is_primary', sa.Boolean(), nullable=False, comment='Check what bank account is primary or not'),
+    sa.Column('created_at', sa.DateTime(), nullable=False, comment='when post created'),
+    sa.Column('updated_at', sa.DateTime(), nullable=False, comment='when post updated'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ),
+    sa.PrimaryKeyConstraint('account_id')
+    )
+    op.create_index('idx_account_currency', 'accounts', ['currency'], unique=False)
+    op.create_index('idx_account_status', 'accounts', ['status'], unique=False)
+    op.create_index('idx_account_user_id', 'accounts', ['user_id'], unique=False)
+    op.create_index(op.f('ix_accounts_account_number'), 'accounts', ['account_number'], unique=True)
+    op.create_index(op.f('ix_accounts_user_id'), 'accounts', ['user_id'], unique=False)
+    op.create_table('transaction',
+    sa.Column('transaction_id', sa.UUID(), nullable=False, comment='unique ID transaction'),
+    sa.Column('from_account_id', sa.UUID(), nullable=False, comment='ID bank account'),
+    sa.Column('to_account_id', sa.UUID(), nullable=True, comment='ID receiver bank account (for transfer)'),
+    sa.Column('transaction_type', sa.Enum('TRANSFER', 'DEPOSIT', 'WITHDRAWAL', 'PAYMENT', name='transactiontype'), nullable=False, comment='Type of transaction'),
+    sa.Column('amount', sa.Float(), nullable=False, comment='Amount of transaction'),
+    sa.Column('currency', sa.String(length=3), nullable=False, comment='Transaction currency'),
+    sa.Column('status', sa.Enum('PENDING', 'COMPLETED', 'FAILED', 'CANCELLED', name='transactionstatus'), nullable=False, comment='Transaction status'),
+    sa.Column('description', sa.Text(), nullable=True, comment='Transaction description'),
+    sa.Column('reference_number', sa.String(length=50), nullable=True, comment='Tracking reference number'),
+    sa.Column('created_at', sa.DateTime(), nullable=False, comment='when post created'),
+    sa.Column('updated_at', sa.DateTime(), nullable=False, comment='when post updated'),
+    sa.ForeignKeyConstraint(['from_account_id'], ['accounts.account_id'], ),
+    sa.ForeignKeyConstraint(['to_account_id'], ['accounts.account_id'], ),
+    sa.PrimaryKeyConstraint('transaction_id'),
+    sa.UniqueConstraint('reference_number')
+    )
+    op.create_index('idx_transaction_from_account', 'transaction', ['from_account_id'], unique=False)
+    op.create_index('idx_transaction_status', 'transaction', ['status'], unique=False)
+    op.create_index('idx_transaction_to_account', 'transaction', ['to_account_id'], unique=False)
+    op.create_index('idx_transaction_type', 'transaction', ['transaction_type'], unique=False)
+    op.create_index(op.f('ix_transaction_from_account_id'), 'transaction', ['from_account_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_transaction_from_account_id'), table_name='transaction')
+    op.drop_index('idx_transaction_type', table_name='transaction')
+    op.drop_index('idx_transaction_to_account', table_name='transaction')
+    op.drop_index('idx_transaction_status', table_name='transaction')
+    op.drop_index('idx_transaction_from_account', table_name='transaction')
+    op.drop_table('transaction')
+    op.drop_index(op.f('ix_accounts_user_id'), table_name='accounts')
+    op.drop_index(op.f('ix_accounts_account_number'), table_name='accounts')
+    op.drop_index('idx_account_user_id', table_name='accounts')
+    op.drop_index('idx_account_status', table_name='accounts')
+    op.drop_index('idx_account_currency', table_name='accounts')
+    op.drop_table('accounts')
+    sa.Enum(name='transactionstatus').drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name='transactiontype').drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name='accountstatus').drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name='accounttype').drop(op.get_bind(), checkfirst=True)
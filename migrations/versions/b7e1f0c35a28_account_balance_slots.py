@@ -0,0 +1,38 @@
+"""account balance slots for hot accounts
+
+Revision ID: b7e1f0c35a28
+Revises: 8d2e4b6a1c93
+Create Date: 2026-10-17 12:21:57.130642
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e1f0c35a28'
+down_revision: Union[str, Sequence[str], None] = '8d2e4b6a1c93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('accounts', sa.Column('balance_slots', sa.Integer(), server_default='0', nullable=False, comment='Count of balance slots for hot account (0 - balance is in this row)'))
+    op.create_table('account_balance_slots',
+    sa.Column('account_id', sa.UUID(), nullable=False, comment='ID bank account'),
+    sa.Column('slot', sa.Integer(), nullable=False, comment='Number of slot'),
+    sa.Column('balance', sa.Float(), nullable=False, comment='Part of account balance'),
+    sa.Column('created_at', sa.DateTime(), nullable=False, comment='when post created'),
+    sa.Column('updated_at', sa.DateTime(), nullable=False, comment='when post updated'),
+    sa.ForeignKeyConstraint(['account_id'], ['accounts.account_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('account_id', 'slot')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('account_balance_slots')
+    op.drop_column('accounts', 'balance_slots')
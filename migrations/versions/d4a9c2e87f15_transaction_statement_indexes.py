@@ -0,0 +1,52 @@
+"""transaction statement indexes
+
+Revision ID: d4a9c2e87f15
+Revises: b7e1f0c35a28
+Create Date: 2026-10-17 13:02:18.554301
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a9c2e87f15'
+down_revision: Union[str, Sequence[str], None] = 'b7e1f0c35a28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY does not block transfers, but can not run in transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_transaction_from_account_created',
+            'transaction',
+            ['from_account_id', 'created_at', 'transaction_id'],
+            unique=False,
+            postgresql_include=['status', 'transaction_type', 'amount'],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'idx_transaction_to_account_created',
+            'transaction',
+            ['to_account_id', 'created_at', 'transaction_id'],
+            unique=False,
+            postgresql_include=['status', 'transaction_type', 'amount'],
+            postgresql_concurrently=True,
+        )
+        # prefixes of new indexes
+        op.drop_index('idx_transaction_from_account', table_name='transaction', postgresql_concurrently=True)
+        op.drop_index('idx_transaction_to_account', table_name='transaction', postgresql_concurrently=True)
+        op.drop_index(op.f('ix_transaction_from_account_id'), table_name='transaction', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(op.f('ix_transaction_from_account_id'), 'transaction', ['from_account_id'], unique=False)
+    op.create_index('idx_transaction_to_account', 'transaction', ['to_account_id'], unique=False)
+    op.create_index('idx_transaction_from_account', 'transaction', ['from_account_id'], unique=False)
+    op.drop_index('idx_transaction_to_account_created', table_name='transaction')
+    op.drop_index('idx_transaction_from_account_created', table_name='transaction')
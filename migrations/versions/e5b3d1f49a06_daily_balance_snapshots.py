@@ -0,0 +1,90 @@
+"""daily balance snapshots
+
+Revision ID: e5b3d1f49a06
+Revises: d4a9c2e87f15
+Create Date: 2026-10-17 14:10:42.381920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b3d1f49a06'
+down_revision: Union[str, Sequence[str], None] = 'd4a9c2e87f15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('daily_balance_snapshot',
+    sa.Column('account_id', sa.UUID(), nullable=False, comment='ID bank account'),
+    sa.Column('day', sa.Date(), nullable=False, comment='Day of snapshot'),
+    sa.Column('opening', sa.Float(), nullable=False, comment='Balance at start of day'),
+    sa.Column('closing', sa.Float(), nullable=False, comment='Balance at end of day'),
+    sa.Column('credits', sa.Float(), nullable=False, comment='Sum of incoming transactions for day'),
+    sa.Column('debits', sa.Float(), nullable=False, comment='Sum of outgoing transactions for day'),
+    sa.Column('created_at', sa.DateTime(), nullable=False, comment='when post created'),
+    sa.Column('updated_at', sa.DateTime(), nullable=False, comment='when post updated'),
+    sa.ForeignKeyConstraint(['account_id'], ['accounts.account_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('account_id', 'day')
+    )
+    op.create_table('snapshot_watermark',
+    sa.Column('name', sa.String(length=50), nullable=False, comment='Name of snapshot'),
+    sa.Column('completed_at', sa.DateTime(), nullable=True, comment='completed_at of last processed transaction'),
+    sa.Column('transaction_id', sa.UUID(), nullable=True, comment='ID of last processed transaction'),
+    sa.Column('created_at', sa.DateTime(), nullable=False, comment='when post created'),
+    sa.Column('updated_at', sa.DateTime(), nullable=False, comment='when post updated'),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.execute(
+        "INSERT INTO snapshot_watermark (name, created_at, updated_at) "
+        "VALUES ('daily_balance', now(), now())"
+    )
+    op.add_column('transaction', sa.Column('completed_at', sa.DateTime(), nullable=True, comment='when transaction was completed'))
+    # transactions were completed when they were written last time
+    op.execute(
+        "UPDATE transaction SET completed_at = updated_at WHERE status = 'COMPLETED'"
+    )
+
+    # CONCURRENTLY does not block transfers, but can not run in transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_transaction_completed',
+            'transaction',
+            ['completed_at', 'transaction_id'],
+            unique=False,
+            postgresql_where=sa.text('completed_at IS NOT NULL'),
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'idx_transaction_from_account_completed',
+            'transaction',
+            ['from_account_id', 'completed_at'],
+            unique=False,
+            postgresql_include=['transaction_type', 'amount'],
+            postgresql_where=sa.text('completed_at IS NOT NULL'),
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'idx_transaction_to_account_completed',
+            'transaction',
+            ['to_account_id', 'completed_at'],
+            unique=False,
+            postgresql_include=['transaction_type', 'amount'],
+            postgresql_where=sa.text('completed_at IS NOT NULL'),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_transaction_to_account_completed', table_name='transaction')
+    op.drop_index('idx_transaction_from_account_completed', table_name='transaction')
+    op.drop_index('idx_transaction_completed', table_name='transaction')
+    op.drop_column('transaction', 'completed_at')
+    op.drop_table('snapshot_watermark')
+    op.drop_table('daily_balance_snapshot')
@@ -1,24 +1,114 @@
+"""
+Run FinFlow API
+
+dev: tables are created by create_all, one process with reload.
+prod: refuses to start if migrations are not at head, runs WEB_CONCURRENCY
+workers with uvloop/httptools when installed (uv sync --extra prod), every
+worker opens DB_POOL_MIN_SIZE connections before it accepts requests, on
+SIGTERM in-flight requests are drained for SERVER_GRACEFUL_TIMEOUT_SECONDS
+
+usage:
+    python run.py
+    python run.py prod
+    python run.py prod --workers 4 --port 8080
+"""
+
+import argparse
 import asyncio
+import importlib.util
+import os
+import sys
+import tempfile
+from pathlib import Path
 
 import uvicorn
 
+from app.config import settings
 from app.db.base import Base
-from app.db.session import engine
+from app.db.schema_version import check_schema_at_head
+from app.db.session import dispose_engines, get_engine
 
 
 async def create_tables():
-    async with engine.begin() as conn:
+    async with get_engine().begin() as conn:
         # await conn.run_sync(Base.metadata.drop_all)  ## uncomment to clear
         await conn.run_sync(Base.metadata.create_all)
     print("Tables created successfully")
+    await dispose_engines()
 
 
-if __name__ == "__main__":
+async def check_schema():
+    try:
+        await check_schema_at_head(get_engine())
+    finally:
+        # workers make their own engines, connections of this process are closed
+        await dispose_engines()
+
+
+def prepare_metrics_dir(workers: int) -> None:
+    """workers share metrics through files, stale files of last run are removed"""
+    if workers == 1 and "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return
+    directory = os.environ.setdefault(
+        "PROMETHEUS_MULTIPROC_DIR", tempfile.mkdtemp(prefix="finflow-metrics-")
+    )
+    Path(directory).mkdir(parents=True, exist_ok=True)
+    for stale in Path(directory).glob("*.db"):
+        stale.unlink()
+
+
+def run_dev(args: argparse.Namespace) -> None:
     asyncio.run(create_tables())
 
     uvicorn.run(
         "app.main:app",
-        host="0.0.0.0",
-        port=8000,
+        host=args.host or "0.0.0.0",
+        port=args.port or 8000,
         reload=True,
     )
+
+
+def run_prod(args: argparse.Namespace) -> None:
+    server = settings.server
+    workers = args.workers or server.workers
+
+    try:
+        asyncio.run(check_schema())
+    except RuntimeError as e:
+        sys.exit(f"refusing to start: {e}")
+
+    prepare_metrics_dir(workers)
+
+    loop = "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+    http = "httptools" if importlib.util.find_spec("httptools") else "h11"
+    print(f"starting {workers} workers, loop={loop} http={http}")
+
+    uvicorn.run(
+        "app.main:create_app",
+        factory=True,
+        host=args.host or server.host,
+        port=args.port or server.port,
+        workers=workers,
+        loop=loop,
+        http=http,
+        lifespan="on",
+        proxy_headers=True,
+        forwarded_allow_ips=server.forwarded_allow_ips,
+        timeout_keep_alive=server.keepalive_seconds,
+        timeout_graceful_shutdown=server.graceful_timeout_seconds,
+        server_header=False,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("mode", nargs="?", choices=["dev", "prod"], default="dev")
+    parser.add_argument("--host")
+    parser.add_argument("--port", type=int)
+    parser.add_argument("--workers", type=int, help="prod only, WEB_CONCURRENCY")
+    args = parser.parse_args()
+
+    if args.mode == "prod":
+        run_prod(args)
+    else:
+        run_dev(args)
@@ -0,0 +1,21 @@
+"""Import of app.main: nothing is made on import, time is under budget"""
+
+import pytest
+
+from benchmarks.import_time import BUDGET_MS, measure
+
+pytestmark = pytest.mark.slow
+
+
+def test_import_makes_nothing():
+    _, _, eager = measure(runs=1)
+
+    assert not eager, f"made on import, must be lazy: {', '.join(eager)}"
+
+
+def test_import_time_under_budget():
+    total_ms, _, _ = measure(runs=3)
+
+    assert (
+        total_ms <= BUDGET_MS
+    ), f"import app.main: {total_ms:.0f} ms (best of 3), budget {BUDGET_MS:.0f} ms"